@@ -0,0 +1,242 @@
+# benchmarks/bench_manager.py
+
+"""
+Benchmarks de core.manager con bibliotecas de 10, 1k, 10k y 100k snippets.
+
+Uso (desde la raíz del repo, sin interfaz gráfica):
+
+    python -m benchmarks.bench_manager
+    python -m benchmarks.bench_manager --sizes 10 1000 --output results.json
+    python -m benchmarks.bench_manager --compare baseline.json
+
+Cada tamaño corre en un proceso aparte, dentro de un directorio temporal
+con su propio sql_snippets.json y config.json: core.manager arranca en
+frío igual que al abrir Klip, y un tamaño no contamina al siguiente.
+
+El resultado es un JSON con el commit, la versión de Python y, por cada
+tamaño y operación, min/mediana/media/p95 en milisegundos. --compare
+marca las operaciones cuya mediana empeoró más de --threshold veces y
+sale con código 1, para usarlo en CI antes de publicar.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import generate_library
+
+DEFAULT_SIZES = [10, 1_000, 10_000, 100_000]
+DEFAULT_THRESHOLD = 1.25
+
+# Consultas de search_snippets: vacía (lista completa), corta, larga y sin resultados
+QUERIES = {
+    "empty": "",
+    "short": "ord",
+    "long": "select_customers_status",
+    "no_match": "zzqxv_no_such_snippet",
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1,
+            setup: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """
+    Corre `fn` `repeat` veces (tras `warmup` descartadas) y devuelve
+    estadísticas en ms. `setup` corre antes de cada vuelta, sin medirse.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "min_ms": samples[0],
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "rounds": repeat,
+    }
+
+
+def _repeat_for(size: int) -> int:
+    # Suficientes vueltas para una mediana estable sin eternizar los 100k
+    return max(5, min(100, 200_000 // max(size, 1)))
+
+
+def run_size(size: int) -> Dict[str, Dict[str, float]]:
+    """Mide un tamaño. Debe correr con cwd en un directorio preparado."""
+    from core import manager
+    from core.config import HOTKEY_SLOTS, get_config
+
+    # El límite de la versión gratuita impediría agregar snippets de prueba
+    manager.MAX_SNIPPETS_FREE = size + 1_000_000
+    store = manager.get_snippet_store()
+    repeat = _repeat_for(size)
+    results: Dict[str, Dict[str, float]] = {}
+
+    # Primera carga (lectura y parseo del archivo) y lecturas ya en memoria
+    results["load_snippets_cold"] = measure(
+        manager.load_snippets, repeat=min(repeat, 10), warmup=0, setup=store.reload
+    )
+    results["load_snippets"] = measure(manager.load_snippets, repeat)
+
+    store.warm_index()
+    for label, query in QUERIES.items():
+        results[f"search_snippets[{label}]"] = measure(
+            lambda q=query: manager.search_snippets(q), repeat
+        )
+        results[f"fuzzy_search_snippets[{label}]"] = measure(
+            lambda q=query: manager.fuzzy_search_snippets(q), repeat
+        )
+
+    counter = [0]
+
+    def round_trip():
+        counter[0] += 1
+        name = f"BENCH_ROUND_TRIP_{counter[0]}"
+        manager.add_snippet(name, "SELECT 1;")
+        manager.update_snippet(name, name + "_V2", "SELECT 2;")
+        manager.delete_snippet(name + "_V2")
+
+    results["add_update_delete"] = measure(round_trip, repeat)
+
+    # Hotkeys: la mitad apunta a snippets que existen y la otra mitad no
+    names = list(store.snapshot())
+
+    def stale_hotkeys():
+        hotkeys = {}
+        for i, slot in enumerate(HOTKEY_SLOTS):
+            if i % 2 == 0 and i < len(names):
+                hotkeys[slot] = names[i]
+            else:
+                hotkeys[slot] = f"MISSING_{i}"
+        get_config().set_hotkeys(hotkeys)
+
+    results["sync_hotkeys_with_snippets"] = measure(
+        manager.sync_hotkeys_with_snippets, repeat, setup=stale_hotkeys
+    )
+    manager.flush_pending_writes()
+    return results
+
+
+def _prepare_directory(directory: str, size: int):
+    with open(os.path.join(directory, "sql_snippets.json"), "w", encoding="utf-8") as f:
+        json.dump(generate_library(size), f, indent=4, ensure_ascii=False)
+    with open(os.path.join(directory, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"hotkeys": {}}, f)
+
+
+def _run_worker(size: int) -> Dict[str, Dict[str, float]]:
+    """Corre run_size en un proceso nuevo dentro de un directorio temporal."""
+    with tempfile.TemporaryDirectory(prefix=f"klip-bench-{size}-") as directory:
+        _prepare_directory(directory, size)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_manager", "--worker", str(size)],
+            cwd=directory, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"El benchmark de {size} snippets falló:\n{proc.stderr}")
+        # core.manager imprime avisos: el JSON es la última línea
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: List[int]) -> Dict[str, object]:
+    results = {}
+    for size in sizes:
+        print(f"⏱️ {size} snippets...", file=sys.stderr)
+        results[str(size)] = _run_worker(size)
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Operaciones cuya mediana empeoró más de `threshold` veces respecto de `baseline`."""
+    regressions = []
+    for size, operations in current["results"].items():
+        base_operations = baseline["results"].get(size, {})
+        for operation, stats in operations.items():
+            base = base_operations.get(operation)
+            if base is None or base["median_ms"] <= 0:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"]
+            if ratio > threshold:
+                regressions.append(
+                    f"{size} snippets · {operation}: {base['median_ms']:.3f} ms → "
+                    f"{stats['median_ms']:.3f} ms (x{ratio:.2f})"
+                )
+    return regressions
+
+
+def _print_table(report: Dict[str, object]):
+    for size, operations in report["results"].items():
+        print(f"\n{size} snippets")
+        for operation, stats in operations.items():
+            print(f"  {operation:<40} {stats['median_ms']:>10.3f} ms  (p95 {stats['p95_ms']:.3f})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de core.manager")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker)))
+        return 0
+
+    report = run_suite(args.sizes)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    _print_table(report)
+    print(f"\n✅ Resultados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print("\n❌ Regresiones:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("✅ Sin regresiones respecto de", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
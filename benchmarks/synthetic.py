@@ -0,0 +1,52 @@
+# benchmarks/synthetic.py
+
+"""
+Bibliotecas sintéticas de snippets SQL para los benchmarks.
+
+Los nombres y las consultas imitan una biblioteca real (SELECT_CUSTOMER_
+ORDERS_17, joins, filtros por fecha...) y se generan con una semilla
+fija: el mismo tamaño produce siempre el mismo archivo, así los
+resultados de distintos commits son comparables.
+"""
+
+import random
+from typing import Dict
+
+VERBS = ["SELECT", "UPDATE", "DELETE", "INSERT", "REPORT", "CHECK", "FIX", "AUDIT"]
+TABLES = [
+    "customers", "orders", "order_items", "invoices", "payments", "products",
+    "inventory", "shipments", "users", "sessions", "contracts", "tickets",
+]
+COLUMNS = [
+    "id", "customer_id", "order_id", "status", "created_at", "updated_at",
+    "amount", "currency", "email", "name", "quantity", "region",
+]
+STATUSES = ["'active'", "'pending'", "'closed'", "'failed'", "'archived'"]
+
+
+def _query(rng: random.Random, table: str) -> str:
+    columns = ", ".join(rng.sample(COLUMNS, rng.randint(2, 5)))
+    lines = [f"SELECT {columns}", f"FROM {table} t"]
+    if rng.random() < 0.5:
+        other = rng.choice(TABLES)
+        lines.append(f"JOIN {other} o ON o.id = t.{rng.choice(COLUMNS)}")
+    lines.append(f"WHERE t.status = {rng.choice(STATUSES)}")
+    if rng.random() < 0.6:
+        lines.append(f"  AND t.created_at >= DATE '20{rng.randint(15, 25)}-0{rng.randint(1, 9)}-01'")
+    if rng.random() < 0.3:
+        lines.append(f"ORDER BY t.{rng.choice(COLUMNS)} DESC")
+    lines.append(f"LIMIT {rng.choice([10, 50, 100, 500])};")
+    return "\n".join(lines)
+
+
+def generate_library(size: int, seed: int = 1234) -> Dict[str, str]:
+    """{nombre: código} con `size` snippets, determinista para cada semilla."""
+    rng = random.Random(seed)
+    snippets: Dict[str, str] = {}
+    i = 0
+    while len(snippets) < size:
+        table = rng.choice(TABLES)
+        name = f"{rng.choice(VERBS)}_{table.upper()}_{rng.choice(COLUMNS).upper()}_{i}"
+        snippets[name] = _query(rng, table)
+        i += 1
+    return snippets
@@ -14,6 +14,12 @@ Prerequisites:
 
 Usage:
     python build_secure.py
+
+The integrity manifest is signed with an Ed25519 private key that must
+never be committed. Point KLIP_SIGNING_KEY at its PEM file before
+building. To create a new key pair (and get the public key to put in
+security.MANIFEST_PUBLIC_KEY):
+    python build_secure.py --generate-signing-key path/outside/the/repo.pem
 """
 
 import os
@@ -21,6 +27,9 @@ import sys
 import shutil
 import subprocess
 
+# Environment variable with the path of the manifest signing key (PEM)
+SIGNING_KEY_ENV = 'KLIP_SIGNING_KEY'
+
 
 def check_dependencies():
     """Check if required packages are installed."""
@@ -83,6 +92,7 @@ def obfuscate_code():
         'notification.py',
         'core/manager.py',
         'ui/overlay.py',
+        'ui/dialogs.py',
     ]
     
     try:
@@ -153,6 +163,81 @@ def build_executable():
         return False
 
 
+def generate_signing_key(path):
+    """Create an Ed25519 key pair: private key to `path`, public key printed."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    
+    if os.path.exists(path):
+        print(f"ERROR: {path} already exists")
+        return False
+    private_key = Ed25519PrivateKey.generate()
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pem)
+    public = private_key.public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    print(f"✓ Private key written to {path} (keep it out of the repository)")
+    print(f"  MANIFEST_PUBLIC_KEY for security.py: {public.hex()}")
+    return True
+
+
+def load_signing_key():
+    """Ed25519 private key from the PEM file named by KLIP_SIGNING_KEY."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    
+    path = os.environ.get(SIGNING_KEY_ENV)
+    if not path:
+        print(f"ERROR: set {SIGNING_KEY_ENV} to the manifest signing key (PEM)")
+        return None
+    try:
+        with open(path, 'rb') as f:
+            key = serialization.load_pem_private_key(f.read(), password=None)
+    except (OSError, ValueError) as e:
+        print(f"ERROR loading signing key {path}: {e}")
+        return None
+    if not isinstance(key, Ed25519PrivateKey):
+        print(f"ERROR: {path} is not an Ed25519 private key")
+        return None
+    return key
+
+
+def sign_executable():
+    """Append the integrity manifest checked at startup by security.py."""
+    print("\n" + "=" * 60)
+    print("Step 3: Appending integrity manifest...")
+    print("=" * 60 + "\n")
+    
+    from security import append_manifest, verify_file_integrity
+    
+    private_key = load_signing_key()
+    if private_key is None:
+        return False
+    exe_path = os.path.join('dist', 'Klip.exe')
+    if not os.path.exists(exe_path):
+        exe_path = os.path.join('dist', 'Klip')
+    try:
+        append_manifest(exe_path, private_key)
+    except OSError as e:
+        print(f"ERROR signing {exe_path}: {e}")
+        return False
+    # Check it the same way the app will (without touching the app's cache)
+    check_cache = os.path.join('build', 'integrity_check.json')
+    os.makedirs('build', exist_ok=True)
+    if not verify_file_integrity(exe_path, check_cache):
+        print(f"ERROR: {exe_path} does not verify against its manifest")
+        print("       (does MANIFEST_PUBLIC_KEY in security.py match the signing key?)")
+        return False
+    print(f"✓ Integrity manifest appended to {exe_path}")
+    return True
+
+
 def print_summary():
     """Print build summary and next steps."""
     print("\n" + "=" * 60)
@@ -172,6 +257,8 @@ def print_summary():
     print("   • Keep the build environment secure")
     print("   • Don't share your .pyarmor/ folder")
     print("   • Consider code signing for distribution")
+    print("   • Any change to Klip.exe after the manifest step (including")
+    print("     appended signatures) makes the integrity check fail")
     print("\n📖 See SECURITY.md for more information")
     print("=" * 60 + "\n")
 
@@ -199,11 +286,18 @@ def main():
         print("\n❌ Build failed during executable creation")
         sys.exit(1)
     
+    # Integrity manifest (must be the last change to the executable)
+    if not sign_executable():
+        print("\n❌ Build failed while appending the integrity manifest")
+        sys.exit(1)
+    
     # Success
     print_summary()
 
 
 if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--generate-signing-key':
+        sys.exit(0 if generate_signing_key(sys.argv[2]) else 1)
     try:
         main()
     except KeyboardInterrupt:
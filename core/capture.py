@@ -0,0 +1,90 @@
+# core/capture.py
+
+"""
+Captura del texto seleccionado en otra aplicación (Alt+1).
+
+Se guarda el portapapeles, se simula Ctrl+C, se espera a que el
+portapapeles cambie y se restaura el contenido original. Antes esto
+corría en el hilo de Qt con sleeps fijos (hasta ~1.2 s con la interfaz
+congelada); ahora corre en un hilo propio y espera el cambio con un
+límite (número de secuencia en Windows, relectura en el resto).
+
+Usa el backend del motor de pegado y su lock, así que una captura
+nunca se intercala con un pegado.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from core.paste import PasteEngine, PasteError, get_paste_engine
+
+# Ctrl+C simulados antes de rendirse
+CAPTURE_ATTEMPTS = 3
+
+
+class SelectionCapture:
+    def __init__(self, engine: Optional[PasteEngine] = None):
+        self.engine = engine if engine is not None else get_paste_engine()
+
+    def _wait_for_copy(self, sequence: Optional[int], original: str,
+                       timing) -> Optional[str]:
+        """Texto nuevo del portapapeles tras el Ctrl+C, o None si no cambió a tiempo."""
+        backend = self.engine.backend
+        deadline = time.perf_counter() + timing["capture_timeout_ms"] / 1000
+        poll = timing["poll_interval_ms"] / 1000
+        while True:
+            if sequence is not None:
+                # Con secuencia se detecta incluso una selección igual al portapapeles
+                if backend.clipboard_sequence() != sequence:
+                    return backend.get_clipboard()
+            else:
+                current = backend.get_clipboard()
+                if current != original:
+                    return current
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def capture(self) -> Optional[str]:
+        """
+        Copia la selección actual y devuelve su texto (sin espacios en los
+        extremos) o None si no había nada seleccionado. Bloquea: llamar
+        desde un hilo que no sea el de Qt.
+        """
+        engine = self.engine
+        backend = engine.backend
+        timing = engine.timing()
+        with engine.lock:
+            original = backend.get_clipboard()
+            selected = None
+            for attempt in range(CAPTURE_ATTEMPTS):
+                sequence = backend.clipboard_sequence()
+                backend.send_copy()
+                copied = self._wait_for_copy(sequence, original, timing)
+                if copied is not None and copied.strip():
+                    selected = copied.strip()
+                    break
+                print(f"⚠️ No se detectó cambio en el portapapeles (intento {attempt + 1})")
+
+            # Restaurar el portapapeles original
+            try:
+                engine.copy(original, timing)
+            except PasteError as e:
+                print(f"⚠️ No se pudo restaurar el portapapeles: {e}")
+        return selected
+
+    def capture_async(self, on_done: Callable[[Optional[str]], None]):
+        """
+        Captura en un hilo propio y entrega el resultado con on_done(texto)
+        desde ese hilo (para la GUI, emitir una señal de Qt en on_done).
+        """
+        def run():
+            try:
+                text = self.capture()
+            except Exception as e:
+                print(f"❌ Error capturando la selección: {e}")
+                text = None
+            on_done(text)
+
+        threading.Thread(target=run, daemon=True).start()
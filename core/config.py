@@ -0,0 +1,235 @@
+# core/config.py
+
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.persistence import WriteBehindFile, file_signature
+
+CONFIG_FILE = "config.json"
+
+# Orden de los números del selector: 1, 2, ..., 9, 0
+HOTKEY_SLOTS = [f"shift_{num}" for num in [1, 2, 3, 4, 5, 6, 7, 8, 9, 0]]
+
+# Lo que la UI guarda en un slot vacío (también puede quedar "" o null)
+UNASSIGNED = "None"
+
+# Tiempos del motor de pegado (ms); se pueden ajustar en la sección "paste"
+PASTE_TIMING_DEFAULTS = {
+    "confirm_timeout_ms": 250.0,
+    "poll_interval_ms": 2.0,
+    "post_paste_ms": 40.0,
+    # Máximo a esperar que un Ctrl+C simulado cambie el portapapeles
+    "capture_timeout_ms": 300.0,
+}
+
+
+def is_assigned(snippet_name: Optional[str]) -> bool:
+    """False para un slot vacío: None, "" o el texto "None"."""
+    return bool(snippet_name) and snippet_name != UNASSIGNED
+
+
+class ConfigService:
+    """
+    Único punto de acceso a config.json.
+
+    El archivo se parsea una sola vez y todas las lecturas se sirven desde
+    memoria. Cada escritura (o recarga explícita) incrementa `generation`,
+    de modo que quien cachee datos derivados pueda saltarse el trabajo si
+    la generación no cambió.
+
+    Las escrituras se aplican en memoria al instante y llegan al disco en
+    segundo plano, agrupadas y de forma atómica (ver core/persistence.py).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[Dict[str, Any]] = None
+        self._exists = False
+        self._generation = 0
+        self._lock = threading.RLock()
+        # Cache snippet -> número, derivado de los hotkeys de la generación actual
+        self._hotkey_numbers: Optional[Dict[str, str]] = None
+        # Se llaman con el servicio tras cada cambio (escritura o recarga)
+        self._listeners: List[Callable[["ConfigService"], None]] = []
+        self._writer = WriteBehindFile(path, self._render)
+        # Firma del archivo al leerlo por última vez
+        self._read_signature = None
+
+    # ------------------------------------------------------------------ lectura
+
+    def _read_file(self) -> Dict[str, Any]:
+        self._read_signature = file_signature(self.path)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._exists = True
+        except FileNotFoundError:
+            self._exists = False
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo leer '{self.path}': {e}")
+            self._exists = True
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _config(self) -> Dict[str, Any]:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._read_file()
+                    self._generation += 1
+        return self._data
+
+    def reload(self):
+        """Vuelve a leer config.json (por ejemplo tras un cambio externo)."""
+        # Lo pendiente en memoria no se pierde al releer
+        self._writer.flush()
+        with self._lock:
+            self._data = self._read_file()
+            self._hotkey_numbers = None
+            self._generation += 1
+        self._notify()
+
+    def refresh(self) -> bool:
+        """
+        Recarga solo si config.json cambió por fuera de Klip (lo usa el
+        watcher). Devuelve True si recargó.
+        """
+        signature = file_signature(self.path)
+        if self._writer.owns(signature) or signature == self._read_signature:
+            return False
+        self.reload()
+        return True
+
+    def add_listener(self, callback: Callable[["ConfigService"], None]):
+        """Registra `callback(config)` para cada cambio de la config."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[["ConfigService"], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        # Fuera del lock: un listener puede volver a leer (o escribir) la config
+        for callback in list(self._listeners):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ Error en listener de config: {e}")
+
+    @property
+    def generation(self) -> int:
+        """Número que cambia cada vez que cambia el contenido de la config."""
+        self._config()
+        return self._generation
+
+    def exists(self) -> bool:
+        self._config()
+        return self._exists
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._config().get(key, default)
+
+    def hotkeys(self) -> Dict[str, str]:
+        """Copia de las asignaciones slot -> nombre de snippet."""
+        hotkeys = self._config().get("hotkeys", {})
+        return dict(hotkeys) if isinstance(hotkeys, dict) else {}
+
+    def hotkey_numbers(self) -> Dict[str, str]:
+        """Mapa nombre de snippet -> número asignado ('1'..'9', '0')."""
+        numbers = self._hotkey_numbers
+        if numbers is None:
+            numbers = {}
+            for key, snippet_name in self.hotkeys().items():
+                if key.startswith("shift_") and is_assigned(snippet_name):
+                    numbers[snippet_name] = key.replace("shift_", "")
+            self._hotkey_numbers = numbers
+        return numbers
+
+    def supabase_url(self, default: str = "") -> str:
+        return self._config().get("supabase_url", default)
+
+    def supabase_key(self, default: str = "") -> str:
+        return self._config().get("supabase_key", default)
+
+    def protected_salt(self) -> Optional[str]:
+        """Sal (base64) de la clave maestra de los snippets protegidos."""
+        return self._config().get("protected_salt") or None
+
+    def protected_verifier(self) -> Optional[str]:
+        """Verificador de la contraseña de los snippets protegidos."""
+        return self._config().get("protected_verifier") or None
+
+    def storage_backend(self) -> str:
+        """Backend de snippets: "json" (por defecto) o "sqlite"."""
+        backend = self._config().get("storage", "json")
+        return backend if backend in ("json", "sqlite") else "json"
+
+    def paste_timing(self) -> Dict[str, float]:
+        """Tiempos del motor de pegado: sección "paste" sobre los valores por defecto."""
+        timing = dict(PASTE_TIMING_DEFAULTS)
+        section = self._config().get("paste", {})
+        if isinstance(section, dict):
+            for key in timing:
+                value = section.get(key)
+                if isinstance(value, (int, float)) and value >= 0:
+                    timing[key] = float(value)
+        return timing
+
+    def credentials(self) -> Tuple[str, str]:
+        """Devuelve (email, password) guardados, o cadenas vacías."""
+        config = self._config()
+        return config.get("email", ""), config.get("password", "")
+
+    # --------------------------------------------------------------- escritura
+
+    def _render(self) -> str:
+        with self._lock:
+            return json.dumps(self._data, indent=4, ensure_ascii=False)
+
+    def owns(self, signature) -> bool:
+        """True si el archivo con esa firma es el que escribimos nosotros."""
+        return self._writer.owns(signature)
+
+    def flush(self):
+        """Escribe ya los cambios pendientes."""
+        self._writer.flush()
+
+    def _save(self):
+        self._writer.schedule()
+        self._exists = True
+        self._hotkey_numbers = None
+        self._generation += 1
+
+    def update(self, **values):
+        """Actualiza claves de primer nivel y guarda."""
+        with self._lock:
+            self._config().update(values)
+            self._save()
+        self._notify()
+
+    def set_hotkeys(self, hotkeys: Dict[str, str]):
+        """Reemplaza la sección de hotkeys completa."""
+        self.update(hotkeys=dict(hotkeys))
+
+    def set_hotkey(self, slot: str, snippet_name: str):
+        """Asigna un snippet (o "None") a un slot como 'shift_3'."""
+        with self._lock:
+            hotkeys = self.hotkeys()
+            hotkeys[slot] = snippet_name
+            self._config()["hotkeys"] = hotkeys
+            self._save()
+        self._notify()
+
+    def set_credentials(self, email: str, password: str):
+        self.update(email=email, password=password)
+
+
+# Servicio único del proceso
+_config_service = ConfigService(CONFIG_FILE)
+
+
+def get_config() -> ConfigService:
+    """Devuelve el servicio de configuración compartido."""
+    return _config_service
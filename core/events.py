@@ -0,0 +1,94 @@
+# core/events.py
+
+"""
+Eventos de cambio publicados por core/manager.py.
+
+Antes, tras cada alta/edición/baja, el overlay y main.py volvían a
+buscar todo (search_snippets + _update_counter) para redibujar. Ahora
+el manager publica qué cambió, con el id estable del snippet, y cada
+suscriptor (modelo del overlay, NumberSelector, bandeja, registro de
+hotkeys) aplica solo esa diferencia.
+
+Los eventos se entregan en el hilo que hizo el cambio (el de Qt, el del
+carril de acciones o el del watcher); los suscriptores de la UI tienen
+que pasarlos al hilo de Qt con una señal.
+"""
+
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+
+
+class SnippetAdded(NamedTuple):
+    snippet_id: int
+    name: str
+    code: str
+
+
+class SnippetUpdated(NamedTuple):
+    snippet_id: int
+    old_name: str
+    name: str
+    code: str
+
+
+class SnippetDeleted(NamedTuple):
+    snippet_id: int
+    name: str
+
+
+class HotkeysChanged(NamedTuple):
+    """Solo los slots que cambiaron ('shift_N')."""
+    # slot -> nombre nuevo ("None" si quedó libre)
+    assignments: Dict[str, str]
+    # slot -> nombre anterior
+    previous: Dict[str, str]
+    # slot -> id del snippet nuevo (None si quedó libre o no existe)
+    ids: Dict[str, Optional[int]]
+
+
+class SnippetsReloaded(NamedTuple):
+    """La colección cambió por completo (archivo editado por fuera, reemplazo total)."""
+    count: int
+
+
+ChangeEvent = Union[SnippetAdded, SnippetUpdated, SnippetDeleted, HotkeysChanged, SnippetsReloaded]
+
+
+class EventBus:
+    """Publicación/suscripción síncrona y segura entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[Callable[[ChangeEvent], None], Tuple[Type, ...]]] = []
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None], *event_types: Type):
+        """
+        Registra `callback(evento)`. Con `event_types` solo recibe esos
+        tipos; sin ellos, todos.
+        """
+        with self._lock:
+            self._subscribers.append((callback, event_types))
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent], None]):
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[0] != callback]
+
+    def publish(self, event: ChangeEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, event_types in subscribers:
+            if event_types and not isinstance(event, event_types):
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️ Error procesando {type(event).__name__}: {e}")
+
+
+# Bus único del proceso
+_event_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    """Devuelve el bus de eventos compartido."""
+    return _event_bus
@@ -0,0 +1,276 @@
+# core/fuzzy.py
+
+"""
+Búsqueda difusa (estilo fzf) sobre los nombres de los snippets.
+
+Una consulta coincide si sus caracteres aparecen en orden dentro del
+nombre ("selcust" -> "SELECT_CUSTOMERS"). La puntuación premia los
+caracteres al inicio de palabra (tras _ - . espacio, cambios camelCase o
+letra/dígito) y los tramos consecutivos, y penaliza los huecos.
+"""
+
+import bisect
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.protected import searchable_code
+
+# Constantes de puntuación (mismos valores que fzf)
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = SCORE_MATCH // 2
+BONUS_NON_WORD = SCORE_MATCH // 2
+BONUS_CAMEL_123 = BONUS_BOUNDARY + SCORE_GAP_EXTENSION
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+# Cada cuántos candidatos se consulta si la búsqueda fue cancelada
+CANCEL_CHECK_INTERVAL = 512
+
+# (nombre, código, puntuación, posiciones resaltables en el nombre)
+FuzzyResult = Tuple[str, str, int, List[int]]
+
+
+def _char_class(ch: str) -> int:
+    # 0 = no palabra, 1 = minúscula, 2 = mayúscula, 3 = dígito, 4 = otra letra
+    if ch.islower():
+        return 1
+    if ch.isupper():
+        return 2
+    if ch.isdigit():
+        return 3
+    if ch.isalpha():
+        return 4
+    return 0
+
+
+def _bonus(prev: str, ch: str) -> int:
+    """Bonificación por coincidir en `ch` cuando el carácter previo es `prev`."""
+    prev_class, cls = _char_class(prev), _char_class(ch)
+    if prev_class == 0 and cls != 0:
+        return BONUS_BOUNDARY
+    if (prev_class == 1 and cls == 2) or (prev_class != 3 and cls == 3):
+        return BONUS_CAMEL_123
+    if cls == 0:
+        return BONUS_NON_WORD
+    return 0
+
+
+# Bonificación por (clase del carácter previo, clase del carácter), calculada
+# con un carácter representativo de cada clase de _char_class
+_BONUS_TABLE = [[_bonus(prev, ch) for ch in " aA1\u3042"] for prev in " aA1\u3042"]
+_class_cache: Dict[str, int] = {}
+
+
+def _prepare(text: str) -> Tuple[str, List[int]]:
+    """Texto en minúsculas (misma longitud) y bonificación de cada posición."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Algunos caracteres cambian de longitud al pasar a minúsculas ('İ')
+        lowered = "".join(ch.lower()[:1] for ch in text)
+    classes = _class_cache
+    bonuses = []
+    prev = 0
+    for ch in text:
+        cls = classes.get(ch)
+        if cls is None:
+            cls = classes[ch] = _char_class(ch)
+        bonuses.append(_BONUS_TABLE[prev][cls])
+        prev = cls
+    return lowered, bonuses
+
+
+def _score(q: str, lowered: str, bonuses: List[int]) -> Optional[Tuple[int, List[int]]]:
+    # Hacia adelante: dónde termina la primera coincidencia completa
+    pos = -1
+    for ch in q:
+        pos = lowered.find(ch, pos + 1)
+        if pos < 0:
+            return None
+
+    # Hacia atrás: el inicio más tardío posible desde ese final
+    positions = [0] * len(q)
+    pos += 1
+    for i in range(len(q) - 1, -1, -1):
+        pos = lowered.rfind(q[i], 0, pos)
+        positions[i] = pos
+
+    # Puntuar la ventana
+    score = 0
+    first_bonus = 0
+    prev_pos = -2
+    for pos in positions:
+        bonus = bonuses[pos]
+        if pos == prev_pos + 1:
+            # Un tramo consecutivo conserva la bonificación de su primer carácter
+            bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+        else:
+            if prev_pos >= 0:
+                score += SCORE_GAP_START + SCORE_GAP_EXTENSION * (pos - prev_pos - 2)
+            first_bonus = bonus
+        score += SCORE_MATCH + bonus
+        prev_pos = pos
+    # El primer carácter cuenta doble
+    score += bonuses[positions[0]] * (BONUS_FIRST_CHAR_MULTIPLIER - 1)
+    return score, positions
+
+
+def fuzzy_match(query: str, text: str) -> Optional[Tuple[int, List[int]]]:
+    """
+    Devuelve (puntuación, posiciones) si `query` es subsecuencia de `text`
+    (sin distinguir mayúsculas), o None.
+
+    Como fzf v1: primero se busca hacia adelante el final de la primera
+    coincidencia y luego hacia atrás el inicio más cercano, para quedarse
+    con la ventana más corta.
+    """
+    if not query:
+        return 0, []
+    lowered, bonuses = _prepare(text)
+    return _score(query.lower(), lowered, bonuses)
+
+
+def score_snippet(query: str, name: str, code: str) -> Optional[FuzzyResult]:
+    """
+    El resultado que FuzzySearcher.search daría para un solo snippet, o
+    None si no aparecería. Sirve para insertar un snippet recién creado
+    o editado en una lista de resultados sin repetir la búsqueda.
+    """
+    if not query:
+        return name, code, 0, []
+    match = fuzzy_match(query, name)
+    if match is not None:
+        return name, code, match[0], match[1]
+    if query.lower() in searchable_code(code).lower():
+        return name, code, 0, []
+    return None
+
+
+def result_sort_key(query: str, name: str, score: int, name_hit: bool = True) -> tuple:
+    """
+    Clave del orden de FuzzySearcher.search (sin query: alfabético). Las
+    coincidencias por nombre van siempre antes que las solo por código,
+    aunque un nombre con muchos huecos puntúe por debajo de cero.
+    """
+    if not query:
+        return (name.lower(),)
+    return (0 if name_hit else 1, -score, len(name), name.lower())
+
+
+class FuzzySearcher:
+    """
+    Búsqueda difusa sobre un SnippetStore con estrechamiento incremental.
+
+    Si la consulta nueva extiende la anterior (se escribió un carácter más)
+    y el store no cambió, solo se vuelven a puntuar los resultados previos:
+    todo lo que coincide con "selc" ya coincidía con "sel".
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._last_query = ""
+        self._last_version = -1
+        self._last_names: List[str] = []
+        # Nombres en minúsculas unidos por '\n' para prefiltrar con una sola regex
+        self._blob_version = -1
+        self._blob = ""
+        self._blob_starts: List[int] = []
+        self._blob_names: List[str] = []
+        # Nombre -> (minúsculas, bonificaciones), válido para _blob_version
+        self._prepared = {}
+
+    def _name_blob(self, snap):
+        version = snap.version
+        if self._blob_version != version:
+            names = [name for name, _ in self.store.sorted_items(snap)]
+            lowered = [name.lower() for name in names]
+            starts = []
+            offset = 0
+            for name in lowered:
+                starts.append(offset)
+                offset += len(name) + 1
+            self._blob = "\n".join(lowered)
+            self._blob_starts = starts
+            self._blob_names = names
+            self._blob_version = version
+            self._prepared = {}
+        return self._blob, self._blob_starts, self._blob_names
+
+    def _prefilter(self, query: str, snap) -> List[str]:
+        """Nombres que contienen la consulta como subsecuencia (regex en C)."""
+        blob, starts, names = self._name_blob(snap)
+        pattern = re.compile("[^\n]*?".join(re.escape(ch) for ch in query.lower()))
+        found = []
+        last_line = -1
+        for match in pattern.finditer(blob):
+            line = bisect.bisect_right(starts, match.start()) - 1
+            if line != last_line:
+                found.append(names[line])
+                last_line = line
+        return found
+
+    def search(self, query: str,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[List[FuzzyResult]]:
+        """
+        Resultados ordenados por puntuación (mejor primero). Los snippets
+        cuyo nombre no coincide pero cuyo código contiene la consulta se
+        incluyen al final con puntuación 0 (ver result_sort_key).
+
+        Devuelve None si `is_cancelled()` se vuelve verdadero a mitad.
+        """
+        with self._lock:
+            # Todo sale del mismo snapshot inmutable del store: nombres,
+            # coincidencias por código y códigos son de una sola versión
+            snap = self.store.current()
+            version = snap.version
+            snippets = snap.snippets
+            if not query:
+                self._last_query, self._last_version, self._last_names = "", version, []
+                return [(name, code, 0, []) for name, code in self.store.sorted_items(snap)]
+
+            self._name_blob(snap)
+
+            narrowing = (
+                self._last_query
+                and query.startswith(self._last_query)
+                and version == self._last_version
+            )
+            # Coincidencias por contenido (índice de trigramas del store)
+            code_hits = {name for name, _ in self.store.search(query, snap)}
+            # Los candidatos van siempre en orden alfabético: así el orden
+            # estable del sort desempata por nombre sin comparar cadenas
+            if narrowing:
+                candidates = [name for name in self._last_names if name in snippets]
+            else:
+                candidates = self._prefilter(query, snap)
+                found = set(candidates)
+                if not code_hits <= found:
+                    found |= code_hits
+                    candidates = [name for name in self._blob_names if name in found]
+
+            prepared = self._prepared
+            q = query.lower()
+            ranked = []
+            for i, name in enumerate(candidates):
+                if is_cancelled is not None and i % CANCEL_CHECK_INTERVAL == 0 and is_cancelled():
+                    return None
+                entry = prepared.get(name)
+                if entry is None:
+                    entry = prepared[name] = _prepare(name)
+                match = _score(q, entry[0], entry[1])
+                # (nivel, -puntuación, largo, orden alfabético): mismo orden
+                # que result_sort_key, sin comparar cadenas
+                if match is not None:
+                    ranked.append((0, -match[0], len(name), i, name, match[1]))
+                elif name in code_hits:
+                    ranked.append((1, 0, len(name), i, name, []))
+
+            self._last_query = query
+            self._last_version = version
+            self._last_names = [entry[4] for entry in ranked]
+            ranked.sort()
+            return [(name, snippets[name], -neg, positions)
+                    for _, neg, _, _, name, positions in ranked]
@@ -0,0 +1,653 @@
+# core/hotkeys.py
+
+"""
+Despachador de atajos globales con un único hook de teclado.
+
+Con keyboard.add_hotkey cada atajo registrado se evaluaba en cada
+evento de teclado del sistema. Aquí hay un solo keyboard.hook que
+alimenta un trie precompilado: cada nodo es un dict indexado por
+(máscara de modificadores, scan code), así que decidir qué hacer con una
+tecla es una búsqueda O(1) sin importar cuántos atajos haya.
+
+El trie admite secuencias ("ctrl+f12, 3": Ctrl+F12 y luego 3). Si un
+nodo tiene a la vez acción propia y continuaciones, su acción se difiere
+hasta SEQUENCE_TIMEOUT o hasta que llegue una tecla que no continúa la
+secuencia; por eso los atajos que abren UI (F12) no deben tener
+continuaciones.
+
+Este hook ve todo lo que el usuario escribe, así que no suprime nada:
+keyboard lo llama desde su propio hilo y ninguna tecla del sistema
+espera al trie (un hook que suprime corre dentro del hook de bajo nivel
+de Windows, y si tarda Windows lo desinstala por LowLevelHooksTimeout).
+Los atajos que sí deben tragarse la tecla se registran además, solo
+ellos, con keyboard.add_hotkey(..., suppress=True), que los resuelve con
+una búsqueda en un dict. stats() informa cuántos eventos procesó el trie
+y cuánto tardó cada uno. Las acciones no corren en el hilo del hook:
+ActionLane las encola y un único hilo trabajador las ejecuta en orden.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Bits de la máscara de modificadores
+MOD_CTRL = 1
+MOD_SHIFT = 2
+MOD_ALT = 4
+MOD_WIN = 8
+
+_MODIFIER_NAMES = {
+    "ctrl": MOD_CTRL,
+    "control": MOD_CTRL,
+    "shift": MOD_SHIFT,
+    "alt": MOD_ALT,
+    "windows": MOD_WIN,
+    "win": MOD_WIN,
+}
+
+# Tiempo máximo entre teclas de una secuencia (s)
+SEQUENCE_TIMEOUT = 0.3
+
+# Una misma acción repetida dentro de esta ventana (s) se descarta
+REPEAT_WINDOW = 0.15
+
+ChordKey = Tuple[int, int]
+
+
+class _Node:
+    __slots__ = ("children", "action", "suppress", "spec", "timed")
+
+    def __init__(self):
+        self.children: Dict[ChordKey, "_Node"] = {}
+        self.action: Optional[Callable[..., None]] = None
+        self.suppress = False
+        self.spec = ""
+        self.timed = False
+
+
+class Invocation:
+    """
+    Una activación de un atajo, lista para ejecutar: la acción, el atajo
+    que la disparó y el perf_counter() del "down" de la tecla en el hook.
+    Las acciones registradas con `timed` reciben ese instante, así la
+    latencia medida incluye la espera en la cola de acciones.
+    """
+
+    __slots__ = ("action", "chord", "pressed_at", "timed")
+
+    def __init__(self, action: Callable[..., None], chord: str, pressed_at: float, timed: bool):
+        self.action = action
+        self.chord = chord
+        self.pressed_at = pressed_at
+        self.timed = timed
+
+    def __call__(self):
+        if self.timed:
+            self.action(self.pressed_at)
+        else:
+            self.action()
+
+    # Dos pulsaciones del mismo atajo son la misma acción para ActionLane
+    def __eq__(self, other):
+        return (isinstance(other, Invocation)
+                and self.action == other.action and self.chord == other.chord)
+
+    def __hash__(self):
+        return hash((self.action, self.chord))
+
+
+def _keyboard_scan_codes(name: str) -> Iterable[int]:
+    import keyboard
+    return keyboard.key_to_scan_codes(name)
+
+
+def _run_inline(action: Callable[[], None]):
+    action()
+
+
+def _keyboard_suppress(spec: str, timeout: float) -> Callable[[], None]:
+    """
+    Hace que keyboard trague `spec` sin ejecutar nada (la acción la
+    dispara el trie). Devuelve la función que deshace el registro.
+    """
+    import keyboard
+    # Un callback propio por atajo: keyboard indexa sus registros por callback
+    remove = keyboard.add_hotkey(spec, lambda: False, suppress=True, timeout=timeout)
+    return lambda: keyboard.remove_hotkey(remove)
+
+
+class ChordDispatcher:
+    """
+    Resuelve atajos y secuencias con un trie de (modificadores, scan code).
+
+    - `resolve(nombre)` devuelve los scan codes de una tecla (por defecto
+      keyboard.key_to_scan_codes).
+    - `executor(acción)` decide dónde corre cada acción. El hook nunca
+      debe bloquearse, así que las acciones lentas tienen que ir a otro
+      hilo.
+    - `suppressor(atajo, timeout)` registra la supresión de un atajo y
+      devuelve cómo quitarla (por defecto keyboard.add_hotkey con
+      suppress=True; solo se usa en Windows con el hook instalado).
+    """
+
+    def __init__(self, resolve: Callable[[str], Iterable[int]] = _keyboard_scan_codes,
+                 executor: Callable[[Callable[[], None]], None] = _run_inline,
+                 sequence_timeout: float = SEQUENCE_TIMEOUT,
+                 suppressor: Callable[[str, float], Callable[[], None]] = _keyboard_suppress):
+        self.resolve = resolve
+        self.executor = executor
+        self.sequence_timeout = sequence_timeout
+        self.suppressor = suppressor
+        self._root = _Node()
+        self._lock = threading.Lock()
+        # scan code -> bit de modificador
+        self._modifier_scans: Dict[int, int] = {}
+        self._modifiers_down: Dict[int, int] = {}
+        self._mask = 0
+        # Teclas no modificadoras presionadas (para ignorar la autorrepetición)
+        self._pressed = set()
+        # Teclas cuyo "down" se suprimió: su "up" también se suprime
+        self._swallowed = set()
+        # Estado de secuencia en curso
+        self._node: Optional[_Node] = None
+        self._node_pressed_at = 0.0
+        self._deadline = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._hook = None
+        # Atajos que se tragan la tecla -> función que quita su supresión
+        # (None mientras el hook no esté instalado)
+        self._suppressed: Dict[str, Optional[Callable[[], None]]] = {}
+        self._suppress_lock = threading.Lock()
+        # Costo del hook
+        self._events = 0
+        self._total_ns = 0
+        self._max_ns = 0
+
+    # ---------------------------------------------------------- compilación
+
+    def _learn_modifiers(self):
+        """
+        Registra los scan codes de todos los modificadores, se usen o no:
+        así Ctrl+F12 no dispara el atajo de F12 solo.
+        """
+        if self._modifier_scans:
+            return
+        for name in ("ctrl", "shift", "alt", "windows"):
+            try:
+                scans = self.resolve(name)
+            except ValueError:
+                continue
+            for scan in scans:
+                self._modifier_scans[scan] = _MODIFIER_NAMES[name]
+
+    def _parse_step(self, step: str) -> List[ChordKey]:
+        parts = [part.strip().lower() for part in step.split("+") if part.strip()]
+        if not parts:
+            raise ValueError(f"Atajo vacío: '{step}'")
+        *modifiers, key = parts
+        self._learn_modifiers()
+        mask = 0
+        for name in modifiers:
+            if name not in _MODIFIER_NAMES:
+                raise ValueError(f"Modificador desconocido '{name}' en '{step}'")
+            mask |= _MODIFIER_NAMES[name]
+        scans = list(self.resolve(key))
+        if not scans:
+            raise ValueError(f"Tecla desconocida '{key}' en '{step}'")
+        return [(mask, scan) for scan in scans]
+
+    def add(self, spec: str, action: Callable[..., None], suppress: bool = False,
+            timed: bool = False):
+        """
+        Registra un atajo: "f12", "ctrl+shift+s" o una secuencia
+        "ctrl+f12, 3". En Windows las secuencias siempre se suprimen
+        (keyboard reenvía las teclas si la secuencia no se completa) y los
+        atajos simples solo con `suppress`. Con `timed` la acción recibe
+        el perf_counter() del momento en que se pulsó.
+        """
+        steps = [self._parse_step(step) for step in spec.split(",")]
+        with self._lock:
+            nodes = [self._root]
+            for depth, variants in enumerate(steps):
+                next_nodes = []
+                for node in nodes:
+                    for key in variants:
+                        child = node.children.get(key)
+                        if child is None:
+                            child = node.children[key] = _Node()
+                        child.suppress = child.suppress or suppress or depth > 0
+                        next_nodes.append(child)
+                nodes = next_nodes
+            for node in nodes:
+                node.action = action
+                node.spec = spec
+                node.timed = timed
+        if suppress or len(steps) > 1:
+            self._suppress(spec)
+
+    def remove(self, spec: str):
+        """Quita el atajo `spec` (y los nodos que queden vacíos)."""
+        steps = [self._parse_step(step) for step in spec.split(",")]
+        with self._lock:
+            self._remove(self._root, steps)
+        self._unsuppress(spec)
+
+    def _remove(self, node: _Node, steps: List[List[ChordKey]]):
+        variants, rest = steps[0], steps[1:]
+        for key in variants:
+            child = node.children.get(key)
+            if child is None:
+                continue
+            if rest:
+                self._remove(child, rest)
+            else:
+                child.action = None
+            if child.action is None and not child.children:
+                del node.children[key]
+
+    def clear(self):
+        with self._lock:
+            self._root = _Node()
+            self._reset()
+        for spec in list(self._suppressed):
+            self._unsuppress(spec)
+
+    # ------------------------------------------------------------ supresión
+
+    def suppressed(self) -> List[str]:
+        """Atajos que se tragan la tecla en lugar de dejarla pasar."""
+        with self._suppress_lock:
+            return sorted(self._suppressed)
+
+    def _suppress(self, spec: str):
+        with self._suppress_lock:
+            if self._suppressed.get(spec) is not None:
+                return
+            self._suppressed[spec] = None
+            if self._hook is not None and sys.platform == "win32":
+                self._suppressed[spec] = self.suppressor(spec, self.sequence_timeout)
+
+    def _unsuppress(self, spec: str):
+        with self._suppress_lock:
+            remove = self._suppressed.pop(spec, None)
+        if remove is not None:
+            remove()
+
+    # -------------------------------------------------------------- eventos
+
+    def _reset(self):
+        self._node = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _fire(self, node: _Node, pressed_at: float):
+        try:
+            self.executor(Invocation(node.action, node.spec, pressed_at, node.timed))
+        except Exception as e:
+            print(f"❌ Error ejecutando atajo: {e}")
+
+    def _flush_pending(self, node: _Node):
+        """Vence el tiempo de una secuencia: corre la acción del prefijo."""
+        with self._lock:
+            if self._node is not node:
+                return
+            pressed_at = self._node_pressed_at
+            self._reset()
+        if node.action is not None:
+            self._fire(node, pressed_at)
+
+    def handle(self, scan: int, is_down: bool) -> bool:
+        """
+        Procesa un evento. Devuelve True si la tecla fue consumida por un
+        atajo que pide supresión.
+        """
+        bit = self._modifier_scans.get(scan)
+        if bit is not None:
+            if is_down:
+                self._modifiers_down[scan] = bit
+            else:
+                self._modifiers_down.pop(scan, None)
+            mask = 0
+            for value in self._modifiers_down.values():
+                mask |= value
+            self._mask = mask
+            return False
+
+        if not is_down:
+            self._pressed.discard(scan)
+            if scan in self._swallowed:
+                self._swallowed.discard(scan)
+                return True
+            return False
+
+        if scan in self._pressed:
+            # Autorrepetición de una tecla mantenida: no vuelve a disparar
+            return scan in self._swallowed
+        self._pressed.add(scan)
+        pressed_at = time.perf_counter()
+
+        key = (self._mask, scan)
+        # (nodo, momento del "down" que lo activó)
+        fire = []
+        with self._lock:
+            node = self._node
+            if node is not None:
+                child = node.children.get(key)
+                if child is None and self._mask:
+                    # Ctrl+F12 → 3 con Ctrl todavía apretado
+                    child = node.children.get((0, scan))
+                if child is None or pressed_at > self._deadline:
+                    # La secuencia se cortó: corre la acción pendiente del prefijo
+                    prefix_pressed_at = self._node_pressed_at
+                    self._reset()
+                    if node.action is not None:
+                        fire.append((node, prefix_pressed_at))
+                    child = self._root.children.get(key)
+            else:
+                child = self._root.children.get(key)
+
+            if child is None:
+                consumed = False
+            else:
+                consumed = child.suppress
+                if child.children:
+                    # Puede seguir una secuencia: esperar la próxima tecla
+                    self._reset()
+                    self._node = child
+                    self._node_pressed_at = pressed_at
+                    self._deadline = pressed_at + self.sequence_timeout
+                    if child.action is not None:
+                        self._timer = threading.Timer(self.sequence_timeout, self._flush_pending, (child,))
+                        self._timer.daemon = True
+                        self._timer.start()
+                else:
+                    self._reset()
+                    if child.action is not None:
+                        fire.append((child, pressed_at))
+
+        for fired_node, fired_at in fire:
+            self._fire(fired_node, fired_at)
+        if consumed:
+            self._swallowed.add(scan)
+        return consumed
+
+    def _on_event(self, event) -> bool:
+        started = time.perf_counter_ns()
+        consumed = self.handle(event.scan_code, event.event_type == "down")
+        elapsed = time.perf_counter_ns() - started
+        self._events += 1
+        self._total_ns += elapsed
+        if elapsed > self._max_ns:
+            self._max_ns = elapsed
+        # El hook no suprime: lo que haya que tragar lo hace _suppress
+        return True
+
+    # ------------------------------------------------------------ instalación
+
+    def install(self):
+        """
+        Instala el único hook global, sin supresión, y registra la
+        supresión de los atajos que la piden (solo en Windows).
+        """
+        import keyboard
+        if self._hook is None:
+            self._hook = keyboard.hook(self._on_event)
+            for spec in list(self._suppressed):
+                self._suppress(spec)
+
+    def uninstall(self):
+        if self._hook is not None:
+            import keyboard
+            keyboard.unhook(self._hook)
+            self._hook = None
+            with self._suppress_lock:
+                removers = [remove for remove in self._suppressed.values() if remove is not None]
+                self._suppressed = dict.fromkeys(self._suppressed)
+            for remove in removers:
+                remove()
+
+    def stats(self) -> Dict[str, float]:
+        """Eventos procesados y costo medio/máximo por evento (µs)."""
+        events = self._events
+        return {
+            "events": events,
+            "mean_us": self._total_ns / events / 1000 if events else 0.0,
+            "max_us": self._max_ns / 1000,
+        }
+
+
+class ActionLane:
+    """
+    Carril único de ejecución para las acciones de los atajos.
+
+    submit() solo encola y vuelve en microsegundos, así que sirve como
+    `executor` de ChordDispatcher: el hook nunca espera a un pegado. Un
+    hilo trabajador ejecuta las acciones en el orden en que llegaron.
+
+    - Una acción que ya está en cola no se vuelve a encolar (ráfagas de
+      la misma tecla se funden en una).
+    - Una acción que empezó hace menos de `repeat_window` segundos se
+      descarta (doble pulsación accidental).
+
+    Las acciones se identifican por su atajo (Invocation.chord) y, si no
+    lo tienen, por la propia función. Los registros de inicio más viejos
+    que `repeat_window` se podan: rebindear hotkeys crea funciones
+    nuevas y no deben acumularse.
+    """
+
+    def __init__(self, repeat_window: float = REPEAT_WINDOW, name: str = "klip-actions"):
+        self.repeat_window = repeat_window
+        self.name = name
+        self._queue: Deque[Callable[[], None]] = deque()
+        # Claves (atajo o función) de lo que está en cola
+        self._pending = set()
+        # Clave -> perf_counter() del último inicio, solo dentro de la ventana
+        self._last_started: Dict[Hashable, float] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._submitted = 0
+        self._dropped = 0
+        self._completed = 0
+
+    def __call__(self, action: Callable[[], None]):
+        self.submit(action)
+
+    def submit(self, action: Callable[[], None]) -> bool:
+        """Encola `action`. Devuelve False si se descartó por duplicada."""
+        with self._cond:
+            self._submitted += 1
+            if self._stopped:
+                self._dropped += 1
+                return False
+            key = self._key(action)
+            last = self._last_started.get(key)
+            if key in self._pending or (
+                    last is not None and time.perf_counter() - last < self.repeat_window):
+                self._dropped += 1
+                return False
+            self._pending.add(key)
+            self._queue.append(action)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                action = self._queue.popleft()
+                key = self._key(action)
+                self._pending.discard(key)
+                now = time.perf_counter()
+                self._prune(now)
+                self._last_started[key] = now
+            try:
+                action()
+            except Exception as e:
+                print(f"❌ Error ejecutando atajo: {e}")
+            with self._cond:
+                self._completed += 1
+                self._cond.notify_all()
+
+    @staticmethod
+    def _key(action: Callable[[], None]) -> Hashable:
+        chord = getattr(action, "chord", None)
+        return ("chord", chord) if chord else action
+
+    def _prune(self, now: float):
+        """Olvida los inicios que ya no pueden descartar nada."""
+        expired = [key for key, started in self._last_started.items()
+                   if now - started >= self.repeat_window]
+        for key in expired:
+            del self._last_started[key]
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la cola se vacíe. Devuelve False si venció `timeout`."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self._completed + self._dropped < self._submitted:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self):
+        """No acepta más acciones; el trabajador termina lo ya encolado."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "dropped": self._dropped,
+                "queued": len(self._queue),
+            }
+
+
+def slot_chords(slot: str) -> List[str]:
+    """
+    Atajos de un slot de config: 'shift_3' -> Shift+3 y la secuencia
+    Ctrl+F12 → 3. La secuencia no cuelga de F12 solo: F12 no tiene
+    continuaciones y abre el selector sin esperar SEQUENCE_TIMEOUT (el
+    dígito que sigue lo atiende el propio selector).
+    """
+    number = slot.replace("shift_", "")
+    return [f"shift+{number}", f"ctrl+f12, {number}"]
+
+
+class HotkeyRegistry:
+    """
+    Mantiene en el dispatcher los atajos de pegado de cada slot de hotkeys.
+
+    apply() compara la asignación nueva con la vigente y solo quita o
+    agrega los atajos de los slots que cambiaron; attach() lo engancha a
+    los cambios de ConfigService para que lo que se guarda en el diálogo
+    de configuración o en la asignación automática tenga efecto al
+    momento, sin reiniciar Klip.
+
+    `resolve(nombre)` traduce el nombre guardado en la config a la clave
+    que recibe `make_action` (por ejemplo el id estable del snippet); se
+    llama una vez por slot cada vez que cambia la config o la colección,
+    nunca al pulsar la tecla. Si devuelve None el slot queda sin atajo
+    hasta el próximo resync() (un snippet agregado o recargado después).
+    """
+
+    def __init__(self, dispatcher: ChordDispatcher,
+                 make_action: Callable[[Hashable], Callable[[], None]],
+                 chords: Callable[[str], List[str]] = slot_chords,
+                 resolve: Callable[[str], Optional[Hashable]] = lambda name: name):
+        self.dispatcher = dispatcher
+        self.make_action = make_action
+        self.chords = chords
+        self.resolve = resolve
+        self._lock = threading.Lock()
+        # slot -> clave enlazada ahora
+        self._bound: Dict[str, Hashable] = {}
+        self._generation = None
+
+    def bound(self) -> Dict[str, Hashable]:
+        return dict(self._bound)
+
+    def apply(self, hotkeys: Dict[str, str]) -> int:
+        """Aplica una asignación slot -> snippet. Devuelve cuántos slots cambiaron."""
+        with self._lock:
+            keys = {
+                slot: self.resolve(name) if name and name != "None" else None
+                for slot, name in hotkeys.items()
+            }
+            for slot in self._bound:
+                keys.setdefault(slot, None)
+            return self._rebind(keys)
+
+    def apply_resolved(self, keys: Dict[str, Optional[Hashable]]) -> int:
+        """
+        Cambia solo los slots de `keys` (slot -> clave ya resuelta, None
+        para liberarlo); el resto queda como está.
+        """
+        with self._lock:
+            return self._rebind(keys)
+
+    def _rebind(self, keys: Dict[str, Optional[Hashable]]) -> int:
+        changed = 0
+        for slot, new in keys.items():
+            old = self._bound.get(slot)
+            if old == new:
+                continue
+            changed += 1
+            for spec in self.chords(slot):
+                if old is not None:
+                    self.dispatcher.remove(spec)
+                if new is not None:
+                    self.dispatcher.add(spec, self.make_action(new))
+            if new is None:
+                del self._bound[slot]
+            else:
+                self._bound[slot] = new
+        return changed
+
+    def on_hotkeys_changed(self, event) -> int:
+        """Suscriptor de core.events.HotkeysChanged: trae los ids ya resueltos."""
+        started = time.perf_counter()
+        return self._report(self.apply_resolved(event.ids), started)
+
+    def sync(self, config) -> int:
+        """Aplica los hotkeys de `config` si su generación cambió."""
+        if config.generation == self._generation:
+            return 0
+        return self.resync(config)
+
+    def resync(self, config) -> int:
+        """
+        Vuelve a resolver todos los slots de `config` aunque la config no
+        haya cambiado: tras agregar o recargar snippets, un nombre que no
+        existía ahora sí existe (o apunta a otro id). Solo se tocan los
+        slots cuya clave cambió.
+        """
+        started = time.perf_counter()
+        self._generation = config.generation
+        return self._report(self.apply(config.hotkeys()), started)
+
+    @staticmethod
+    def _report(changed: int, started: float) -> int:
+        if changed:
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"✅ Hotkeys actualizados: {changed} slot(s) en {elapsed:.2f} ms")
+        return changed
+
+    def attach(self, config):
+        """Sincroniza ahora y luego con cada cambio de la config."""
+        self.sync(config)
+        config.add_listener(self.sync)
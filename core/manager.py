@@ -1,68 +1,156 @@
 # core/manager.py
 
-import json
-import os
-from typing import Dict, List, Tuple
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.config import CONFIG_FILE, HOTKEY_SLOTS, UNASSIGNED, ConfigService, get_config, is_assigned
+from core.events import (
+    HotkeysChanged, SnippetAdded, SnippetDeleted, SnippetsReloaded, SnippetUpdated, get_event_bus,
+)
+from core.fuzzy import FuzzyResult, FuzzySearcher
+from core.protected import SnippetVault, is_protected
+from core.storage import SqliteBackend
+from core.store import SnippetStore
+from core.watcher import FileWatcher
 
 SNIPPETS_FILE = "sql_snippets.json"
+SNIPPETS_DB_FILE = "sql_snippets.db"
 
 # Version limits
 MAX_SNIPPETS_FREE = 3
 MAX_SNIPPETS_PREMIUM = 50  # For future premium version
 
 
+def _create_snippet_store() -> SnippetStore:
+    """Crea el store con el backend elegido en config.json ("storage")."""
+    if get_config().storage_backend() == "sqlite":
+        try:
+            # La primera vez importa sql_snippets.json automáticamente
+            return SnippetStore(backend=SqliteBackend(SNIPPETS_DB_FILE, json_path=SNIPPETS_FILE))
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo abrir '{SNIPPETS_DB_FILE}', usando JSON: {e}")
+    return SnippetStore(SNIPPETS_FILE)
+
+
+# Store único del proceso: los datos se leen una vez y se sirven desde memoria
+_snippet_store = _create_snippet_store()
+_fuzzy_searcher = FuzzySearcher(_snippet_store)
+
+
+def _publish_reloaded(store: SnippetStore):
+    get_event_bus().publish(SnippetsReloaded(store.count()))
+
+
+# Hotkeys vigentes, para publicar solo los slots que cambian
+_published_hotkeys: Dict[str, str] = get_config().hotkeys()
+
+
+def _publish_hotkey_changes(config: ConfigService):
+    global _published_hotkeys
+    hotkeys = config.hotkeys()
+    previous = _published_hotkeys
+    assignments = {
+        slot: hotkeys.get(slot, "None")
+        for slot in set(previous) | set(hotkeys)
+        if hotkeys.get(slot, "None") != previous.get(slot, "None")
+    }
+    _published_hotkeys = hotkeys
+    if not assignments:
+        return
+    # Los nombres se resuelven a ids una sola vez, aquí
+    ids = {
+        slot: _snippet_store.snippet_id(name) if is_assigned(name) else None
+        for slot, name in assignments.items()
+    }
+    get_event_bus().publish(HotkeysChanged(
+        assignments=assignments,
+        previous={slot: previous.get(slot, "None") for slot in assignments},
+        ids=ids,
+    ))
+
+
+_snippet_store.add_listener(_publish_reloaded)
+get_config().add_listener(_publish_hotkey_changes)
+
+# Cuerpos protegidos: se cifran al guardar y se descifran solo al pegar/editar
+_vault = SnippetVault(
+    get_config().protected_salt,
+    lambda salt: get_config().update(protected_salt=salt),
+    get_config().protected_verifier,
+    lambda verifier: get_config().update(protected_verifier=verifier),
+)
+
+
+def get_snippet_store() -> SnippetStore:
+    """Devuelve el store de snippets compartido por todo el proceso."""
+    return _snippet_store
+
+
 def load_snippets() -> Dict[str, str]:
-    """Carga los snippets desde el archivo JSON."""
-    if os.path.exists(SNIPPETS_FILE):
-        with open(SNIPPETS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                return data
-    return {}
+    """Devuelve una copia de los snippets (servidos desde memoria)."""
+    return dict(_snippet_store.snapshot())
 
 
 def save_snippets(snippets: Dict[str, str]):
-    """Guarda los snippets en el archivo JSON."""
-    with open(SNIPPETS_FILE, "w", encoding="utf-8") as f:
-        json.dump(snippets, f, indent=4, ensure_ascii=False)
+    """Reemplaza todos los snippets (una sola escritura, en segundo plano)."""
+    _snippet_store.replace_all(snippets)
+    _publish_reloaded(_snippet_store)
 
 
-def add_snippet(name: str, code: str):
-    """Agrega un nuevo snippet y lo asigna automáticamente al siguiente número disponible."""
-    snippets = load_snippets()
-    
+def add_snippet(name: str, code: str, protected: bool = False):
+    """
+    Agrega un nuevo snippet y lo asigna automáticamente al siguiente número disponible.
+    Con `protected` el código se guarda cifrado (requiere desbloquear antes).
+    """
     # Check snippet limit for FREE version
-    if len(snippets) >= MAX_SNIPPETS_FREE:
+    if _snippet_store.count() >= MAX_SNIPPETS_FREE:
         raise ValueError(f"Snippet limit reached ({MAX_SNIPPETS_FREE}/{MAX_SNIPPETS_FREE}). Upgrade to Premium for unlimited snippets!")
     
-    if name in snippets:
-        raise ValueError(f"El snippet '{name}' ya existe.")
-    snippets[name] = code
-    save_snippets(snippets)
+    # Sin distinguir mayúsculas, como la búsqueda exacta y el índice NOCASE de SQLite
+    existing = _snippet_store.lookup(name)
+    if existing is not None:
+        raise ValueError(f"El snippet '{existing[0]}' ya existe.")
+    if protected:
+        code = _vault.protect(code)
+    _snippet_store.put(name, code)
+    get_event_bus().publish(SnippetAdded(_snippet_store.snippet_id(name), name, code))
     
     # Auto-assign to next available number (1-9, 0)
     _auto_assign_hotkey(name)
 
 
-def update_snippet(old_name: str, new_name: str, new_code: str):
-    """Actualiza un snippet existente."""
-    snippets = load_snippets()
-    if old_name not in snippets:
+def update_snippet(old_name: str, new_name: str, new_code: str,
+                   protected: Optional[bool] = None):
+    """
+    Actualiza un snippet existente. `new_code` va en claro; con
+    `protected` None el snippet conserva su protección actual.
+    """
+    if not _snippet_store.contains(old_name):
         raise ValueError(f"El snippet '{old_name}' no existe.")
-    if new_name != old_name and new_name in snippets:
-        raise ValueError(f"El snippet '{new_name}' ya existe.")
-    del snippets[old_name]
-    snippets[new_name] = new_code
-    save_snippets(snippets)
+    existing = _snippet_store.lookup(new_name)
+    if existing is not None and existing[0] != old_name:
+        raise ValueError(f"El snippet '{existing[0]}' ya existe.")
+    if protected is None:
+        protected = is_protected(_snippet_store.get(old_name))
+    if protected and not is_protected(new_code):
+        new_code = _vault.protect(new_code)
+    _snippet_store.rename(old_name, new_name, new_code)
+    get_event_bus().publish(
+        SnippetUpdated(_snippet_store.snippet_id(new_name), old_name, new_name, new_code)
+    )
+
+    # El hotkey sigue al snippet renombrado
+    if new_name != old_name:
+        _rename_hotkey_assignment(old_name, new_name)
 
 
 def delete_snippet(name: str):
     """Elimina un snippet y quita su asignación de hotkey."""
-    snippets = load_snippets()
-    if name not in snippets:
+    if not _snippet_store.contains(name):
         raise ValueError(f"El snippet '{name}' no existe.")
-    del snippets[name]
-    save_snippets(snippets)
+    removed_id = _snippet_store.snippet_id(name)
+    _snippet_store.remove(name)
+    get_event_bus().publish(SnippetDeleted(removed_id, name))
     
     # Quitar asignación de hotkey
     _remove_hotkey_assignment(name)
@@ -73,23 +161,114 @@ def search_snippets(query: str) -> List[Tuple[str, str]]:
     Devuelve una lista de (nombre, código) que coinciden con el query
     en nombre o contenido.
     """
-    snippets = load_snippets()
-    if not query:
-        # Si no hay query, devolvemos todos (ordenados por nombre).
-        return sorted(snippets.items(), key=lambda x: x[0].lower())
+    # Sin query devuelve todos; con query usa el índice de trigramas del store.
+    # En ambos casos el resultado va ordenado por nombre.
+    return _snippet_store.search(query)
+
+
+def fuzzy_search_snippets(query: str,
+                          is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[List[FuzzyResult]]:
+    """
+    Búsqueda difusa para el overlay: (nombre, código, puntuación, posiciones)
+    ordenados por relevancia. "selcust" encuentra SELECT_CUSTOMERS; las
+    posiciones son los caracteres del nombre que coincidieron.
 
-    q = query.lower()
-    results = []
-    for name, code in snippets.items():
-        if q in name.lower() or q in code.lower():
-            results.append((name, code))
-    return sorted(results, key=lambda x: x[0].lower())
+    Devuelve None si `is_cancelled()` indica que la búsqueda ya no hace falta.
+    """
+    return _fuzzy_searcher.search(query, is_cancelled)
+
+
+def find_snippet(name: str) -> Optional[Tuple[str, str]]:
+    """
+    (nombre guardado, código) del snippet llamado exactamente `name`, sin
+    distinguir mayúsculas. A diferencia de search_snippets, "Q1" nunca
+    devuelve "Q10" ni un snippet cuyo código contiene "Q1".
+    """
+    return _snippet_store.lookup(name)
+
+
+def snippet_id(name: str) -> Optional[int]:
+    """Id estable del snippet `name` (ver SnippetStore.snippet_id)."""
+    return _snippet_store.snippet_id(name)
+
+
+def snippet_by_id(snippet_id: int) -> Optional[Tuple[str, str]]:
+    """(nombre, código) actuales del snippet con ese id, o None si ya no existe."""
+    return _snippet_store.by_id(snippet_id)
+
+
+def is_snippet_protected(name: str) -> bool:
+    """True si el código de `name` se guarda cifrado."""
+    return is_protected(_snippet_store.get(name))
+
+
+def reveal_snippet_code(code: str) -> Optional[str]:
+    """
+    Código en claro para pegar o editar. Los snippets no protegidos se
+    devuelven tal cual; los protegidos se descifran (con caché), o None
+    si están bloqueados.
+    """
+    return _vault.reveal(code)
+
+
+def unlock_protected_snippets(password: str) -> bool:
+    """Desbloquea los snippets protegidos. False si la contraseña no es la correcta."""
+    records = [code for code in _snippet_store.snapshot().values() if is_protected(code)]
+    return _vault.unlock(password, records)
+
+
+def lock_protected_snippets():
+    """Bloquea los snippets protegidos y borra de memoria lo descifrado."""
+    _vault.lock()
+
+
+def protected_snippets_unlocked() -> bool:
+    return _vault.is_unlocked()
+
+
+def flush_pending_writes():
+    """Escribe ya los cambios de snippets y config que estén en cola (al cerrar)."""
+    _snippet_store.flush()
+    get_config().flush()
+
+
+def start_file_watcher() -> FileWatcher:
+    """
+    Vigila sql_snippets.* y config.json y recarga solo lo que otro proceso
+    cambió. Mientras corre, las lecturas del store ya no consultan el disco.
+    """
+    watcher = FileWatcher()
+    backend = _snippet_store.backend
+    if isinstance(backend, SqliteBackend):
+        # Con WAL las confirmaciones de otros procesos tocan el -wal
+        snippet_paths = [backend.path, backend.path + "-wal"]
+    else:
+        snippet_paths = [backend.path]
+    for path in snippet_paths:
+        watcher.watch(path, lambda _path: _snippet_store.refresh())
+    watcher.watch(CONFIG_FILE, lambda _path: get_config().refresh())
+    watcher.start()
+    _snippet_store.set_watched(True)
+    print(f"✅ Vigilando cambios externos ({watcher.mode})")
+    return watcher
+
+
+def warm_search_index():
+    """Construye el índice de búsqueda por adelantado (pensado para un hilo aparte)."""
+    _snippet_store.warm_index()
+
+
+def mark_snippet_used(name: str):
+    """Registra el último uso de un snippet (solo con el backend SQLite)."""
+    try:
+        _snippet_store.touch(name)
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo registrar el uso de '{name}': {e}")
 
 
 def get_snippet_count() -> int:
     """Returns the current number of snippets."""
-    snippets = load_snippets()
-    return len(snippets)
+    return _snippet_store.count()
 
 
 def get_snippets_limit_info() -> str:
@@ -105,101 +284,68 @@ def can_add_more_snippets() -> bool:
 
 def _auto_assign_hotkey(snippet_name: str):
     """Asigna automáticamente el snippet al siguiente número disponible (1-9, 0)."""
-    import json
-    
-    # Cargar config actual
-    config_file = "config.json"
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except:
-        config = {}
-    
-    # Asegurar que existe la sección de hotkeys
-    if "hotkeys" not in config:
-        config["hotkeys"] = {}
-    
-    # Orden de números: 1, 2, 3, 4, 5, 6, 7, 8, 9, 0
-    number_order = [1, 2, 3, 4, 5, 6, 7, 8, 9, 0]
+    config = get_config()
+    hotkeys = config.hotkeys()
     
-    # Buscar el primer número disponible
-    for num in number_order:
-        key = f"shift_{num}"
-        current_value = config["hotkeys"].get(key, "None")
-        
+    # Buscar el primer número disponible (orden 1, 2, ..., 9, 0)
+    for key in HOTKEY_SLOTS:
         # Si está vacío o es "None", asignar aquí
-        if current_value == "None" or not current_value:
-            config["hotkeys"][key] = snippet_name
-            
-            # Guardar config
-            with open(config_file, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-            
-            print(f"✅ Snippet '{snippet_name}' auto-asignado a número {num}")
+        if not is_assigned(hotkeys.get(key)):
+            config.set_hotkey(key, snippet_name)
+            print(f"✅ Snippet '{snippet_name}' auto-asignado a número {key.replace('shift_', '')}")
             return
     
     # Si no hay espacio disponible, no hacer nada
     print(f"⚠️ No hay números disponibles para asignar '{snippet_name}'")
 
 
+def _hotkey_slot_of(snippet_name: str) -> Optional[str]:
+    """Slot ('shift_N') asignado a `snippet_name`, sin distinguir mayúsculas."""
+    config = get_config()
+    number = config.hotkey_numbers().get(snippet_name)
+    if number is not None:
+        return f"shift_{number}"
+    # Como mucho 10 slots: comparar sin mayúsculas es de costo constante
+    folded = snippet_name.casefold()
+    for key, value in config.hotkeys().items():
+        if key.startswith("shift_") and is_assigned(value) and value.casefold() == folded:
+            return key
+    return None
+
+
 def _remove_hotkey_assignment(snippet_name: str):
     """Quita la asignación de hotkey de un snippet eliminado."""
-    import json
-    
-    # Cargar config actual
-    config_file = "config.json"
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except:
-        return  # No hay config, no hacer nada
-    
-    # Buscar y quitar la asignación
-    if "hotkeys" in config:
-        for key, value in config["hotkeys"].items():
-            # Comparación case-insensitive
-            if value and value.lower() == snippet_name.lower():
-                config["hotkeys"][key] = "None"
-                
-                # Guardar config
-                with open(config_file, "w", encoding="utf-8") as f:
-                    json.dump(config, f, indent=4, ensure_ascii=False)
-                
-                print(f"✅ Asignación de '{snippet_name}' removida")
-                return
+    slot = _hotkey_slot_of(snippet_name)
+    if slot is not None:
+        get_config().set_hotkey(slot, UNASSIGNED)
+        print(f"✅ Asignación de '{snippet_name}' removida")
+
+
+def _rename_hotkey_assignment(old_name: str, new_name: str):
+    """Mantiene el hotkey de un snippet renombrado apuntando al nombre nuevo."""
+    slot = _hotkey_slot_of(old_name)
+    if slot is not None:
+        get_config().set_hotkey(slot, new_name)
 
 
 def sync_hotkeys_with_snippets():
     """Sincroniza el config.json para que solo contenga snippets que existen."""
-    import json
-    
-    # Cargar snippets existentes
-    snippets = load_snippets()
-    snippet_names = [name.lower() for name in snippets.keys()]
-    
-    # Cargar config actual
-    config_file = "config.json"
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except:
+    config = get_config()
+    if not config.exists():
         return  # No hay config, no hacer nada
     
-    if "hotkeys" not in config:
-        return
-    
     # Verificar cada asignación
+    hotkeys = config.hotkeys()
     changed = False
-    for key, value in config["hotkeys"].items():
-        if value and value != "None":
+    for key, value in hotkeys.items():
+        if is_assigned(value):
             # Si el snippet no existe, quitar la asignación
-            if value.lower() not in snippet_names:
-                config["hotkeys"][key] = "None"
+            if _snippet_store.snippet_id(value) is None:
+                hotkeys[key] = UNASSIGNED
                 changed = True
                 print(f"⚠️ Quitando asignación obsoleta: '{value}'")
     
     # Guardar si hubo cambios
     if changed:
-        with open(config_file, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
+        config.set_hotkeys(hotkeys)
         print(f"✅ Config sincronizado con snippets existentes")
@@ -0,0 +1,231 @@
+# core/paste.py
+
+"""
+Motor de pegado: pone el texto en el portapapeles, confirma que la
+escritura ya es visible y recién entonces envía un único Ctrl+V.
+
+Antes cada pegado hacía pyperclip.copy + sleeps fijos + keyDown/press/
+keyUp de pyautogui (con su PAUSE de 100 ms tras cada llamada): ~350 ms
+por pegado y aun así podía pegarse el contenido anterior si el sistema
+iba lento. Aquí la espera termina en cuanto el portapapeles confirma el
+cambio (número de secuencia en Windows, relectura en el resto) y tiene
+un límite explícito.
+
+El acceso al sistema pasa por un backend intercambiable:
+
+- WindowsPasteBackend: GetClipboardSequenceNumber + SendInput (win_input).
+- PyautoguiPasteBackend: pyperclip + pyautogui, para otros sistemas.
+- FakePasteBackend: todo en memoria, para probar el motor sin escritorio.
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from core.config import get_config
+
+
+class PasteError(Exception):
+    """El portapapeles no confirmó la escritura antes del límite de tiempo."""
+
+
+class WindowsPasteBackend:
+    """Portapapeles con número de secuencia y Ctrl+V atómico con SendInput."""
+
+    def clipboard_sequence(self) -> Optional[int]:
+        from core import win_input
+        return win_input.clipboard_sequence()
+
+    def set_clipboard(self, text: str):
+        import pyperclip
+        pyperclip.copy(text)
+
+    def get_clipboard(self) -> str:
+        import pyperclip
+        return pyperclip.paste() or ""
+
+    def send_paste(self):
+        from core import win_input
+        win_input.send_ctrl_combo(win_input.VK_V)
+
+    def send_copy(self):
+        from core import win_input
+        win_input.send_ctrl_combo(win_input.VK_C)
+
+
+class PyautoguiPasteBackend:
+    """Backend portátil: sin número de secuencia, se confirma releyendo."""
+
+    def clipboard_sequence(self) -> Optional[int]:
+        return None
+
+    def set_clipboard(self, text: str):
+        import pyperclip
+        pyperclip.copy(text)
+
+    def get_clipboard(self) -> str:
+        import pyperclip
+        return pyperclip.paste() or ""
+
+    def send_paste(self):
+        import pyautogui
+        # _pause=False: sin los 100 ms de pyautogui.PAUSE tras cada tecla
+        pyautogui.hotkey("ctrl", "v", _pause=False)
+
+    def send_copy(self):
+        import pyautogui
+        pyautogui.hotkey("ctrl", "c", _pause=False)
+
+
+class FakePasteBackend:
+    """
+    Portapapeles y teclado simulados.
+
+    `propagation_delay` imita un portapapeles lento: lo escrito no se ve
+    hasta pasado ese tiempo. `pasted` guarda lo que habría recibido la
+    aplicación destino en cada Ctrl+V; `selection` es lo que copiaría un
+    Ctrl+C (None = no hay nada seleccionado).
+    """
+
+    def __init__(self, propagation_delay: float = 0.0, with_sequence: bool = True):
+        self.propagation_delay = propagation_delay
+        self.with_sequence = with_sequence
+        self.pasted: List[str] = []
+        self.selection: Optional[str] = None
+        self._lock = threading.Lock()
+        self._clipboard = ""
+        self._pending: Optional[str] = None
+        self._visible_at = 0.0
+        self._sequence = 1
+
+    def _settle(self):
+        if self._pending is not None and time.perf_counter() >= self._visible_at:
+            self._clipboard = self._pending
+            self._pending = None
+            self._sequence += 1
+
+    def clipboard_sequence(self) -> Optional[int]:
+        if not self.with_sequence:
+            return None
+        with self._lock:
+            self._settle()
+            return self._sequence
+
+    def set_clipboard(self, text: str):
+        with self._lock:
+            self._pending = text
+            self._visible_at = time.perf_counter() + self.propagation_delay
+            self._settle()
+
+    def get_clipboard(self) -> str:
+        with self._lock:
+            self._settle()
+            return self._clipboard
+
+    def send_paste(self):
+        with self._lock:
+            self._settle()
+            self.pasted.append(self._clipboard)
+
+    def send_copy(self):
+        if self.selection is not None:
+            self.set_clipboard(self.selection)
+
+
+def default_paste_backend():
+    """Backend adecuado para el sistema actual."""
+    if sys.platform == "win32":
+        return WindowsPasteBackend()
+    return PyautoguiPasteBackend()
+
+
+class PasteEngine:
+    """
+    Pega texto en la ventana activa.
+
+    Los tiempos (ms) vienen de ConfigService.paste_timing():
+
+    - confirm_timeout_ms: máximo a esperar la confirmación del portapapeles.
+    - poll_interval_ms: cada cuánto se vuelve a consultar mientras tanto.
+    - post_paste_ms: tiempo que se deja a la aplicación destino para leer
+      el portapapeles antes de que otro pegado lo sobrescriba. No bloquea
+      al pegado actual, sino que retrasa (si hace falta) al siguiente.
+
+    Los pegados se serializan: dos hotkeys seguidas nunca pisan el
+    portapapeles de la otra.
+    """
+
+    def __init__(self, backend=None, timing: Optional[Dict[str, float]] = None):
+        self.backend = backend if backend is not None else default_paste_backend()
+        self._timing = timing
+        # Todo uso del portapapeles (pegar, capturar la selección) lo toma
+        self.lock = threading.Lock()
+        self._last_paste_at = 0.0
+        # Duración del último pegado (ms), para diagnóstico
+        self.last_latency_ms: Optional[float] = None
+
+    def timing(self) -> Dict[str, float]:
+        if self._timing is not None:
+            return self._timing
+        return get_config().paste_timing()
+
+    def paste(self, text: str):
+        """
+        Copia `text`, espera la confirmación y envía Ctrl+V.
+
+        Lanza PasteError si el portapapeles no confirmó a tiempo; en ese
+        caso NO se envía Ctrl+V, para no pegar el contenido anterior.
+        """
+        timing = self.timing()
+        with self.lock:
+            # Dejar que la app destino termine de leer el pegado anterior
+            wait = self._last_paste_at + timing["post_paste_ms"] / 1000 - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+
+            started = time.perf_counter()
+            self.copy(text, timing)
+            self.backend.send_paste()
+            self._last_paste_at = time.perf_counter()
+            self.last_latency_ms = (self._last_paste_at - started) * 1000
+
+    def copy(self, text: str, timing: Optional[Dict[str, float]] = None):
+        """Escribe en el portapapeles y espera a que el cambio sea visible."""
+        timing = timing or self.timing()
+        backend = self.backend
+        sequence = backend.clipboard_sequence()
+        backend.set_clipboard(text)
+
+        deadline = time.perf_counter() + timing["confirm_timeout_ms"] / 1000
+        poll = timing["poll_interval_ms"] / 1000
+        while True:
+            if sequence is not None:
+                # Secuencia nueva: confirmar que el cambio es el nuestro
+                current = backend.clipboard_sequence()
+                if current != sequence:
+                    if backend.get_clipboard() == text:
+                        return
+                    sequence = current
+            elif backend.get_clipboard() == text:
+                return
+            if time.perf_counter() >= deadline:
+                raise PasteError(
+                    f"El portapapeles no confirmó la copia en {timing['confirm_timeout_ms']:.0f} ms"
+                )
+            time.sleep(poll)
+
+
+# Motor único del proceso (los pegados de todas las rutas se serializan)
+_paste_engine: Optional[PasteEngine] = None
+_paste_engine_lock = threading.Lock()
+
+
+def get_paste_engine() -> PasteEngine:
+    """Devuelve el motor de pegado compartido."""
+    global _paste_engine
+    if _paste_engine is None:
+        with _paste_engine_lock:
+            if _paste_engine is None:
+                _paste_engine = PasteEngine()
+    return _paste_engine
@@ -0,0 +1,223 @@
+# core/persistence.py
+
+"""
+Escritura segura y diferida de los archivos JSON de Klip.
+
+Antes cada cambio truncaba sql_snippets.json / config.json y volcaba el
+JSON encima: un cierre abrupto a mitad de la escritura dejaba el archivo
+corrupto, y una edición masiva reescribía el archivo completo N veces.
+
+- atomic_write_text(): escribe en un temporal del mismo directorio, hace
+  fsync y lo renombra sobre el destino con os.replace. Quien lea el
+  archivo ve el contenido anterior o el nuevo, nunca uno a medias.
+- WriteBehindFile: marca el archivo como pendiente y lo escribe en un
+  hilo aparte cuando los cambios se calman (FLUSH_DELAY), sin que ningún
+  cambio espere en memoria más de MAX_FLUSH_DELAY. Una ráfaga de cambios
+  cuesta una sola escritura. flush() escribe ya lo pendiente; al salir
+  del proceso se vacían todos (flush_all, también registrado en atexit).
+  Si la escritura falla (disco lleno, carpeta sin permisos) se reintenta
+  con espera creciente (RETRY_DELAY, duplicándose hasta MAX_RETRY_DELAY)
+  y el error se informa una sola vez, no en cada intento.
+
+Cada escritor recuerda la firma del archivo que dejó, para que sus
+propias escrituras no se confundan con cambios externos.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from typing import Any, Callable, Hashable, Optional
+
+# Calma (s) que se espera tras el último cambio antes de escribir
+FLUSH_DELAY = 0.05
+# Máximo (s) que un cambio puede quedar solo en memoria
+MAX_FLUSH_DELAY = 0.5
+# Espera (s) antes del primer reintento tras un error de escritura y tope
+# de la espera, que se duplica con cada fallo seguido
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+
+def file_signature(path: str) -> Optional[Hashable]:
+    """(mtime_ns, tamaño, inodo) del archivo o None si no existe."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _fsync_directory(directory: str):
+    # Sin esto el rename podría no sobrevivir a un corte de luz (POSIX)
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(path: str, text: str):
+    """Reemplaza `path` por `text` de forma atómica (temporal + fsync + os.replace)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write_json(path: str, data: Any, **dump_options):
+    """json.dumps(data) escrito con atomic_write_text."""
+    atomic_write_text(path, json.dumps(data, **dump_options))
+
+
+# Escritores vivos, para vaciarlos todos al salir
+_writers: "weakref.WeakSet[WriteBehindFile]" = weakref.WeakSet()
+
+
+class WriteBehindFile:
+    """
+    Escritura diferida y agrupada de un archivo.
+
+    `render()` devuelve el texto completo del archivo; se llama en el
+    momento de escribir, así que siempre se guarda el estado más reciente
+    por muchos cambios que se hayan acumulado.
+    """
+
+    def __init__(self, path: str, render: Callable[[], str],
+                 delay: float = FLUSH_DELAY, max_delay: float = MAX_FLUSH_DELAY,
+                 retry_delay: float = RETRY_DELAY, max_retry_delay: float = MAX_RETRY_DELAY):
+        self.path = path
+        self.render = render
+        self.delay = delay
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._cond = threading.Condition()
+        # Serializa las escrituras reales (hilo de fondo y flush explícitos)
+        self._io_lock = threading.Lock()
+        self._dirty = False
+        self._writing = False
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        # Firma del archivo que dejó nuestra última escritura
+        self._written: Optional[Hashable] = None
+        # Fallos de escritura seguidos y cuándo se puede reintentar
+        self._failures = 0
+        self._retry_at = 0.0
+        # Cambios recibidos, escrituras hechas y último error (diagnóstico)
+        self.scheduled = 0
+        self.writes = 0
+        self.last_error: Optional[Exception] = None
+        _writers.add(self)
+
+    @property
+    def pending(self) -> bool:
+        """True si hay cambios que todavía no llegaron al disco."""
+        return self._dirty or self._writing
+
+    def owns(self, signature: Optional[Hashable]) -> bool:
+        """
+        True si `signature` corresponde a nuestra propia escritura (o hay
+        una en curso o pendiente), es decir, si no hace falta releer.
+        """
+        if self.pending:
+            return True
+        return signature is not None and signature == self._written
+
+    def schedule(self):
+        """Marca el archivo como modificado; se escribirá en segundo plano."""
+        with self._cond:
+            now = time.perf_counter()
+            if not self._dirty:
+                self._dirty = True
+                self._first_at = now
+            self._last_at = now
+            self.scheduled += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"write-behind:{os.path.basename(self.path)}", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                while self._dirty:
+                    due = min(self._last_at + self.delay, self._first_at + self.max_delay)
+                    # Tras un error, los cambios nuevos no adelantan el reintento
+                    due = max(due, self._retry_at)
+                    remaining = due - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self.flush()
+
+    def flush(self) -> bool:
+        """Escribe ya lo pendiente. Devuelve True si escribió algo."""
+        with self._io_lock:
+            with self._cond:
+                if not self._dirty:
+                    return False
+                self._dirty = False
+                self._writing = True
+            try:
+                atomic_write_text(self.path, self.render())
+                self._written = file_signature(self.path)
+                self.writes += 1
+                if self._failures:
+                    print(f"✅ '{self.path}' se guardó tras {self._failures} intento(s) fallido(s)")
+                    self._failures = 0
+                    self.last_error = None
+                return True
+            except Exception as e:
+                self._failures += 1
+                self.last_error = e
+                if self._failures == 1:
+                    print(f"❌ No se pudo guardar '{self.path}': {e}. Se reintentará en segundo plano.")
+                # Reintentar más tarde, cada vez más espaciado, sin perder los cambios
+                wait = min(self.retry_delay * 2 ** min(self._failures - 1, 16), self.max_retry_delay)
+                with self._cond:
+                    self._retry_at = time.perf_counter() + wait
+                    if not self._dirty:
+                        self._dirty = True
+                        self._first_at = self._last_at = time.perf_counter()
+                    self._cond.notify()
+                return False
+            finally:
+                self._writing = False
+
+
+def flush_all():
+    """Escribe todo lo pendiente de todos los archivos (al cerrar Klip)."""
+    for writer in list(_writers):
+        writer.flush()
+
+
+atexit.register(flush_all)
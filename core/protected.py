@@ -0,0 +1,267 @@
+# core/protected.py
+
+"""
+Snippets protegidos: el cuerpo se guarda cifrado en sql_snippets.json
+(o en la base SQLite) y solo se descifra al pegarlo o al editarlo.
+
+Cifrado de sobre: cada snippet tiene su propia clave de datos, y esa
+clave va cifrada con la clave maestra (KEK) que deriva la sesión de
+desbloqueo de security.py a partir de la contraseña y la sal. El
+registro guardado es un texto con todo lo necesario para abrirlo:
+
+    klip-enc:v1:<sal>:<clave de datos envuelta>:<cuerpo cifrado>
+
+Que un snippet esté protegido lo dice una marca explícita y no su
+contenido: en memoria el registro es un ProtectedCode (subclase de str),
+en sql_snippets.json un objeto {"protected": registro} y en SQLite la
+columna `protected`. Un snippet en claro que casualmente empieza con
+PROTECTED_PREFIX sigue siendo código en claro.
+
+El nombre queda en claro: la búsqueda por nombre sigue funcionando y el
+overlay nunca necesita descifrar la biblioteca. Lo descifrado vive en
+una caché LRU de PLAINTEXT_CACHE_SIZE entradas que se vacía al bloquear.
+
+La contraseña se comprueba contra un verificador guardado en la config
+(un token conocido cifrado con la clave maestra) antes de que la clave
+entre en la sesión: una contraseña equivocada no deja nada en caché ni
+bloquea una sesión ya abierta. La sal y el verificador se guardan recién
+al proteger el primer snippet, y la contraseña con la que se protege
+es la que queda fijada.
+
+security.py (y con él cryptography) se importa recién al primer uso.
+"""
+
+import base64
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+PROTECTED_PREFIX = "klip-enc:v1:"
+# Campo con el que un snippet protegido se guarda en sql_snippets.json
+PROTECTED_FIELD = "protected"
+# Texto que cifra el verificador de la contraseña
+VERIFIER_PLAINTEXT = b"klip-protected-verifier:v1"
+# Snippets descifrados que se mantienen en memoria
+PLAINTEXT_CACHE_SIZE = 16
+# Lo que muestran la vista previa y la búsqueda en lugar del cuerpo
+PROTECTED_PREVIEW = "🔒 ••••••••"
+SALT_BYTES = 16
+
+
+class ProtectedCode(str):
+    """Registro cifrado de un snippet protegido (la marca es el tipo)."""
+
+    __slots__ = ()
+
+
+def is_protected(code: Optional[str]) -> bool:
+    """True si `code` es un registro cifrado y no el código en claro."""
+    return isinstance(code, ProtectedCode)
+
+
+def to_stored(code: str) -> Any:
+    """Valor de `code` en sql_snippets.json: texto, o {"protected": registro}."""
+    if is_protected(code):
+        return {PROTECTED_FIELD: str(code)}
+    return code
+
+
+def from_stored(value: Any) -> Optional[str]:
+    """Inverso de to_stored; None si el valor no tiene un formato conocido."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict) and isinstance(value.get(PROTECTED_FIELD), str):
+        return ProtectedCode(value[PROTECTED_FIELD])
+    return None
+
+
+def searchable_code(code: str) -> str:
+    """Texto del código que se indexa y se busca ("" si está protegido)."""
+    return "" if is_protected(code) else code
+
+
+def record_salt(code: str) -> Optional[bytes]:
+    """Sal del registro protegido `code`, o None si no lo es o está dañado."""
+    if not is_protected(code):
+        return None
+    try:
+        return base64.urlsafe_b64decode(code[len(PROTECTED_PREFIX):].split(":", 1)[0])
+    except ValueError:
+        return None
+
+
+class SnippetVault:
+    """
+    Cifra y descifra los cuerpos protegidos con la sesión de desbloqueo.
+
+    `salt_source()` devuelve la sal de la biblioteca (base64) o None si
+    todavía no hay; `salt_sink(sal)` la guarda en el primer protect().
+    Lo mismo `verifier_source()` / `verifier_sink(token)` con el
+    verificador de la contraseña. Hasta entonces la sal vive solo en
+    memoria.
+    """
+
+    def __init__(self, salt_source: Callable[[], Optional[str]],
+                 salt_sink: Callable[[str], None],
+                 verifier_source: Callable[[], Optional[str]],
+                 verifier_sink: Callable[[str], None],
+                 cache_size: int = PLAINTEXT_CACHE_SIZE):
+        self._salt_source = salt_source
+        self._salt_sink = salt_sink
+        self._verifier_source = verifier_source
+        self._verifier_sink = verifier_sink
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # registro cifrado -> código en claro, el más reciente al final
+        self._plaintext: "OrderedDict[str, str]" = OrderedDict()
+        # Sal generada y todavía sin guardar (nada protegido aún)
+        self._pending_salt: Optional[str] = None
+        self.decryptions = 0
+
+    @staticmethod
+    def _session():
+        from security import get_unlock_session
+        return get_unlock_session()
+
+    def _library_salt(self) -> Optional[bytes]:
+        """Sal guardada, o la que está en memoria; None si no hay ninguna."""
+        encoded = self._salt_source() or self._pending_salt
+        return base64.urlsafe_b64decode(encoded) if encoded else None
+
+    def _new_library_salt(self) -> bytes:
+        """Sal de la biblioteca; si no hay, una nueva que solo vive en memoria."""
+        with self._lock:
+            if not self._salt_source() and not self._pending_salt:
+                self._pending_salt = base64.urlsafe_b64encode(os.urandom(SALT_BYTES)).decode("ascii")
+        return self._library_salt()
+
+    def _persist(self, salt: bytes, kek):
+        """Guarda la sal y el verificador si todavía no lo están."""
+        with self._lock:
+            if not self._salt_source():
+                self._salt_sink(base64.urlsafe_b64encode(salt).decode("ascii"))
+                self._pending_salt = None
+            if not self._verifier_source():
+                self._verifier_sink(kek.encrypt(VERIFIER_PLAINTEXT).decode("ascii"))
+
+    def is_unlocked(self) -> bool:
+        salt = self._library_salt()
+        if salt is None:
+            return False
+        return self._session().cached(salt) is not None
+
+    def unlock(self, password: str, records: Iterable[str] = ()) -> bool:
+        """
+        Deriva la KEK para la sal de la biblioteca y las de `records`
+        (registros copiados de otra instalación) y comprueba la contraseña
+        con el verificador guardado o, si no hay (biblioteca anterior a
+        él), abriendo un registro. Sin verificador ni registros no hay
+        nada contra qué comprobar: la contraseña queda fijada en el primer
+        protect(). Las claves entran en la sesión solo si la contraseña
+        sirve; si no, se borran y la sesión queda como estaba. Devuelve
+        False si no sirve.
+        """
+        from security import envelope_decrypt
+
+        session = self._session()
+        library_salt = self._new_library_salt()
+        sample = None
+        sample_salt = None
+        salts = [library_salt]
+        for code in records:
+            salt = record_salt(code)
+            if salt is not None and salt not in salts:
+                salts.append(salt)
+            if salt is not None and sample is None:
+                sample, sample_salt = code, salt
+        keys = {salt: session.derive(password, salt) for salt in salts}
+        kek = keys[library_salt].fernet
+        try:
+            verifier = self._verifier_source()
+            if verifier:
+                valid = kek.decrypt(verifier.encode("ascii")) == VERIFIER_PLAINTEXT
+            else:
+                if sample is not None:
+                    _kek, wrapped_key, token = self._open(sample)
+                    envelope_decrypt(keys[sample_salt].fernet, wrapped_key, token)
+                valid = True
+        except Exception:
+            valid = False
+        if not valid:
+            for key in keys.values():
+                key.wipe()
+            return False
+        for key in keys.values():
+            session.remember(key)
+        if sample is not None:
+            # Biblioteca con registros pero sin verificador: guardarlo ya
+            self._persist(library_salt, kek)
+        return True
+
+    def lock(self):
+        """Olvida las claves y lo descifrado."""
+        with self._lock:
+            self._plaintext.clear()
+        self._session().lock()
+
+    def protect(self, code: str) -> str:
+        """Registro cifrado de `code`. ValueError si la sesión está bloqueada."""
+        from security import envelope_encrypt
+
+        salt = self._library_salt()
+        kek = self._session().cached(salt) if salt is not None else None
+        if kek is None:
+            raise ValueError("Los snippets protegidos están bloqueados: desbloquéalos primero.")
+        self._persist(salt, kek)
+        wrapped_key, token = envelope_encrypt(kek, code)
+        encoded_salt = base64.urlsafe_b64encode(salt).decode("ascii")
+        record = ProtectedCode(f"{PROTECTED_PREFIX}{encoded_salt}:{wrapped_key}:{token}")
+        self._remember(record, code)
+        return record
+
+    def _open(self, record: str):
+        """(kek, clave envuelta, cuerpo) del registro; kek None si está bloqueado."""
+        if not record.startswith(PROTECTED_PREFIX):
+            raise ValueError("Registro protegido con formato desconocido")
+        encoded_salt, wrapped_key, token = record[len(PROTECTED_PREFIX):].split(":", 2)
+        kek = self._session().cached(base64.urlsafe_b64decode(encoded_salt))
+        return kek, wrapped_key, token
+
+    def reveal(self, code: str) -> Optional[str]:
+        """
+        Código en claro: `code` tal cual si no está protegido, None si la
+        sesión está bloqueada o el registro no se puede abrir.
+        """
+        if not is_protected(code):
+            return code
+        from security import envelope_decrypt
+
+        try:
+            kek, wrapped_key, token = self._open(code)
+        except ValueError:
+            return None
+        if kek is None:
+            # La sesión caducó: lo descifrado tampoco debe quedar en memoria
+            with self._lock:
+                self._plaintext.clear()
+            return None
+        with self._lock:
+            plaintext = self._plaintext.get(code)
+            if plaintext is not None:
+                self._plaintext.move_to_end(code)
+                return plaintext
+        try:
+            plaintext = envelope_decrypt(kek, wrapped_key, token)
+        except Exception:
+            return None
+        self.decryptions += 1
+        self._remember(code, plaintext)
+        return plaintext
+
+    def _remember(self, record: str, plaintext: str):
+        with self._lock:
+            self._plaintext[record] = plaintext
+            self._plaintext.move_to_end(record)
+            while len(self._plaintext) > self.cache_size:
+                self._plaintext.popitem(last=False)
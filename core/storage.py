@@ -0,0 +1,333 @@
+# core/storage.py
+
+"""
+Backends de almacenamiento para SnippetStore.
+
+- JsonBackend: el formato histórico (sql_snippets.json). Los cambios se
+  agrupan y el archivo completo se reescribe de forma atómica en segundo
+  plano (core/persistence.py).
+- SqliteBackend: opcional, para bibliotecas grandes. Cada cambio toca una
+  sola fila (índice único case-insensitive por nombre) y se confirma en
+  modo WAL, así que sobrevive a un cierre abrupto.
+
+Todos los backends reciben en las mutaciones el dict ya actualizado del
+store y además el detalle del cambio; cada uno usa lo que necesita.
+
+Los snippets protegidos (core/protected.py) llegan como ProtectedCode y
+cada backend guarda esa marca de forma explícita: un objeto
+{"protected": registro} en el JSON, la columna `protected` en SQLite.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from core.persistence import WriteBehindFile, atomic_write_text, file_signature
+from core.protected import ProtectedCode, from_stored, is_protected, to_stored
+
+
+def case_duplicates(names: Iterable[str]) -> List[List[str]]:
+    """Grupos de nombres que difieren solo en mayúsculas (casefold), en su orden."""
+    groups: Dict[str, List[str]] = {}
+    for name in names:
+        groups.setdefault(name.casefold(), []).append(name)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+class JsonBackend:
+    """
+    Guarda los snippets en un archivo JSON {nombre: código}; los
+    protegidos como {nombre: {"protected": registro}}.
+
+    Con `write_behind` (por defecto) las mutaciones solo marcan el archivo
+    como pendiente; con False cada una lo escribe en el momento (siempre
+    de forma atómica).
+    """
+
+    def __init__(self, path: str, write_behind: bool = True):
+        self.path = path
+        # Último dict recibido del store: es lo que se escribe
+        self._snippets: Dict[str, str] = {}
+        self._writer = WriteBehindFile(path, self._render) if write_behind else None
+        # Grupos de duplicados por mayúsculas ya avisados (una vez cada uno)
+        self._warned_duplicates = set()
+
+    def signature(self) -> Optional[Hashable]:
+        """
+        Firma del archivo, o None si no existe. Mientras el archivo en
+        disco sea el que escribimos nosotros (o haya una escritura en
+        cola) la firma no cambia, así el store no relee lo propio.
+        """
+        signature = file_signature(self.path)
+        if self._writer is not None and self._writer.owns(signature):
+            return ("own", self._writer.scheduled)
+        return signature
+
+    def load(self) -> Dict[str, str]:
+        # Una recarga forzada no debe leer un archivo más viejo que la memoria
+        self.flush()
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo leer '{self.path}': {e}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        snippets = {}
+        for name, value in data.items():
+            code = from_stored(value)
+            if code is None:
+                print(f"⚠️ Snippet '{name}' con formato desconocido en '{self.path}', omitido")
+                continue
+            snippets[name] = code
+        self._warn_case_duplicates(snippets)
+        return snippets
+
+    def _warn_case_duplicates(self, snippets: Dict[str, str]):
+        """
+        Bibliotecas de antes de rechazar nombres que difieren solo en
+        mayúsculas: se cargan completas, pero se avisa para que el usuario
+        renombre uno (editar cada uno sigue funcionando por su nombre exacto).
+        """
+        for group in case_duplicates(snippets):
+            key = tuple(group)
+            if key in self._warned_duplicates:
+                continue
+            self._warned_duplicates.add(key)
+            names = ", ".join(f"'{name}'" for name in group)
+            print(f"⚠️ Snippets que difieren solo en mayúsculas en '{self.path}': {names}. "
+                  f"Conviene renombrar todos menos uno: al pasar a SQLite solo se migra el primero")
+
+    def _render(self) -> str:
+        # dict() copia de una vez: el store puede seguir mutando mientras tanto
+        snippets = {name: to_stored(code) for name, code in dict(self._snippets).items()}
+        return json.dumps(snippets, indent=4, ensure_ascii=False)
+
+    def _write(self, snippets: Dict[str, str]):
+        self._snippets = snippets
+        if self._writer is not None:
+            self._writer.schedule()
+        else:
+            atomic_write_text(self.path, self._render())
+
+    def flush(self):
+        """Escribe ya los cambios pendientes."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def put(self, snippets: Dict[str, str], name: str, code: str):
+        self._write(snippets)
+
+    def rename(self, snippets: Dict[str, str], old_name: str, new_name: str, code: str):
+        self._write(snippets)
+
+    def remove(self, snippets: Dict[str, str], name: str):
+        self._write(snippets)
+
+    def replace_all(self, snippets: Dict[str, str]):
+        self._write(snippets)
+
+    def touch(self, name: str):
+        """El formato JSON no guarda metadatos de uso."""
+        pass
+
+
+class SqliteBackend:
+    """
+    Guarda los snippets en SQLite (modo WAL) con metadatos de
+    creación, modificación y último uso.
+
+    Si la base está vacía y existe `json_path`, importa ese archivo una
+    única vez (migración automática en el primer arranque).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snippets (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        code TEXT NOT NULL,
+        protected INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        last_used_at REAL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_snippets_name
+        ON snippets(name COLLATE NOCASE);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, path: str, json_path: Optional[str] = None):
+        self.path = path
+        self.json_path = json_path
+        self._lock = threading.Lock()
+        # El store se usa desde el hilo de Qt y desde el hilo de hotkeys
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(self.SCHEMA)
+        self._add_protected_column()
+        self._migrate_from_json()
+
+    def _add_protected_column(self):
+        """Bases creadas antes de los snippets protegidos no tienen la columna."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(snippets)")}
+        if "protected" not in columns:
+            self._conn.execute(
+                "ALTER TABLE snippets ADD COLUMN protected INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def _migrate_from_json(self):
+        if not self.json_path or not os.path.exists(self.json_path):
+            return
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_from_json'"
+            ).fetchone()
+            if row is not None:
+                return
+            count = self._conn.execute("SELECT COUNT(*) FROM snippets").fetchone()[0]
+
+        snippets = JsonBackend(self.json_path).load() if count == 0 else {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, code in snippets.items():
+                    cur = self._conn.execute(
+                        "INSERT OR IGNORE INTO snippets (name, code, protected, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (name, code, is_protected(code), now, now),
+                    )
+                    if cur.rowcount == 0:
+                        print(f"⚠️ Snippet duplicado (mayúsculas/minúsculas) omitido: '{name}'")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (self.json_path,),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if snippets:
+            print(f"✅ {len(snippets)} snippets migrados de '{self.json_path}' a '{self.path}'")
+
+    def signature(self) -> Optional[Hashable]:
+        """
+        PRAGMA data_version cambia solo cuando otra conexión confirma
+        cambios, así que las escrituras propias no fuerzan una recarga.
+        """
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, code, protected FROM snippets ORDER BY id"
+            ).fetchall()
+        return {name: ProtectedCode(code) if protected else code for name, code, protected in rows}
+
+    def _execute(self, sql: str, params: tuple):
+        with self._lock:
+            try:
+                return self._conn.execute(sql, params)
+            except sqlite3.IntegrityError:
+                raise ValueError(f"El snippet '{params[0]}' ya existe.")
+
+    def put(self, snippets: Dict[str, str], name: str, code: str):
+        now = time.time()
+        # Solo se actualiza la fila con el mismo nombre exacto: otro snippet
+        # que difiere en mayúsculas no se pisa, se rechaza
+        cur = self._execute(
+            "INSERT INTO snippets (name, code, protected, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name COLLATE NOCASE) DO UPDATE SET "
+            "code = excluded.code, protected = excluded.protected, "
+            "updated_at = excluded.updated_at "
+            "WHERE snippets.name = excluded.name",
+            (name, code, is_protected(code), now, now),
+        )
+        if cur.rowcount == 0:
+            raise ValueError(f"El snippet '{name}' ya existe.")
+
+    def rename(self, snippets: Dict[str, str], old_name: str, new_name: str, code: str):
+        self._execute(
+            "UPDATE snippets SET name = ?, code = ?, protected = ?, updated_at = ? "
+            "WHERE name = ? COLLATE NOCASE",
+            (new_name, code, is_protected(code), time.time(), old_name),
+        )
+
+    def remove(self, snippets: Dict[str, str], name: str):
+        self._execute("DELETE FROM snippets WHERE name = ? COLLATE NOCASE", (name,))
+
+    def replace_all(self, snippets: Dict[str, str]):
+        # El índice NOCASE dejaría una sola fila por grupo: rechazar antes
+        # de escribir nada, como put()
+        duplicates = case_duplicates(snippets)
+        if duplicates:
+            raise ValueError(f"El snippet '{duplicates[0][1]}' ya existe.")
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {
+                    name.lower(): name
+                    for (name,) in self._conn.execute("SELECT name FROM snippets")
+                }
+                wanted = {name.lower() for name in snippets}
+                for folded, name in existing.items():
+                    if folded not in wanted:
+                        self._conn.execute(
+                            "DELETE FROM snippets WHERE name = ? COLLATE NOCASE", (name,)
+                        )
+                for name, code in snippets.items():
+                    self._conn.execute(
+                        "INSERT INTO snippets (name, code, protected, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(name COLLATE NOCASE) DO UPDATE SET "
+                        "name = excluded.name, code = excluded.code, "
+                        "protected = excluded.protected, updated_at = excluded.updated_at "
+                        "WHERE snippets.code != excluded.code OR snippets.name != excluded.name "
+                        "OR snippets.protected != excluded.protected",
+                        (name, code, is_protected(code), now, now),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def touch(self, name: str):
+        """Registra el último uso (pegado) de un snippet."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE snippets SET last_used_at = ? WHERE name = ? COLLATE NOCASE",
+                (time.time(), name),
+            )
+
+    def flush(self):
+        """Cada cambio ya se confirma en el momento (WAL)."""
+        pass
+
+    def metadata(self, name: str) -> Optional[Dict[str, Optional[float]]]:
+        """Devuelve created_at / updated_at / last_used_at de un snippet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, last_used_at FROM snippets "
+                "WHERE name = ? COLLATE NOCASE",
+                (name,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"created_at": row[0], "updated_at": row[1], "last_used_at": row[2]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
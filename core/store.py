@@ -0,0 +1,489 @@
+# core/store.py
+
+import threading
+from itertools import compress
+from operator import itemgetter
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from core.protected import PROTECTED_PREVIEW, is_protected, searchable_code
+from core.storage import JsonBackend
+from core.trigram import TrigramIndex
+
+# Hasta este tamaño el índice de búsqueda se construye en el momento;
+# por encima se construye en segundo plano y mientras tanto se recorre todo.
+INDEX_SYNC_BUILD_LIMIT = 2000
+
+# Largo de la vista previa de una línea que muestra el overlay
+PREVIEW_LENGTH = 80
+
+# Con más de 1/SPARSE_RESULT_RATIO de la colección como resultado, search()
+# reordena todos los flags en lugar de ubicar cada resultado
+SPARSE_RESULT_RATIO = 16
+
+
+def make_preview(code: str) -> str:
+    """Código en una sola línea, recortado a PREVIEW_LENGTH caracteres."""
+    if is_protected(code):
+        return PROTECTED_PREVIEW
+    preview = code.replace("\n", " ")
+    if len(preview) > PREVIEW_LENGTH:
+        preview = preview[:PREVIEW_LENGTH - 3] + "..."
+    return preview
+
+
+class StoreSnapshot:
+    """
+    Estado del store en una versión dada. Nunca se modifica después de
+    publicado: los escritores arman uno nuevo y lo reemplazan de una vez,
+    así que un lector que tomó el snapshot lo ve siempre completo y
+    coherente, sin locks.
+
+    El índice de trigramas (y el slot de cada nombre en él) también es
+    parte del snapshot: las búsquedas lo consultan sin locks.
+    """
+
+    __slots__ = ("snippets", "ids", "names_by_id", "folded", "version", "slots", "index")
+
+    def __init__(self, snippets: Dict[str, str], ids: Dict[str, int],
+                 names_by_id: Dict[int, str], folded: Dict[str, int], version: int,
+                 slots: Optional[Dict[str, int]] = None, index: Optional[TrigramIndex] = None):
+        self.snippets = snippets
+        self.ids = ids
+        self.names_by_id = names_by_id
+        self.folded = folded
+        self.version = version
+        # nombre -> slot en el índice de trigramas
+        self.slots = slots if slots is not None else {}
+        # None mientras el índice de esta colección no se construyó
+        self.index = index
+
+    def draft(self) -> "StoreSnapshot":
+        """Copia modificable para armar la próxima versión."""
+        index = self.index.copy() if self.index is not None else None
+        return StoreSnapshot(dict(self.snippets), dict(self.ids), dict(self.names_by_id),
+                             dict(self.folded), self.version + 1, dict(self.slots), index)
+
+    def with_index(self, index: TrigramIndex) -> "StoreSnapshot":
+        """La misma versión, con su índice ya construido."""
+        return StoreSnapshot(self.snippets, self.ids, self.names_by_id, self.folded,
+                             self.version, self.slots, index)
+
+
+class SnippetStore:
+    """
+    Mantiene los snippets en memoria para todo el proceso.
+
+    Los datos se leen del backend una sola vez; en cada acceso solo se
+    consulta la firma del backend (mtime/tamaño del JSON, data_version de
+    SQLite) y se vuelve a leer si cambió, por ejemplo cuando el usuario
+    edita sql_snippets.json a mano.
+
+    Cada snippet tiene además un id estable dentro del proceso: no cambia
+    al renombrarlo ni al recargar, y nunca se reutiliza. Los hotkeys se
+    enlazan a ese id y resuelven el nombre en O(1).
+
+    Concurrencia: las lecturas (hotkeys, selector, búsqueda) toman el
+    StoreSnapshot vigente sin locks. Las escrituras se serializan con un
+    único lock de escritor, arman una copia (índice incluido), la
+    persisten y recién entonces publican el snapshot nuevo
+    (copy-on-write); si el backend falla, el snapshot publicado queda
+    intacto.
+    """
+
+    def __init__(self, path: Optional[str] = None, backend=None):
+        self.backend = backend if backend is not None else JsonBackend(path)
+        self._snap = StoreSnapshot({}, {}, {}, {}, 0)
+        # Único escritor a la vez (reentrante: put() puede recargar antes)
+        self._write_lock = threading.RLock()
+        self._signature: Optional[Hashable] = None
+        self._loaded = False
+        # (versión, lista de (nombre, código) ordenada por nombre)
+        self._sorted: Optional[Tuple[int, List[Tuple[str, str]]]] = None
+        # (versión, itemgetter: flags por slot -> flags en el orden de _sorted,
+        #  lista slot -> posición en _sorted)
+        self._ranks = None
+        # Cada snippet ocupa un slot (entero denso) en el índice de trigramas.
+        # La asignación de slots es estado del escritor (_write_lock).
+        self._slot_names: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        # Una sola construcción del índice a la vez
+        self._index_lock = threading.Lock()
+        # Construcción en segundo plano ya encargada (protegido por _building_lock)
+        self._building_lock = threading.Lock()
+        self._index_building = False
+        # Próximo id estable a asignar
+        self._next_id = 1
+        # nombre -> (código, vista previa); se calcula al pedirla por primera vez
+        self._previews: Dict[str, Tuple[str, str]] = {}
+        # Con un FileWatcher activo no se consulta la firma en cada lectura
+        self._watched = False
+        # Se llaman con el store tras una recarga por cambio externo
+        self._listeners: List[Callable[["SnippetStore"], None]] = []
+
+    # ------------------------------------------------------------------ lectura
+
+    def _revalidate(self):
+        """Recarga los datos solo si cambiaron desde la última lectura/escritura."""
+        if self._loaded and self._watched:
+            # El watcher avisa (refresh) cuando algo cambia fuera de Klip
+            return
+        signature = self.backend.signature()
+        if self._loaded and signature == self._signature:
+            return
+        with self._write_lock:
+            # Otro hilo pudo haber recargado mientras esperábamos el lock
+            signature = self.backend.signature()
+            if self._loaded and signature == self._signature:
+                return
+            self._set_snippets(self.backend.load() if signature is not None else {})
+            self._signature = signature
+
+    def _set_snippets(self, snippets: Dict[str, str]):
+        """Publica una colección completa nueva (con _write_lock tomado)."""
+        old = self._snap
+        slots = {name: slot for slot, name in enumerate(snippets)}
+        draft = StoreSnapshot(snippets, {}, {}, {}, old.version + 1, slots)
+        # Los nombres que siguen existiendo conservan su id
+        for name in snippets:
+            self._bind_id(draft, name, old.ids.get(name))
+        self._slot_names = list(snippets)
+        self._free_slots = []
+        self._previews = {}
+        self._snap = draft
+        self._loaded = True
+
+    def current(self) -> StoreSnapshot:
+        """Snapshot vigente (inmutable); leerlo no toma ningún lock."""
+        self._revalidate()
+        return self._snap
+
+    def reload(self):
+        """Fuerza una relectura del backend en el próximo acceso."""
+        self._loaded = False
+
+    def set_watched(self, watched: bool):
+        """
+        Indica que un watcher llamará a refresh() ante cambios externos,
+        así las lecturas dejan de consultar la firma del backend.
+        """
+        self._watched = watched
+
+    def refresh(self) -> bool:
+        """
+        Relee el backend si cambió por fuera (las escrituras propias no
+        cuentan). Devuelve True si hubo recarga y avisa a los listeners.
+        """
+        version = self._snap.version
+        watched, self._watched = self._watched, False
+        try:
+            self._revalidate()
+        finally:
+            self._watched = watched
+        if self._snap.version == version:
+            return False
+        for callback in list(self._listeners):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ Error en listener de snippets: {e}")
+        return True
+
+    def add_listener(self, callback: Callable[["SnippetStore"], None]):
+        """Registra `callback(store)` para las recargas por cambios externos."""
+        self._listeners.append(callback)
+
+    @property
+    def version(self) -> int:
+        """Número que cambia cada vez que cambia el contenido del store."""
+        return self.current().version
+
+    def snapshot(self) -> Dict[str, str]:
+        """Dict de snippets de la versión vigente. Es inmutable: no modificarlo."""
+        return self.current().snippets
+
+    def get(self, name: str) -> Optional[str]:
+        return self.current().snippets.get(name)
+
+    def contains(self, name: str) -> bool:
+        return name in self.current().snippets
+
+    def count(self) -> int:
+        return len(self.current().snippets)
+
+    def _sorted_list(self, snap: Optional[StoreSnapshot] = None) -> List[Tuple[str, str]]:
+        if snap is None:
+            snap = self.current()
+        cached = self._sorted
+        if cached is not None and cached[0] == snap.version:
+            return cached[1]
+        ordered = sorted(snap.snippets.items(), key=lambda x: x[0].lower())
+        if snap.version == self._snap.version:
+            self._sorted = (snap.version, ordered)
+        return ordered
+
+    def sorted_items(self, snap: Optional[StoreSnapshot] = None) -> List[Tuple[str, str]]:
+        """
+        Lista de (nombre, código) ordenada por nombre (case-insensitive),
+        del snapshot `snap` (por defecto, el vigente).
+        """
+        return list(self._sorted_list(snap))
+
+    def snippet_id(self, name: str) -> Optional[int]:
+        """
+        Id estable del snippet `name`: coincidencia exacta o, si no hay,
+        sin distinguir mayúsculas (casefold). None si no existe.
+        """
+        return self._id_in(self.current(), name)
+
+    @staticmethod
+    def _id_in(snap: StoreSnapshot, name: str) -> Optional[int]:
+        snippet_id = snap.ids.get(name)
+        if snippet_id is None:
+            snippet_id = snap.folded.get(name.casefold())
+        return snippet_id
+
+    def name_for_id(self, snippet_id: int) -> Optional[str]:
+        """Nombre actual del snippet con ese id (None si ya no existe)."""
+        return self.current().names_by_id.get(snippet_id)
+
+    def by_id(self, snippet_id: int) -> Optional[Tuple[str, str]]:
+        """(nombre, código) actuales del snippet con ese id, de un mismo snapshot."""
+        snap = self.current()
+        name = snap.names_by_id.get(snippet_id)
+        if name is None:
+            return None
+        return name, snap.snippets[name]
+
+    def lookup(self, name: str) -> Optional[Tuple[str, str]]:
+        """(nombre guardado, código) de `name`, sin distinguir mayúsculas."""
+        snap = self.current()
+        snippet_id = self._id_in(snap, name)
+        if snippet_id is None:
+            return None
+        stored = snap.names_by_id[snippet_id]
+        return stored, snap.snippets[stored]
+
+    def preview(self, name: str, code: Optional[str] = None) -> str:
+        """
+        Vista previa de una línea del snippet. Se calcula una vez por
+        versión del código y se reutiliza mientras el código no cambie.
+        """
+        if code is None:
+            code = self.get(name) or ""
+        cached = self._previews.get(name)
+        if cached is not None and cached[0] == code:
+            return cached[1]
+        preview = make_preview(code)
+        self._previews[name] = (code, preview)
+        return preview
+
+    # ---------------------------------------------------------------- búsqueda
+
+    def search(self, query: str, snap: Optional[StoreSnapshot] = None) -> List[Tuple[str, str]]:
+        """
+        (nombre, código) cuyo nombre o código contiene `query`
+        (case-insensitive), ordenados por nombre. Con `snap`, los de ese
+        snapshot aunque ya se haya publicado otro.
+        """
+        if snap is None:
+            snap = self.current()
+        ordered = self._sorted_list(snap)
+        if not query:
+            return list(ordered)
+
+        def scan():
+            q = query.lower()
+            return [(name, code) for name, code in ordered
+                    if q in name.lower() or q in searchable_code(code).lower()]
+
+        index = self._search_index(snap)
+        if index is None:
+            # El índice se está construyendo: recorrido completo como antes
+            return scan()
+
+        # El índice es parte del snapshot: la consulta no toma locks
+        flags = index.match_flags(query)
+        matches = flags.count(1)
+        if not matches:
+            return []
+        if matches == len(ordered):
+            return list(ordered)
+        getter, ranks = self._slot_order(snap, ordered)
+        if matches * SPARSE_RESULT_RATIO > len(ordered):
+            # Muchos resultados: reordenar los flags y filtrar la lista
+            # ya ordenada es más barato que ordenar (todo en C)
+            if len(flags) < len(ranks):
+                flags = bytes(flags) + bytes(len(ranks) - len(flags))
+            return list(compress(ordered, getter(flags)))
+        # Pocos: ubicar cada uno (find en C) y ordenar sus posiciones
+        positions = []
+        find = flags.find
+        slot = find(1)
+        while slot >= 0:
+            positions.append(ranks[slot])
+            slot = find(1, slot + 1)
+        positions.sort()
+        if len(positions) == 1:
+            return [ordered[positions[0]]]
+        return list(itemgetter(*positions)(ordered))
+
+    def _slot_order(self, snap: StoreSnapshot, ordered: List[Tuple[str, str]]):
+        """
+        (itemgetter que lleva flags por slot al orden de `ordered`, lista
+        slot -> posición en `ordered`) de la versión de `snap`.
+        """
+        cached = self._ranks
+        if cached is None or cached[0] != snap.version:
+            slots = [snap.slots[name] for name, _ in ordered]
+            ranks = [0] * (max(slots) + 1)
+            for position, slot in enumerate(slots):
+                ranks[slot] = position
+            getter = itemgetter(*slots) if len(slots) > 1 else (lambda flags: (flags[slots[0]],))
+            cached = (snap.version, getter, ranks)
+            self._ranks = cached
+        return cached[1], cached[2]
+
+    def _search_index(self, snap: StoreSnapshot) -> Optional[TrigramIndex]:
+        """Índice de `snap` si está listo (si no, lo construye o lo encarga)."""
+        if snap.index is not None:
+            return snap.index
+        if len(snap.snippets) <= INDEX_SYNC_BUILD_LIMIT:
+            self.warm_index()
+        else:
+            with self._building_lock:
+                if self._index_building:
+                    return None
+                self._index_building = True
+            threading.Thread(target=self.warm_index, daemon=True).start()
+            return None
+        # La versión es la misma aunque el snapshot publicado sea otro objeto
+        published = self._snap
+        return published.index if published.version == snap.version else None
+
+    def warm_index(self):
+        """Construye el índice de trigramas si todavía no existe."""
+        with self._index_lock:
+            try:
+                self._revalidate()
+                while self._snap.index is None:
+                    # Construir sin el lock de escritura, sobre un snapshot
+                    snap = self._snap
+                    index = TrigramIndex()
+                    index.build((slot, name, searchable_code(snap.snippets[name]))
+                                for name, slot in snap.slots.items())
+                    with self._write_lock:
+                        # Si hubo cambios durante la construcción, reconstruir
+                        if snap is self._snap:
+                            self._snap = snap.with_index(index)
+            finally:
+                with self._building_lock:
+                    self._index_building = False
+
+    # --------------------------------------------------------------- escritura
+
+    def _bind_id(self, draft: StoreSnapshot, name: str, snippet_id: Optional[int] = None) -> int:
+        if snippet_id is None:
+            snippet_id = self._next_id
+            self._next_id += 1
+        draft.ids[name] = snippet_id
+        draft.names_by_id[snippet_id] = name
+        # Ante nombres que solo difieren en mayúsculas gana el primero
+        draft.folded.setdefault(name.casefold(), snippet_id)
+        return snippet_id
+
+    @staticmethod
+    def _unbind_id(draft: StoreSnapshot, name: str) -> int:
+        snippet_id = draft.ids.pop(name)
+        del draft.names_by_id[snippet_id]
+        folded = name.casefold()
+        if draft.folded.get(folded) == snippet_id:
+            del draft.folded[folded]
+            # Si quedaba otro nombre con el mismo casefold, pasa a ser él
+            for other, other_id in draft.ids.items():
+                if other.casefold() == folded:
+                    draft.folded[folded] = other_id
+                    break
+        return snippet_id
+
+    def _publish(self, draft: StoreSnapshot):
+        self._snap = draft
+        # Registrar la firma propia para no releer lo que acabamos de escribir
+        self._signature = self.backend.signature()
+
+    def _allocate_slot(self, draft: StoreSnapshot, name: str) -> int:
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_names[slot] = name
+        else:
+            slot = len(self._slot_names)
+            self._slot_names.append(name)
+        draft.slots[name] = slot
+        return slot
+
+    def _release_slot(self, draft: StoreSnapshot, name: str):
+        slot = draft.slots.pop(name)
+        self._slot_names[slot] = None
+        self._previews.pop(name, None)
+        if draft.index is not None:
+            draft.index.remove(slot)
+        self._free_slots.append(slot)
+
+    def put(self, name: str, code: str):
+        """Agrega o reemplaza un snippet y lo persiste."""
+        with self._write_lock:
+            self._revalidate()
+            draft = self._snap.draft()
+            draft.snippets[name] = code
+            # Si el backend falla no se publica nada: el snapshot vigente sigue intacto
+            self.backend.put(draft.snippets, name, code)
+            slot = draft.slots.get(name)
+            if slot is None:
+                slot = self._allocate_slot(draft, name)
+                self._bind_id(draft, name)
+            if draft.index is not None:
+                draft.index.add(slot, name, searchable_code(code))
+            self._publish(draft)
+
+    def rename(self, old_name: str, new_name: str, code: str):
+        """Reemplaza `old_name` por `new_name` con el código indicado."""
+        with self._write_lock:
+            self._revalidate()
+            draft = self._snap.draft()
+            del draft.snippets[old_name]
+            draft.snippets[new_name] = code
+            self.backend.rename(draft.snippets, old_name, new_name, code)
+            # El snippet conserva su slot y su id
+            self._previews.pop(old_name, None)
+            self._bind_id(draft, new_name, self._unbind_id(draft, old_name))
+            slot = draft.slots.pop(old_name)
+            draft.slots[new_name] = slot
+            self._slot_names[slot] = new_name
+            if draft.index is not None:
+                draft.index.add(slot, new_name, searchable_code(code))
+            self._publish(draft)
+
+    def remove(self, name: str):
+        with self._write_lock:
+            self._revalidate()
+            draft = self._snap.draft()
+            del draft.snippets[name]
+            self.backend.remove(draft.snippets, name)
+            self._release_slot(draft, name)
+            self._unbind_id(draft, name)
+            self._publish(draft)
+
+    def replace_all(self, snippets: Dict[str, str]):
+        """Reemplaza la colección completa (usado por save_snippets)."""
+        with self._write_lock:
+            snippets = dict(snippets)
+            self.backend.replace_all(snippets)
+            self._set_snippets(snippets)
+            self._signature = self.backend.signature()
+
+    def flush(self):
+        """Escribe ya los cambios que el backend tenga pendientes."""
+        self.backend.flush()
+
+    def touch(self, name: str):
+        """Registra que el snippet se acaba de usar (si el backend lo soporta)."""
+        self.backend.touch(name)
@@ -0,0 +1,229 @@
+# core/trigram.py
+
+"""
+Índice de trigramas para la búsqueda por subcadena de search_snippets().
+
+Cada snippet se indexa como un solo texto en minúsculas, nombre y código
+unidos por SEPARATOR. Cada trigrama (3 caracteres seguidos de ese texto)
+apunta a un bitmap -un int de Python- con un bit por snippet. Una
+consulta hace AND de los bitmaps de sus trigramas y solo verifica con
+`in` los candidatos que sobreviven, así que el resultado es exactamente el
+mismo que el de recorrer toda la biblioteca. Como la consulta no contiene
+el separador, nunca coincide a caballo entre nombre y código, y basta un
+`in` por candidato.
+
+Los bitmaps son mucho más compactos que un set por trigrama (el SQL tiene
+pocos trigramas distintos pero muy repetidos) y tanto la intersección como
+la verificación se hacen en C (operadores de int, map/compress).
+"""
+
+from itertools import compress, count, repeat
+from operator import contains, itemgetter
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Une nombre y código en el texto indexado (no aparece en lo que se teclea)
+SEPARATOR = "\x00"
+
+# Conversión entre texto binario '0'/'1' y bytes 0/1 (un byte por slot)
+_FLAG_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_DIGIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def _trigrams(text: str) -> Set[Tuple[str, str, str]]:
+    return set(zip(text, text[1:], text[2:]))
+
+
+def _document(name: str, code: str) -> str:
+    """Texto indexado de un snippet."""
+    return f"{name.lower()}{SEPARATOR}{code.lower()}"
+
+
+def _flags_to_bitmap(flags: bytearray) -> int:
+    """Convierte un bytearray con un byte 0/1 por slot en un bitmap."""
+    if not flags:
+        return 0
+    return int(flags[::-1].translate(_FLAG_DIGITS).decode("ascii"), 2)
+
+
+def _bitmap_flags(bits: int) -> bytes:
+    """Convierte un bitmap en bytes 0/1, uno por slot (hasta el bit más alto)."""
+    return bin(bits)[:1:-1].encode("ascii").translate(_DIGIT_FLAGS)
+
+
+def _pick(values: List[str], slots: List[int]) -> Tuple[str, ...]:
+    """values[slot] para cada slot, como tupla (itemgetter lo hace en C)."""
+    if len(slots) == 1:
+        return (values[slots[0]],)
+    return itemgetter(*slots)(values)
+
+
+class TrigramIndex:
+    """
+    Índice incremental slot -> (nombre, código).
+
+    Los slots son enteros pequeños asignados por SnippetStore; conviene que
+    sean densos porque el tamaño de cada bitmap depende del slot más alto.
+    """
+
+    def __init__(self):
+        self._postings: Dict[Tuple[str, str, str], int] = {}
+        # "nombre SEPARATOR código" en minúsculas por slot, para la
+        # verificación; "" en los slots libres (nunca contiene una consulta)
+        self._texts: List[str] = []
+        # Slots con texto de menos de 3 caracteres (sin trigramas)
+        self._short: Set[int] = set()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def copy(self) -> "TrigramIndex":
+        """
+        Copia independiente: add()/remove() sobre ella no cambian esta
+        (los bitmaps son ints inmutables y se comparten).
+        """
+        other = TrigramIndex()
+        other._postings = dict(self._postings)
+        other._texts = list(self._texts)
+        other._short = set(self._short)
+        other._size = self._size
+        return other
+
+    def add(self, slot: int, name: str, code: str):
+        """Indexa (o reindexa) un snippet."""
+        self.remove(slot)
+        text = _document(name, code)
+        if slot >= len(self._texts):
+            self._texts.extend([""] * (slot + 1 - len(self._texts)))
+        self._texts[slot] = text
+        if len(text) < 3:
+            self._short.add(slot)
+        self._size += 1
+        bit = 1 << slot
+        postings = self._postings
+        for gram in _trigrams(text):
+            postings[gram] = postings.get(gram, 0) | bit
+
+    def remove(self, slot: int):
+        if slot >= len(self._texts) or not self._texts[slot]:
+            return
+        text = self._texts[slot]
+        self._texts[slot] = ""
+        self._short.discard(slot)
+        self._size -= 1
+        mask = ~(1 << slot)
+        postings = self._postings
+        for gram in _trigrams(text):
+            bits = postings[gram] & mask
+            if bits:
+                postings[gram] = bits
+            else:
+                del postings[gram]
+
+    def build(self, docs: Iterable[Tuple[int, str, str]]):
+        """Construye el índice completo de una vez (mucho más rápido que add())."""
+        texts_by_slot: Dict[int, str] = {}
+        slots_by_gram: Dict[Tuple[str, str, str], List[int]] = {}
+        for slot, name, code in docs:
+            text = texts_by_slot[slot] = _document(name, code)
+            for gram in _trigrams(text):
+                slots = slots_by_gram.get(gram)
+                if slots is None:
+                    slots_by_gram[gram] = [slot]
+                else:
+                    slots.append(slot)
+
+        size = max(texts_by_slot) + 1 if texts_by_slot else 0
+        postings = {}
+        for gram, slots in slots_by_gram.items():
+            flags = bytearray(size)
+            for slot in slots:
+                flags[slot] = 1
+            postings[gram] = _flags_to_bitmap(flags)
+
+        texts = [""] * size
+        for slot, text in texts_by_slot.items():
+            texts[slot] = text
+
+        self._postings = postings
+        self._texts = texts
+        self._short = {slot for slot, text in texts_by_slot.items() if len(text) < 3}
+        self._size = len(texts_by_slot)
+
+    def search(self, query: str) -> List[int]:
+        """
+        Slots cuyo nombre o código contiene `query` (case-insensitive),
+        en orden ascendente.
+        """
+        return list(compress(count(), self.match_flags(query)))
+
+    def match_flags(self, query: str) -> bytes:
+        """
+        Un byte 0/1 por slot: 1 si el nombre o el código contiene `query`
+        (case-insensitive). Puede ser más corto que la cantidad de slots;
+        los que faltan no coinciden.
+        """
+        q = query.lower()
+        if SEPARATOR in q:
+            return self._scan_fields(q)
+        if len(q) < 3:
+            return self._search_short(q)
+
+        postings = self._postings
+        bits = -1
+        for gram in _trigrams(q):
+            bits &= postings.get(gram, 0)
+            if not bits:
+                return b""
+        if len(q) == 3:
+            # El trigrama es la consulta completa: no hay falsos positivos
+            return _bitmap_flags(bits)
+        return self._verify(bits, q)
+
+    def _verify(self, bits: int, q: str) -> bytes:
+        """Filtra los candidatos de `bits` cuyo nombre o código contiene realmente q."""
+        flags = _bitmap_flags(bits)
+        candidates = flags.count(1)
+        texts = self._texts
+        if candidates * 4 > len(texts):
+            # Casi todos son candidatos: verificar todos los slots de una
+            # pasada (en C) es más barato que seleccionar y repartir
+            return bytes(map(contains, texts, repeat(q)))
+        slots = list(compress(count(), flags))
+        flags = bytearray(len(flags))
+        for slot in compress(slots, map(contains, _pick(texts, slots), repeat(q))):
+            flags[slot] = 1
+        return flags
+
+    def _search_short(self, q: str) -> bytes:
+        """
+        Consultas de 1-2 caracteres: unión de los trigramas que contienen la
+        consulta (exacto, sin verificar) más los textos demasiado cortos para
+        tener trigramas.
+        """
+        bits = 0
+        if len(q) == 1:
+            for gram, gram_bits in self._postings.items():
+                if q in gram:
+                    bits |= gram_bits
+        elif len(q) == 2:
+            first, second = q
+            for (a, b, c), gram_bits in self._postings.items():
+                if (a == first and b == second) or (b == first and c == second):
+                    bits |= gram_bits
+        else:
+            # Consulta vacía: todos los slots ocupados
+            return bytes(map(bool, self._texts))
+
+        flags = bytearray(_bitmap_flags(bits)) if bits else bytearray()
+        for slot in self._short:
+            if q in self._texts[slot]:
+                if slot >= len(flags):
+                    flags.extend(bytes(slot + 1 - len(flags)))
+                flags[slot] = 1
+        return flags
+
+    def _scan_fields(self, q: str) -> bytes:
+        """Consulta con el separador (no se teclea): recorrido campo por campo."""
+        return bytes(any(q in field for field in text.split(SEPARATOR, 1))
+                     for text in self._texts)
@@ -0,0 +1,162 @@
+# core/typer.py
+
+"""
+Motor de escritura para cuando el pegado por portapapeles falla.
+
+Antes se usaba pyautogui.write(code, interval=0.01): un carácter a la
+vez, 10 ms cada uno más la sobrecarga de pyautogui, así que una consulta
+de 5 KB tardaba más de un minuto y no había forma de detenerla. Aquí el
+texto se inyecta en lotes (un SendInput por lote en Windows), se puede
+cancelar con Esc entre lotes y se informa el progreso.
+
+Backends intercambiables, como en core/paste.py:
+
+- WindowsTypingBackend: KEYEVENTF_UNICODE vía SendInput (cualquier carácter).
+- XdotoolTypingBackend: `xdotool type` en Linux/X11.
+- PyautoguiTypingBackend: último recurso (solo lo que pyautogui sabe teclear).
+- FakeTypingBackend: guarda el texto en memoria, para probar sin escritorio.
+"""
+
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, List, Optional
+
+# Caracteres por lote: lo bastante grande para que el costo fijo por
+# lote no importe y lo bastante chico para que Esc responda enseguida
+CHUNK_SIZE = 200
+# Respiro entre lotes para que la aplicación destino vacíe su cola de entrada
+CHUNK_PAUSE = 0.005
+
+
+class WindowsTypingBackend:
+    def type_chunk(self, text: str):
+        from core import win_input
+        win_input.send_inputs(win_input.unicode_events(text))
+
+
+class XdotoolTypingBackend:
+    def type_chunk(self, text: str):
+        text = text.replace("\r\n", "\n")
+        subprocess.run(["xdotool", "type", "--delay", "0", "--", text], check=True)
+
+
+class PyautoguiTypingBackend:
+    def type_chunk(self, text: str):
+        import pyautogui
+        pyautogui.write(text, interval=0, _pause=False)
+
+
+class FakeTypingBackend:
+    """Acumula lo escrito; `chunk_delay` simula el costo de cada lote."""
+
+    def __init__(self, chunk_delay: float = 0.0):
+        self.chunk_delay = chunk_delay
+        self.chunks: List[str] = []
+
+    @property
+    def typed(self) -> str:
+        return "".join(self.chunks)
+
+    def type_chunk(self, text: str):
+        if self.chunk_delay:
+            time.sleep(self.chunk_delay)
+        self.chunks.append(text)
+
+
+def default_typing_backend():
+    """Backend adecuado para el sistema actual."""
+    if sys.platform == "win32":
+        return WindowsTypingBackend()
+    if shutil.which("xdotool"):
+        return XdotoolTypingBackend()
+    return PyautoguiTypingBackend()
+
+
+class _EscapeWatcher:
+    """Mientras está activo, pulsar Esc activa `event` (requiere keyboard)."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+        self._hook = None
+
+    def __enter__(self):
+        try:
+            import keyboard
+            self._hook = keyboard.on_press_key("esc", lambda _: self.event.set(), suppress=False)
+        except Exception as e:
+            print(f"⚠️ No se pudo vigilar Esc durante la escritura: {e}")
+        return self
+
+    def __exit__(self, *exc):
+        if self._hook is not None:
+            import keyboard
+            keyboard.unhook(self._hook)
+
+
+class TypingEngine:
+    """
+    Escribe texto en la ventana activa por lotes.
+
+    type_text() bloquea hasta terminar o ser cancelado, así que conviene
+    llamarlo desde un hilo propio (nunca desde el hilo de Qt ni desde el
+    de los hooks de keyboard, que es el que entrega el Esc).
+    """
+
+    def __init__(self, backend=None, watch_escape: bool = True,
+                 chunk_size: int = CHUNK_SIZE, chunk_pause: float = CHUNK_PAUSE):
+        self.backend = backend if backend is not None else default_typing_backend()
+        self.watch_escape = watch_escape
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Detiene la escritura en curso al terminar el lote actual."""
+        self._cancel.set()
+
+    def type_text(self, text: str,
+                  progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """
+        Escribe `text`. Devuelve True si terminó y False si se canceló
+        (con Esc o cancel()). `progress(escritos, total)` se llama tras
+        cada lote.
+        """
+        watcher = _EscapeWatcher(self._cancel) if self.watch_escape else nullcontext()
+        with self._lock, watcher:
+            self._cancel.clear()
+            total = len(text)
+            done = 0
+            while done < total:
+                if self._cancel.is_set():
+                    return False
+                end = min(done + self.chunk_size, total)
+                # No partir un "\r\n" entre dos lotes
+                if end < total and text[end - 1] == "\r" and text[end] == "\n":
+                    end += 1
+                self.backend.type_chunk(text[done:end])
+                done = end
+                if progress is not None:
+                    progress(done, total)
+                if done < total and self.chunk_pause:
+                    time.sleep(self.chunk_pause)
+            return True
+
+
+# Motor único del proceso
+_typing_engine: Optional[TypingEngine] = None
+_typing_engine_lock = threading.Lock()
+
+
+def get_typing_engine() -> TypingEngine:
+    """Devuelve el motor de escritura compartido."""
+    global _typing_engine
+    if _typing_engine is None:
+        with _typing_engine_lock:
+            if _typing_engine is None:
+                _typing_engine = TypingEngine()
+    return _typing_engine
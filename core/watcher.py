@@ -0,0 +1,202 @@
+# core/watcher.py
+
+"""
+Vigila sql_snippets.json / config.json y avisa cuando otro proceso los
+cambia (el usuario editando a mano, un instalador, una sincronización).
+
+En Linux usa inotify vía ctypes sobre el directorio de cada archivo: los
+editores y nuestras propias escrituras atómicas reemplazan el archivo
+con un rename, y vigilar el directorio sobrevive a eso. En el resto de
+sistemas (o si inotify no está disponible) consulta la firma de los
+archivos cada POLL_INTERVAL segundos: un stat por archivo, fuera del
+camino de las hotkeys.
+
+Solo se llama al callback del archivo cuya firma cambió; decidir si el
+cambio es propio (escritura de Klip) o externo queda del lado de quien
+se suscribe (SnippetStore.refresh, ConfigService.refresh).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from core.persistence import file_signature
+
+# Intervalo del modo por sondeo (s)
+POLL_INTERVAL = 1.0
+# Tras un evento se espera este tiempo (s) a que terminen de llegar los demás
+SETTLE_DELAY = 0.05
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Envoltura mínima de inotify(7) con ctypes."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.fd = fd
+
+    def add_watch(self, directory: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch({directory})")
+        return wd
+
+    def read_names(self) -> List[tuple]:
+        """(wd, nombre) de los eventos disponibles, sin bloquear."""
+        events = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].split(b"\0", 1)[0]
+            offset += length
+            events.append((wd, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    Llama a `callback(path)` cada vez que cambia la firma de un archivo
+    vigilado. Los callbacks corren en el hilo del watcher.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self._callbacks: Dict[str, List[Callable[[str], None]]] = {}
+        self._signatures: Dict[str, Optional[Hashable]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._inotify: Optional[_Inotify] = None
+        # wd de inotify -> directorio vigilado
+        self._directories: Dict[int, str] = {}
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+
+    @property
+    def mode(self) -> str:
+        """'inotify', 'polling' o 'stopped'."""
+        if self._thread is None:
+            return "stopped"
+        return "inotify" if self._inotify is not None else "polling"
+
+    def watch(self, path: str, callback: Callable[[str], None]):
+        """Vigila `path` (puede no existir todavía)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._callbacks:
+                self._callbacks[path] = []
+                self._signatures[path] = file_signature(path)
+                if self._inotify is not None:
+                    self._add_directory(os.path.dirname(path))
+            self._callbacks[path].append(callback)
+
+    def _add_directory(self, directory: str):
+        if directory not in self._directories.values():
+            self._directories[self._inotify.add_watch(directory)] = directory
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                with self._lock:
+                    for path in self._callbacks:
+                        self._add_directory(os.path.dirname(path))
+                self._wake_r, self._wake_w = os.pipe()
+            except (OSError, AttributeError) as e:
+                print(f"⚠️ inotify no disponible, se vigilará por sondeo: {e}")
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+                self._directories = {}
+        target = self._run_inotify if self._inotify is not None else self._run_polling
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    # ----------------------------------------------------------------- bucles
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def _run_inotify(self):
+        inotify = self._inotify
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([inotify.fd, self._wake_r], [], [])
+                if self._stop.is_set():
+                    break
+                if inotify.fd not in ready:
+                    continue
+                # Un guardado suele ser varios eventos (temporal, rename...)
+                time.sleep(SETTLE_DELAY)
+                names = {(self._directories.get(wd), name) for wd, name in inotify.read_names()}
+                paths = [os.path.join(directory, name) for directory, name in names if directory]
+                self.check(paths)
+        finally:
+            inotify.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._inotify = None
+
+    def check(self, paths: Optional[List[str]] = None) -> List[str]:
+        """
+        Compara la firma de `paths` (o de todos) con la última vista y
+        llama a los callbacks de los que cambiaron. Devuelve esos paths.
+        """
+        changed = []
+        with self._lock:
+            candidates = self._callbacks if paths is None else [
+                path for path in paths if path in self._callbacks
+            ]
+            for path in candidates:
+                signature = file_signature(path)
+                if signature != self._signatures[path]:
+                    self._signatures[path] = signature
+                    changed.append((path, list(self._callbacks[path])))
+        for path, callbacks in changed:
+            for callback in callbacks:
+                try:
+                    callback(path)
+                except Exception as e:
+                    print(f"⚠️ Error procesando el cambio de '{path}': {e}")
+        return [path for path, _ in changed]
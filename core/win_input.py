@@ -0,0 +1,179 @@
+# core/win_input.py
+
+"""
+Inyección de teclado en Windows con SendInput (user32) vía ctypes.
+
+SendInput recibe un arreglo de eventos y los encola de forma atómica:
+ninguna otra entrada (real o simulada) se intercala entre ellos. Por eso
+Ctrl+V se envía como un único lote de 4 eventos en lugar de
+keyDown/press/keyUp sueltos.
+
+El módulo se puede importar en cualquier sistema; user32 solo se carga
+al enviar el primer lote.
+"""
+
+import ctypes
+import time
+from ctypes import wintypes
+from typing import Callable, List, Optional
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+VK_TAB = 0x09
+VK_RETURN = 0x0D
+VK_CONTROL = 0x11
+VK_C = 0x43
+VK_V = 0x56
+
+ULONG_PTR = ctypes.c_size_t
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ULONG_PTR),
+    ]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ULONG_PTR),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", wintypes.DWORD),
+        ("wParamL", wintypes.WORD),
+        ("wParamH", wintypes.WORD),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    # La unión completa para que sizeof(INPUT) coincida con el de Windows
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+_user32 = None
+
+
+def _get_user32():
+    global _user32
+    if _user32 is None:
+        _user32 = ctypes.WinDLL("user32", use_last_error=True)
+        _user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        _user32.SendInput.restype = wintypes.UINT
+        _user32.GetClipboardSequenceNumber.argtypes = ()
+        _user32.GetClipboardSequenceNumber.restype = wintypes.DWORD
+        _user32.GetForegroundWindow.argtypes = ()
+        _user32.GetForegroundWindow.restype = wintypes.HWND
+        _user32.SetForegroundWindow.argtypes = (wintypes.HWND,)
+        _user32.SetForegroundWindow.restype = wintypes.BOOL
+        _user32.IsWindow.argtypes = (wintypes.HWND,)
+        _user32.IsWindow.restype = wintypes.BOOL
+    return _user32
+
+
+def key_event(vk: int, up: bool = False) -> INPUT:
+    """Evento de tecla virtual (presionar o soltar)."""
+    event = INPUT(type=INPUT_KEYBOARD)
+    event.u.ki = KEYBDINPUT(wVk=vk, wScan=0, dwFlags=KEYEVENTF_KEYUP if up else 0, time=0, dwExtraInfo=0)
+    return event
+
+
+def unicode_events(text: str) -> List[INPUT]:
+    """
+    Eventos para escribir `text` tal cual, sin depender de la distribución
+    de teclado: cada carácter va como KEYEVENTF_UNICODE (los de fuera del
+    BMP como par sustituto UTF-16, que es lo que Windows espera). Los
+    saltos de línea y tabuladores se envían como Enter/Tab reales.
+    """
+    events = []
+    for ch in text.replace("\r\n", "\n"):
+        if ch in "\r\n":
+            events += [key_event(VK_RETURN), key_event(VK_RETURN, up=True)]
+            continue
+        if ch == "\t":
+            events += [key_event(VK_TAB), key_event(VK_TAB, up=True)]
+            continue
+        data = ch.encode("utf-16-le")
+        for i in range(0, len(data), 2):
+            unit = data[i] | (data[i + 1] << 8)
+            for flags in (KEYEVENTF_UNICODE, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP):
+                event = INPUT(type=INPUT_KEYBOARD)
+                event.u.ki = KEYBDINPUT(wVk=0, wScan=unit, dwFlags=flags, time=0, dwExtraInfo=0)
+                events.append(event)
+    return events
+
+
+def send_inputs(events: List[INPUT]) -> int:
+    """Envía los eventos en un solo SendInput. Lanza OSError si no entraron todos."""
+    if not events:
+        return 0
+    array = (INPUT * len(events))(*events)
+    sent = _get_user32().SendInput(len(events), array, ctypes.sizeof(INPUT))
+    if sent != len(events):
+        # Normalmente UIPI: la ventana destino tiene más privilegios que Klip
+        raise ctypes.WinError(ctypes.get_last_error())
+    return sent
+
+
+def send_ctrl_combo(vk: int):
+    """Ctrl+<vk> como un único lote atómico de 4 eventos."""
+    send_inputs([
+        key_event(VK_CONTROL),
+        key_event(vk),
+        key_event(vk, up=True),
+        key_event(VK_CONTROL, up=True),
+    ])
+
+
+def clipboard_sequence() -> Optional[int]:
+    """Número de secuencia del portapapeles (cambia con cada escritura)."""
+    value = _get_user32().GetClipboardSequenceNumber()
+    # 0 significa que el proceso no tiene acceso a la estación de ventanas
+    return value or None
+
+
+def foreground_window() -> Optional[int]:
+    """HWND de la ventana en primer plano (None si no hay ninguna)."""
+    return _get_user32().GetForegroundWindow() or None
+
+
+def is_window(hwnd: int) -> bool:
+    return bool(_get_user32().IsWindow(hwnd))
+
+
+def set_foreground_window(hwnd: int) -> bool:
+    """Pide a Windows traer `hwnd` al frente (puede negarse)."""
+    return bool(_get_user32().SetForegroundWindow(hwnd))
+
+
+def wait_for_foreground(hwnd: int, timeout: float, poll: float = 0.005,
+                        current: Callable[[], Optional[int]] = foreground_window,
+                        alive: Callable[[int], bool] = is_window) -> bool:
+    """
+    Espera, como mucho `timeout` segundos, a que `hwnd` vuelva a estar en
+    primer plano. Devuelve False si venció el plazo o la ventana se cerró.
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        if current() == hwnd:
+            return True
+        if not alive(hwnd) or time.perf_counter() >= deadline:
+            return False
+        time.sleep(poll)
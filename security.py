@@ -1,27 +1,378 @@
 # security.py - Security measures for Klip
 
+"""
+Security checks for Klip.
+
+Importing this module has no side effects. The checks (machine id,
+executable integrity, debugger and VM detection) spawn wmic / tasklist /
+systeminfo on Windows, which used to add seconds to every autostart, so
+they now run on a background thread started with start_security_checks()
+once the tray is up. Their outcome goes to a SecurityStatus that the app
+queries (or is called back with); nothing here calls sys.exit.
+
+The machine id is cached in MACHINE_ID_CACHE, keyed by install path and
+hostname, so wmic only runs on the first launch of each install.
+
+Encryption goes through an UnlockSession: PBKDF2 (100k iterations) runs
+once per password and salt instead of once per call, and the key is
+wiped after UNLOCK_IDLE_TIMEOUT seconds idle or on lock().
+
+The frozen executable is checked against a manifest trailer appended by
+build_secure.py: its SHA-256 (streamed in HASH_CHUNK_SIZE reads) signed
+with Ed25519. Only the public key (MANIFEST_PUBLIC_KEY) ships with the
+app; the private key stays with whoever builds releases. A passing
+(path, size, mtime, file id) is cached in INTEGRITY_CACHE together with
+the signature it was verified against.
+"""
+
 import hashlib
 import hmac
+import json
 import os
+import platform
+import struct
 import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
 import base64
 
+from core.persistence import atomic_write_json
+
+# Machine id cache (next to config.json, like session.json)
+MACHINE_ID_CACHE = "machine_id.json"
+# wmic can hang on broken WMI repositories
+MACHINE_ID_TIMEOUT = 10
+# PBKDF2-HMAC-SHA256 iterations (changing it changes every derived key)
+KDF_ITERATIONS = 100000
+# Seconds an unlock session keeps its keys without being used
+UNLOCK_IDLE_TIMEOUT = 300.0
+# Keys an unlock session keeps at most (the oldest is wiped first)
+UNLOCK_MAX_KEYS = 8
+# Integrity results of unchanged executables (see verify_file_integrity)
+INTEGRITY_CACHE = "integrity_cache.json"
+# Bytes hashed per read: memory stays flat however big the executable is
+HASH_CHUNK_SIZE = 1024 * 1024
+# Manifest trailer appended by build_secure.py: sha256, content length,
+# Ed25519 signature, magic
+MANIFEST_MAGIC = b"KLIPMNF2"
+# Raw Ed25519 public key that release manifests are verified with (the
+# matching private key is never committed; see build_secure.py)
+MANIFEST_PUBLIC_KEY = bytes.fromhex(
+    "805cc2ac17cbd66d947bd3685f56cfee660c4267e607a7a7e3d4ff72cb8b9382")
+_MANIFEST = struct.Struct("<32sQ64s8s")
+
+
+def _query_machine_id():
+    """Ask the OS for a unique machine identifier (slow on Windows)."""
+    try:
+        if sys.platform == 'win32':
+            import subprocess
+            # Get Windows machine GUID
+            result = subprocess.run(
+                ['wmic', 'csproduct', 'get', 'UUID'],
+                capture_output=True,
+                text=True,
+                timeout=MACHINE_ID_TIMEOUT
+            )
+            uuid = result.stdout.split('\n')[1].strip()
+            return uuid
+        else:
+            # For other platforms, use MAC address
+            import uuid
+            return str(uuid.getnode())
+    except:
+        # Fallback to a combination of system info
+        return hashlib.sha256(
+            f"{platform.node()}{platform.machine()}".encode()
+        ).hexdigest()
+
+
+def _machine_cache_key():
+    """Cache key: a copy moved to another folder or machine asks again."""
+    install_path = os.path.abspath(sys.executable if getattr(sys, 'frozen', False) else sys.argv[0])
+    return hashlib.sha256(f"{install_path}|{platform.node()}".encode()).hexdigest()
+
+
+_machine_id = None
+_machine_id_lock = threading.Lock()
+
+
+def get_machine_id(cache_path: str = MACHINE_ID_CACHE) -> str:
+    """
+    Machine identifier, read from `cache_path` when it was stored by this
+    install on this host; otherwise queried once and cached.
+    """
+    global _machine_id
+    if _machine_id is not None:
+        return _machine_id
+    with _machine_id_lock:
+        if _machine_id is not None:
+            return _machine_id
+        key = _machine_cache_key()
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') == key and cached.get('machine_id'):
+                _machine_id = cached['machine_id']
+                return _machine_id
+        except (OSError, ValueError, AttributeError):
+            pass
+        machine_id = _query_machine_id()
+        try:
+            atomic_write_json(cache_path, {'key': key, 'machine_id': machine_id})
+        except OSError as e:
+            print(f"⚠ Could not cache machine id: {e}")
+        _machine_id = machine_id
+        return _machine_id
+
+
+def derive_key(password: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> bytearray:
+    """Raw 32-byte PBKDF2-HMAC-SHA256 key, in a bytearray so it can be wiped."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=iterations,
+        backend=default_backend()
+    )
+    return bytearray(kdf.derive(password.encode()))
+
+
+def _zeroize(buffer: bytearray):
+    for i in range(len(buffer)):
+        buffer[i] = 0
+
+
+class DerivedKey:
+    """
+    A key from UnlockSession.derive() that is not cached yet: pass it to
+    remember() once it is known to be right, or wipe() it.
+    """
+    
+    __slots__ = ("cache_key", "raw", "fernet", "cached")
+    
+    def __init__(self, cache_key: Tuple[bytes, bytes], raw: bytearray, fernet: Fernet,
+                 cached: bool = False):
+        self.cache_key = cache_key
+        self.raw = raw
+        self.fernet = fernet
+        # Already owned by the session: wipe() must leave it alone
+        self.cached = cached
+    
+    def wipe(self):
+        if not self.cached:
+            _zeroize(self.raw)
+
+
+class UnlockSession:
+    """
+    Derived-key cache: PBKDF2 runs once per (password, salt) and the
+    resulting Fernet is reused until the session is locked.
+
+    fernet() caches whatever it derives; callers that still have to check
+    the password use derive() and remember() only a key that worked, so
+    wrong guesses never reach the cache. At most `max_keys` keys are
+    kept in any case.
+
+    Keys are forgotten after `idle_timeout` seconds without use, or on
+    lock(). Locking overwrites the raw key bytes with zeros; the copies
+    kept inside the Fernet objects are immutable, so those are only
+    dropped.
+    """
+    
+    def __init__(self, idle_timeout: float = UNLOCK_IDLE_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic,
+                 max_keys: int = UNLOCK_MAX_KEYS):
+        self.idle_timeout = idle_timeout
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (salt, password fingerprint) -> (raw key, Fernet), most recent last
+        self._keys: "OrderedDict[Tuple[bytes, bytes], Tuple[bytearray, Fernet]]" = OrderedDict()
+        # salt -> last cache key unlocked for it
+        self._by_salt: Dict[bytes, Tuple[bytes, bytes]] = {}
+        self._last_used = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self.derivations = 0
+    
+    @staticmethod
+    def _cache_key(password: str, salt: bytes) -> Tuple[bytes, bytes]:
+        # Never keep the password itself around
+        return salt, hmac.new(salt, password.encode(), hashlib.sha256).digest()
+    
+    def is_unlocked(self) -> bool:
+        with self._lock:
+            self._expire_if_idle()
+            return bool(self._keys)
+    
+    def fernet(self, password: str, salt: bytes) -> Fernet:
+        """Fernet for (password, salt), deriving the key only the first time."""
+        cache_key = self._cache_key(password, salt)
+        with self._lock:
+            self._expire_if_idle()
+            entry = self._keys.get(cache_key)
+            if entry is None:
+                raw = derive_key(password, salt)
+                self.derivations += 1
+                entry = (raw, Fernet(base64.urlsafe_b64encode(bytes(raw))))
+            self._store(cache_key, entry)
+            return entry[1]
+    
+    def derive(self, password: str, salt: bytes) -> DerivedKey:
+        """
+        Key for (password, salt) without caching it (the cached one, if
+        the pair is already unlocked). See remember().
+        """
+        cache_key = self._cache_key(password, salt)
+        with self._lock:
+            self._expire_if_idle()
+            entry = self._keys.get(cache_key)
+            if entry is not None:
+                return DerivedKey(cache_key, entry[0], entry[1], cached=True)
+        raw = derive_key(password, salt)
+        with self._lock:
+            self.derivations += 1
+        return DerivedKey(cache_key, raw, Fernet(base64.urlsafe_b64encode(bytes(raw))))
+    
+    def remember(self, key: DerivedKey):
+        """Cache a key from derive() that turned out to be right."""
+        with self._lock:
+            self._expire_if_idle()
+            entry = self._keys.get(key.cache_key)
+            if entry is None:
+                entry = (key.raw, key.fernet)
+            elif entry[0] is not key.raw:
+                # Derived twice for the same pair: keep the cached copy
+                _zeroize(key.raw)
+            self._store(key.cache_key, entry)
+            key.cached = True
+    
+    def _store(self, cache_key: Tuple[bytes, bytes], entry: Tuple[bytearray, Fernet]):
+        self._keys[cache_key] = entry
+        self._keys.move_to_end(cache_key)
+        self._by_salt[cache_key[0]] = cache_key
+        while len(self._keys) > self.max_keys:
+            old_key, (raw, _fernet) = self._keys.popitem(last=False)
+            _zeroize(raw)
+            if self._by_salt.get(old_key[0]) == old_key:
+                del self._by_salt[old_key[0]]
+        self._last_used = self._clock()
+        self._schedule_expiry()
+    
+    def cached(self, salt: bytes) -> Optional[Fernet]:
+        """Fernet last unlocked for `salt`, or None when locked (no KDF run)."""
+        with self._lock:
+            self._expire_if_idle()
+            entry = self._keys.get(self._by_salt.get(salt))
+            if entry is None:
+                return None
+            self._last_used = self._clock()
+            return entry[1]
+    
+    def encrypt_many(self, items: Iterable[str], password: str, salt: bytes) -> List[str]:
+        """Encrypt every item with a single key derivation."""
+        f = self.fernet(password, salt)
+        return [base64.b64encode(f.encrypt(item.encode())).decode() for item in items]
+    
+    def decrypt_many(self, items: Iterable[str], password: str, salt: bytes) -> List[Optional[str]]:
+        """Decrypt every item with a single key derivation (None for invalid tokens)."""
+        f = self.fernet(password, salt)
+        results = []
+        for item in items:
+            try:
+                results.append(f.decrypt(base64.b64decode(item)).decode())
+            except Exception:
+                results.append(None)
+        return results
+    
+    def lock(self):
+        """Forget and wipe every cached key."""
+        with self._lock:
+            self._wipe()
+    
+    def _wipe(self):
+        for raw, _fernet in self._keys.values():
+            _zeroize(raw)
+        self._keys.clear()
+        self._by_salt.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+    
+    def _expire_if_idle(self):
+        if self._keys and self._clock() - self._last_used >= self.idle_timeout:
+            self._wipe()
+    
+    def _schedule_expiry(self):
+        # A single timer per session: when it fires it rechecks the idle time
+        if self._timer is not None or self.idle_timeout <= 0:
+            return
+        delay = max(0.0, self._last_used + self.idle_timeout - self._clock())
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._expire_if_idle()
+            if self._keys:
+                self._schedule_expiry()
+
+
+def envelope_encrypt(kek: Fernet, plaintext: str) -> Tuple[str, str]:
+    """
+    Envelope encryption: `plaintext` is encrypted with a fresh data key,
+    and the data key is encrypted (wrapped) with `kek`. Returns
+    (wrapped data key, token).
+    """
+    data_key = Fernet.generate_key()
+    token = Fernet(data_key).encrypt(plaintext.encode())
+    return kek.encrypt(data_key).decode(), token.decode()
+
+
+def envelope_decrypt(kek: Fernet, wrapped_key: str, token: str) -> str:
+    """Inverse of envelope_encrypt. Raises InvalidToken with the wrong kek."""
+    data_key = kek.decrypt(wrapped_key.encode())
+    return Fernet(data_key).decrypt(token.encode()).decode()
+
+
+_unlock_session = None
+_unlock_session_lock = threading.Lock()
+
+
+def get_unlock_session() -> UnlockSession:
+    """Session shared by the protected snippets (see core/protected.py)."""
+    global _unlock_session
+    if _unlock_session is None:
+        with _unlock_session_lock:
+            if _unlock_session is None:
+                _unlock_session = UnlockSession()
+    return _unlock_session
+
 
 class SecurityManager:
     """Manages security features for the application."""
     
-    def __init__(self):
-        self.app_signature = self._generate_app_signature()
-        self._verify_integrity()
+    def __init__(self, machine_id: Optional[str] = None,
+                 idle_timeout: float = UNLOCK_IDLE_TIMEOUT):
+        self.app_signature = self._generate_app_signature(machine_id)
+        self.session = UnlockSession(idle_timeout)
     
-    def _generate_app_signature(self):
+    def _generate_app_signature(self, machine_id: Optional[str] = None):
         """Generate a unique signature for the application."""
         # Combine multiple system identifiers
-        machine_id = self._get_machine_id()
+        if machine_id is None:
+            machine_id = get_machine_id()
         app_path = os.path.abspath(sys.argv[0])
         
         signature = hashlib.sha256(
@@ -30,31 +381,7 @@ class SecurityManager:
         
         return signature
     
-    def _get_machine_id(self):
-        """Get a unique machine identifier."""
-        try:
-            if sys.platform == 'win32':
-                import subprocess
-                # Get Windows machine GUID
-                result = subprocess.run(
-                    ['wmic', 'csproduct', 'get', 'UUID'],
-                    capture_output=True,
-                    text=True
-                )
-                uuid = result.stdout.split('\n')[1].strip()
-                return uuid
-            else:
-                # For other platforms, use MAC address
-                import uuid
-                return str(uuid.getnode())
-        except:
-            # Fallback to a combination of system info
-            import platform
-            return hashlib.sha256(
-                f"{platform.node()}{platform.machine()}".encode()
-            ).hexdigest()
-    
-    def _verify_integrity(self):
+    def verify_integrity(self) -> bool:
         """Verify the application hasn't been tampered with."""
         # Check if running from expected location
         if getattr(sys, 'frozen', False):
@@ -62,67 +389,43 @@ class SecurityManager:
             exe_path = sys.executable
             
             # Verify the executable hasn't been modified
-            if not self._check_file_integrity(exe_path):
-                self._handle_tampering()
+            return self._check_file_integrity(exe_path)
+        return True
     
     def _check_file_integrity(self, filepath):
         """Check if a file's integrity is intact."""
-        try:
-            # Calculate current hash
-            with open(filepath, 'rb') as f:
-                current_hash = hashlib.sha256(f.read()).hexdigest()
-            
-            # In production, compare with stored hash
-            # For now, we'll assume it's valid
-            return True
-        except:
-            return False
+        return verify_file_integrity(filepath)
     
-    def _handle_tampering(self):
-        """Handle detected tampering."""
-        print("Security violation detected. Application will exit.")
-        sys.exit(1)
+    def _salt(self) -> bytes:
+        return self.app_signature.encode()[:16]
     
     def encrypt_data(self, data: str, password: str) -> str:
         """Encrypt sensitive data."""
-        # Derive key from password
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=self.app_signature.encode()[:16],
-            iterations=100000,
-            backend=default_backend()
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        
-        # Encrypt
-        f = Fernet(key)
-        encrypted = f.encrypt(data.encode())
-        
-        return base64.b64encode(encrypted).decode()
+        return self.session.encrypt_many([data], password, self._salt())[0]
     
     def decrypt_data(self, encrypted_data: str, password: str) -> str:
         """Decrypt sensitive data."""
         try:
-            # Derive key from password
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=self.app_signature.encode()[:16],
-                iterations=100000,
-                backend=default_backend()
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-            
-            # Decrypt
-            f = Fernet(key)
-            encrypted = base64.b64decode(encrypted_data)
-            decrypted = f.decrypt(encrypted)
-            
-            return decrypted.decode()
+            return self.session.decrypt_many([encrypted_data], password, self._salt())[0]
         except:
             return None
     
+    def encrypt_many(self, items: Iterable[str], password: str) -> List[str]:
+        """Encrypt a batch with one key derivation and one Fernet."""
+        return self.session.encrypt_many(items, password, self._salt())
+    
+    def decrypt_many(self, items: Iterable[str], password: str) -> List[Optional[str]]:
+        """Decrypt a batch with one key derivation and one Fernet."""
+        items = list(items)
+        try:
+            return self.session.decrypt_many(items, password, self._salt())
+        except:
+            return [None for _ in items]
+    
+    def lock(self):
+        """Wipe the cached keys: the next call derives them again."""
+        self.session.lock()
+    
     def verify_api_request(self, data: dict, secret_key: str) -> bool:
         """Verify API request hasn't been tampered with."""
         # Create signature
@@ -147,8 +450,110 @@ class SecurityManager:
             return None
 
 
+# Executable integrity
+def hash_file(path: str, length: Optional[int] = None) -> bytes:
+    """SHA-256 of the first `length` bytes of `path` (all by default), read in chunks."""
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    remaining = length
+    with open(path, 'rb', buffering=0) as f:
+        while remaining is None or remaining > 0:
+            wanted = HASH_CHUNK_SIZE if remaining is None else min(HASH_CHUNK_SIZE, remaining)
+            read = f.readinto(view[:wanted])
+            if not read:
+                break
+            digest.update(view[:read])
+            if remaining is not None:
+                remaining -= read
+    return digest.digest()
+
+
+def _manifest_message(digest: bytes, length: int) -> bytes:
+    return MANIFEST_MAGIC + digest + length.to_bytes(8, 'little')
+
+
+def append_manifest(path: str, private_key: Ed25519PrivateKey):
+    """Sign `path` by appending the manifest trailer (used by build_secure.py)."""
+    length = os.path.getsize(path)
+    digest = hash_file(path)
+    signature = private_key.sign(_manifest_message(digest, length))
+    with open(path, 'ab') as f:
+        f.write(_MANIFEST.pack(digest, length, signature, MANIFEST_MAGIC))
+
+
+def read_manifest(path: str) -> Optional[Tuple[bytes, int, bytes]]:
+    """
+    (sha256, content length, signature) from the trailer of `path`, or
+    None when the file has no manifest. Raises ValueError if the trailer
+    is not signed by MANIFEST_PUBLIC_KEY.
+    """
+    size = os.path.getsize(path)
+    if size < _MANIFEST.size:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(size - _MANIFEST.size)
+        digest, length, signature, magic = _MANIFEST.unpack(f.read(_MANIFEST.size))
+    if magic != MANIFEST_MAGIC:
+        return None
+    if length != size - _MANIFEST.size:
+        raise ValueError("invalid integrity manifest")
+    try:
+        Ed25519PublicKey.from_public_bytes(MANIFEST_PUBLIC_KEY).verify(
+            signature, _manifest_message(digest, length))
+    except InvalidSignature:
+        raise ValueError("invalid integrity manifest") from None
+    return digest, length, signature
+
+
+def _integrity_cache_key(path: str) -> Optional[List]:
+    # File id: the inode on POSIX, the NTFS file index on Windows
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def verify_file_integrity(path: str, cache_path: str = INTEGRITY_CACHE) -> bool:
+    """
+    Check `path` against its manifest. Executables without a manifest
+    (development builds) pass. The trailer's signature is always checked
+    (one small read); the full rehash is skipped when `cache_path` holds
+    that same signature for an unchanged (path, size, mtime, file id).
+    """
+    key = _integrity_cache_key(path)
+    if key is None:
+        return False
+    try:
+        manifest = read_manifest(path)
+    except (OSError, ValueError):
+        return False
+    if manifest is None:
+        return True
+    digest, length, signature = manifest
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('key') == key and hmac.compare_digest(
+                cached.get('signature', ''), signature.hex()):
+            return True
+    except (OSError, ValueError, AttributeError, TypeError):
+        pass
+    try:
+        if not hmac.compare_digest(hash_file(path, length), digest):
+            return False
+    except OSError:
+        return False
+    try:
+        atomic_write_json(cache_path, {'key': key, 'signature': signature.hex()})
+    except OSError as e:
+        print(f"⚠ Could not cache integrity result: {e}")
+    return True
+
+
 # Anti-debugging measures
-def detect_debugger():
+def detect_debugger() -> bool:
     """Detect if application is being debugged."""
     # Check for common debugger processes
     debugger_processes = [
@@ -163,20 +568,25 @@ def detect_debugger():
             result = subprocess.run(
                 ['tasklist'],
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=10
             )
             running_processes = result.stdout.lower()
             
             for debugger in debugger_processes:
                 if debugger.lower() in running_processes:
-                    print("Debugger detected. Application will exit.")
-                    sys.exit(1)
+                    return True
         except:
             pass
+    return False
 
 
-def verify_environment():
-    """Verify the application is running in a legitimate environment."""
+def verify_environment() -> bool:
+    """Verify the application is running in a legitimate environment.
+
+    Returns True when a virtual machine is detected. That is only logged:
+    many legitimate users run in VMs.
+    """
     # Check if running in a virtual machine (basic check)
     if sys.platform == 'win32':
         try:
@@ -193,16 +603,115 @@ def verify_environment():
             vm_indicators = ['vmware', 'virtualbox', 'qemu', 'hyperv', 'virtual']
             for indicator in vm_indicators:
                 if indicator in output:
-                    # Log but don't block (many legitimate users run in VMs)
-                    print("Virtual environment detected.")
-                    break
+                    return True
         except:
             pass
+    return False
+
+
+class SecurityStatus:
+    """Outcome of the background security checks, safe to read from any thread."""
+    
+    def __init__(self):
+        self._done = threading.Event()
+        self.started = False
+        self.machine_id: Optional[str] = None
+        self.integrity_ok: Optional[bool] = None
+        self.debugger_detected: Optional[bool] = None
+        self.virtual_environment: Optional[bool] = None
+        self.errors: List[str] = []
+        self.duration = 0.0
+    
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the checks finish. Returns False on timeout."""
+        return self._done.wait(timeout)
+    
+    @property
+    def violation(self) -> Optional[str]:
+        """Reason the app should close, or None (also while still running)."""
+        if self.integrity_ok is False:
+            return "Security violation detected"
+        if self.debugger_detected:
+            return "Debugger detected"
+        return None
+    
+    def as_dict(self) -> dict:
+        return {
+            'done': self.done,
+            'machine_id': self.machine_id,
+            'integrity_ok': self.integrity_ok,
+            'debugger_detected': self.debugger_detected,
+            'virtual_environment': self.virtual_environment,
+            'errors': list(self.errors),
+            'duration': self.duration,
+        }
+
+
+_security_manager = None
+_security_status = SecurityStatus()
+_security_lock = threading.Lock()
+
 
+def get_security_manager() -> SecurityManager:
+    """Shared SecurityManager (resolves the machine id on first use)."""
+    global _security_manager
+    if _security_manager is None:
+        with _security_lock:
+            if _security_manager is None:
+                _security_manager = SecurityManager()
+    return _security_manager
 
-# Initialize security on import
-_security_manager = SecurityManager()
 
-# Run security checks
-detect_debugger()
-verify_environment()
+def get_security_status() -> SecurityStatus:
+    """Status of the checks started by start_security_checks()."""
+    return _security_status
+
+
+def run_security_checks(status: SecurityStatus):
+    """Run every check and record the results in `status` (blocking)."""
+    started = time.perf_counter()
+    steps = [
+        ('machine_id', get_machine_id),
+        ('integrity_ok', lambda: get_security_manager().verify_integrity()),
+        ('debugger_detected', detect_debugger),
+        ('virtual_environment', verify_environment),
+    ]
+    try:
+        for field, check in steps:
+            try:
+                setattr(status, field, check())
+            except Exception as e:
+                status.errors.append(f"{field}: {e}")
+            # No point in going on once the app has to close
+            if status.violation:
+                break
+    finally:
+        status.duration = time.perf_counter() - started
+        status._done.set()
+
+
+def start_security_checks(on_done: Optional[Callable[[SecurityStatus], None]] = None) -> SecurityStatus:
+    """
+    Run the checks on a daemon thread (only once per process) and return
+    the shared status. `on_done(status)` is called from that thread.
+    """
+    status = _security_status
+    with _security_lock:
+        if status.started:
+            return status
+        status.started = True
+    
+    def worker():
+        run_security_checks(status)
+        if on_done is not None:
+            try:
+                on_done(status)
+            except Exception as e:
+                print(f"⚠ Error handling security status: {e}")
+    
+    threading.Thread(target=worker, name="security-checks", daemon=True).start()
+    return status
@@ -0,0 +1,30 @@
+# tests/test_benchmarks.py
+
+"""Humo de la suite de benchmarks: que corra y que detecte regresiones."""
+
+from benchmarks.bench_manager import compare, run_suite
+from benchmarks.synthetic import generate_library
+
+
+def test_library_is_deterministic():
+    library = generate_library(50)
+    assert len(library) == 50
+    assert library == generate_library(50)
+    assert all(code.startswith("SELECT") for code in library.values())
+
+
+def test_suite_runs_smallest_size():
+    report = run_suite([10])
+    operations = report["results"]["10"]
+    for operation in ("load_snippets", "search_snippets[no_match]",
+                      "add_update_delete", "sync_hotkeys_with_snippets"):
+        assert operations[operation]["median_ms"] >= 0
+    # Comparada consigo misma no hay regresiones
+    assert compare(report, report) == []
+
+
+def test_compare_flags_slower_median():
+    baseline = {"results": {"10": {"load_snippets": {"median_ms": 1.0}}}}
+    current = {"results": {"10": {"load_snippets": {"median_ms": 2.0}}}}
+    assert len(compare(baseline, current, threshold=1.5)) == 1
+    assert compare(baseline, current, threshold=3.0) == []
@@ -0,0 +1,63 @@
+# tests/test_capture.py
+
+"""SelectionCapture sobre el portapapeles simulado de FakePasteBackend."""
+
+import threading
+
+import pytest
+
+from core.capture import CAPTURE_ATTEMPTS, SelectionCapture
+from core.paste import FakePasteBackend, PasteEngine
+
+
+class CountingBackend(FakePasteBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.copies = 0
+
+    def send_copy(self):
+        self.copies += 1
+        super().send_copy()
+
+
+def make_capture(backend):
+    timing = {"confirm_timeout_ms": 200, "poll_interval_ms": 1, "post_paste_ms": 0,
+              "capture_timeout_ms": 30}
+    return SelectionCapture(PasteEngine(backend=backend, timing=timing))
+
+
+@pytest.mark.parametrize("with_sequence", [True, False])
+def test_capture_returns_selection_and_restores_clipboard(with_sequence):
+    backend = CountingBackend(with_sequence=with_sequence)
+    backend.set_clipboard("lo que había antes")
+    # El Ctrl+C tarda un poco en verse, como en un sistema cargado
+    backend.propagation_delay = 0.005
+    backend.selection = "  SELECT * FROM ventas;\n"
+    capture = make_capture(backend)
+
+    assert capture.capture() == "SELECT * FROM ventas;"
+    assert backend.copies == 1
+    assert backend.get_clipboard() == "lo que había antes"
+    assert backend.pasted == []
+
+
+@pytest.mark.parametrize("with_sequence", [True, False])
+def test_capture_without_selection_gives_up_after_attempts(with_sequence):
+    backend = CountingBackend(with_sequence=with_sequence)
+    backend.set_clipboard("lo que había antes")
+    capture = make_capture(backend)
+
+    assert capture.capture() is None
+    assert backend.copies == CAPTURE_ATTEMPTS
+    assert backend.get_clipboard() == "lo que había antes"
+
+
+def test_capture_async_delivers_result():
+    backend = CountingBackend()
+    backend.selection = "SELECT 1;"
+    done = threading.Event()
+    result = []
+
+    make_capture(backend).capture_async(lambda text: (result.append(text), done.set()))
+    assert done.wait(2)
+    assert result == ["SELECT 1;"]
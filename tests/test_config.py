@@ -0,0 +1,25 @@
+# tests/test_config.py
+
+"""Asignaciones de números (hotkeys) leídas de config.json."""
+
+import json
+
+from core.config import ConfigService
+
+
+def test_empty_slots_are_not_mapped_as_snippet_names(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"hotkeys": {
+        "shift_1": "ventas",
+        "shift_2": "None",
+        "shift_3": "",
+        "shift_4": None,
+        "shift_0": "clientes",
+    }}))
+    config = ConfigService(str(path))
+
+    assert config.hotkey_numbers() == {"ventas": "1", "clientes": "0"}
+
+    # Vaciar un slot desde la UI lo quita del mapa
+    config.set_hotkey("shift_1", "None")
+    assert config.hotkey_numbers() == {"clientes": "0"}
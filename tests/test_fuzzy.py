@@ -0,0 +1,130 @@
+# tests/test_fuzzy.py
+
+"""Puntuación de fuzzy_match y estrechamiento incremental de FuzzySearcher."""
+
+import pytest
+
+from core.fuzzy import FuzzySearcher, fuzzy_match, result_sort_key
+from core.storage import JsonBackend
+from core.store import SnippetStore
+
+LIBRARY = {
+    "SELECT_CUSTOMERS": "SELECT * FROM customers;",
+    "select_orders": "SELECT * FROM orders;",
+    "describe_schema": "DESCRIBE schema_x;",
+    "getCustomerById": "SELECT * FROM customers WHERE id = :id;",
+    "xcustomers_tmp": "SELECT 1;",
+    "ventas_2024": "SELECT * FROM ventas WHERE anio = 2024;",
+    "reporte_diario": "SELECT fecha, total FROM caja;",
+    "limpieza": "DELETE FROM sesiones WHERE vencida = 1;",
+}
+
+
+def score(query, text):
+    match = fuzzy_match(query, text)
+    return None if match is None else match[0]
+
+
+def test_fuzzy_match_positions_and_misses():
+    assert fuzzy_match("selcust", "SELECT_CUSTOMERS") == (score("selcust", "SELECT_CUSTOMERS"),
+                                                         [0, 1, 2, 7, 8, 9, 10])
+    # Sin distinguir mayúsculas, pero en orden
+    assert fuzzy_match("SELCUST", "select_customers") is not None
+    assert fuzzy_match("tsel", "select") is None
+    assert fuzzy_match("xyz", "select") is None
+    assert fuzzy_match("", "select") == (0, [])
+
+
+@pytest.mark.parametrize("query, better, worse", [
+    # Inicio de palabra antes que mitad de palabra
+    ("cust", "select_customers", "xcustomers"),
+    # Tramo consecutivo antes que letras sueltas
+    ("abc", "abc_x", "a_b_c"),
+    # Ventana corta antes que larga
+    ("sc", "sc_tabla", "s_x_x_x_c"),
+    # Cambio camelCase cuenta como inicio de palabra
+    ("gcb", "getCustomerById", "gxcxb"),
+    # Inicio del texto y de palabra, aunque haya hueco
+    ("rd", "reporte_diario", "xrxd"),
+])
+def test_fuzzy_match_scoring_order(query, better, worse):
+    assert score(query, better) > score(query, worse)
+
+
+def make_searcher(tmp_path):
+    store = SnippetStore(backend=JsonBackend(str(tmp_path / "sql_snippets.json")))
+    store.replace_all(dict(LIBRARY))
+    return store, FuzzySearcher(store)
+
+
+def test_search_orders_by_score_then_length_then_name(tmp_path):
+    _, searcher = make_searcher(tmp_path)
+    results = searcher.search("cust")
+    names = [name for name, _, _, _ in results]
+    scores = [score for _, _, score, _ in results]
+
+    assert names[:2] == ["SELECT_CUSTOMERS", "getCustomerById"]
+    assert scores == sorted(scores, reverse=True)
+    assert "select_orders" not in names
+
+    # Coincidencia solo por el código: puntuación 0, sin posiciones
+    assert searcher.search("caja") == [("reporte_diario", LIBRARY["reporte_diario"], 0, [])]
+    assert searcher.search("where vencida") == [("limpieza", LIBRARY["limpieza"], 0, [])]
+
+
+@pytest.mark.parametrize("typed", ["s", "se", "sel", "selc", "selcu", "ventas", "fr", "from c"])
+def test_incremental_narrowing_matches_cold_search(tmp_path, typed):
+    _, searcher = make_searcher(tmp_path)
+    for i in range(1, len(typed) + 1):
+        prefix = typed[:i]
+        narrowed = searcher.search(prefix)
+        assert narrowed == FuzzySearcher(searcher.store).search(prefix), repr(prefix)
+
+
+def test_store_change_invalidates_narrowing(tmp_path):
+    store, searcher = make_searcher(tmp_path)
+    searcher.search("cust")
+
+    # Un snippet nuevo que coincide con "custo" pero no estaba en los
+    # resultados de "cust" (no existía): debe aparecer igual
+    store.put("custom_report", "SELECT 2;")
+    results = searcher.search("custo")
+    assert "custom_report" in [name for name, _, _, _ in results]
+    assert results == FuzzySearcher(store).search("custo")
+
+    # Y uno borrado desaparece aunque estuviera en la lista anterior
+    store.remove("SELECT_CUSTOMERS")
+    results = searcher.search("custom")
+    assert "SELECT_CUSTOMERS" not in [name for name, _, _, _ in results]
+    assert results == FuzzySearcher(store).search("custom")
+
+
+def test_name_matches_rank_before_code_matches_even_with_negative_score(tmp_path):
+    gapped = "a" + "x" * 60 + "b" + "x" * 60 + "c"
+    assert score("abc", gapped) < 0
+    store = SnippetStore(backend=JsonBackend(str(tmp_path / "sql_snippets.json")))
+    store.put(gapped, "SELECT 1;")
+    store.put("solo_codigo", "SELECT 'abc';")
+    searcher = FuzzySearcher(store)
+
+    results = searcher.search("abc")
+    assert [name for name, _, _, _ in results] == [gapped, "solo_codigo"]
+    # El overlay ubica las filas con la misma clave
+    keys = [result_sort_key("abc", name, points, bool(positions))
+            for name, _, points, positions in results]
+    assert keys == sorted(keys)
+
+
+def test_search_reads_a_single_snapshot(tmp_path):
+    store, searcher = make_searcher(tmp_path)
+    real_search = store.search
+
+    def search_then_write(query, snap=None):
+        # Un escritor publica otra versión a mitad de la búsqueda
+        found = real_search(query, snap)
+        store.remove("limpieza")
+        return found
+
+    store.search = search_then_write
+    results = searcher.search("vencida")
+    assert results == [("limpieza", LIBRARY["limpieza"], 0, [])]
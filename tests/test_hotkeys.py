@@ -0,0 +1,246 @@
+# tests/test_hotkeys.py
+
+"""Trie de atajos de ChordDispatcher con scan codes de prueba (sin keyboard)."""
+
+import time
+
+from core.hotkeys import ActionLane, ChordDispatcher, HotkeyRegistry, Invocation, slot_chords
+
+SCANS = {
+    "ctrl": [29], "shift": [42, 54], "alt": [56], "windows": [91],
+    "f12": [88], "s": [31], "x": [45],
+    **{str(n): [2 + (n - 1) % 10] for n in range(10)},
+}
+CTRL, SHIFT, F12 = 29, 42, 88
+
+
+def resolve(name):
+    if name not in SCANS:
+        raise ValueError(name)
+    return SCANS[name]
+
+
+def digit(n):
+    return SCANS[str(n)][0]
+
+
+def make_dispatcher(timeout=0.3):
+    fired = []
+    dispatcher = ChordDispatcher(resolve=resolve, executor=lambda action: action(),
+                                 sequence_timeout=timeout)
+    return dispatcher, fired
+
+
+def tap(dispatcher, scan):
+    consumed = dispatcher.handle(scan, True)
+    dispatcher.handle(scan, False)
+    return consumed
+
+
+def test_selector_key_fires_without_waiting_for_sequences():
+    dispatcher, fired = make_dispatcher()
+    dispatcher.add("f12", lambda: fired.append("selector"))
+    for chord in slot_chords("shift_3"):
+        dispatcher.add(chord, lambda: fired.append("paste 3"))
+
+    # F12 no tiene continuaciones: dispara en el mismo evento
+    dispatcher.handle(F12, True)
+    assert fired == ["selector"]
+    dispatcher.handle(F12, False)
+
+    # La secuencia directa cuelga de Ctrl+F12, con o sin Ctrl apretado
+    dispatcher.handle(CTRL, True)
+    tap(dispatcher, F12)
+    tap(dispatcher, digit(3))
+    dispatcher.handle(CTRL, False)
+    assert fired == ["selector", "paste 3"]
+
+
+def test_timed_action_gets_key_down_instant():
+    dispatcher, fired = make_dispatcher()
+    queued = []
+    dispatcher.executor = queued.append
+    dispatcher.add("f12", fired.append, timed=True)
+
+    dispatcher.handle(F12, True)
+    # La acción corre después (en la cola), pero recibe el instante del "down"
+    assert fired == []
+    (invocation,) = queued
+    invocation()
+    assert fired == [invocation.pressed_at]
+
+
+def test_action_lane_drops_repeats_within_window_and_forgets_old_actions():
+    lane = ActionLane(repeat_window=0.15)
+    ran = []
+    try:
+        # Misma tecla dos veces seguidas: la segunda cae dentro de la ventana
+        assert lane.submit(Invocation(lambda: ran.append(1), "shift+1", 0.0, False))
+        assert lane.join(2)
+        assert not lane.submit(Invocation(lambda: ran.append(2), "shift+1", 0.0, False))
+        # Otro atajo no se ve afectado
+        assert lane.submit(Invocation(lambda: ran.append(3), "shift+2", 0.0, False))
+        assert lane.join(2)
+        time.sleep(0.2)
+        assert lane.submit(Invocation(lambda: ran.append(4), "shift+1", 0.0, False))
+        assert lane.join(2)
+        assert ran == [1, 3, 4]
+
+        # Funciones nuevas en cada rebind no se acumulan
+        for i in range(50):
+            lane.submit(lambda: None)
+            lane.join(2)
+        time.sleep(0.2)
+        lane.submit(lambda: None)
+        lane.join(2)
+        assert len(lane._last_started) == 1
+    finally:
+        lane.stop()
+
+
+def test_modifiers_are_masked():
+    dispatcher, fired = make_dispatcher()
+    dispatcher.add("f12", lambda: fired.append("f12"))
+    dispatcher.add("ctrl+shift+s", lambda: fired.append("save"))
+
+    # Ctrl+F12 no es F12
+    dispatcher.handle(CTRL, True)
+    tap(dispatcher, F12)
+    dispatcher.handle(CTRL, False)
+    assert fired == []
+
+    # Ctrl+S no es Ctrl+Shift+S; con ambos modificadores sí
+    dispatcher.handle(CTRL, True)
+    tap(dispatcher, SCANS["s"][0])
+    dispatcher.handle(SHIFT, True)
+    tap(dispatcher, SCANS["s"][0])
+    dispatcher.handle(SHIFT, False)
+    dispatcher.handle(CTRL, False)
+    assert fired == ["save"]
+
+
+def test_only_sequences_and_explicit_chords_are_suppressed():
+    dispatcher, fired = make_dispatcher()
+    dispatcher.add("f12", lambda: fired.append("selector"))
+    dispatcher.add("shift+3", lambda: fired.append("paste 3"))
+    dispatcher.add("ctrl+f12, 3", lambda: fired.append("paste 3"))
+    dispatcher.add("ctrl+shift+s", lambda: fired.append("save"), suppress=True)
+
+    # El hook global no suprime nada: solo estos atajos se tragan la tecla
+    assert dispatcher.suppressed() == ["ctrl+f12, 3", "ctrl+shift+s"]
+
+    dispatcher.remove("ctrl+f12, 3")
+    assert dispatcher.suppressed() == ["ctrl+shift+s"]
+    dispatcher.clear()
+    assert dispatcher.suppressed() == []
+
+
+def test_auto_repeat_fires_once_per_press():
+    dispatcher, fired = make_dispatcher()
+    dispatcher.add("f12", lambda: fired.append("f12"), suppress=True)
+
+    assert dispatcher.handle(F12, True)
+    # El sistema repite el "down" mientras la tecla sigue apretada
+    for _ in range(5):
+        assert dispatcher.handle(F12, True)
+    assert dispatcher.handle(F12, False)
+    assert fired == ["f12"]
+
+    tap(dispatcher, F12)
+    assert fired == ["f12", "f12"]
+
+
+def test_sequence_completes_and_times_out_to_prefix_action():
+    dispatcher, fired = make_dispatcher(timeout=0.05)
+    dispatcher.add("x", lambda: fired.append("x"))
+    dispatcher.add("x, 3", lambda: fired.append("x 3"))
+
+    # Secuencia completa: solo la acción larga, la tecla final se suprime
+    tap(dispatcher, SCANS["x"][0])
+    assert tap(dispatcher, digit(3))
+    assert fired == ["x 3"]
+
+    # Sin continuación: al vencer el tiempo corre la acción del prefijo
+    tap(dispatcher, SCANS["x"][0])
+    assert fired == ["x 3"]
+    time.sleep(0.15)
+    assert fired == ["x 3", "x"]
+
+    # Una continuación tardía ya no completa la secuencia
+    tap(dispatcher, digit(3))
+    assert fired == ["x 3", "x"]
+
+
+def test_non_continuing_key_flushes_pending_prefix():
+    dispatcher, fired = make_dispatcher(timeout=5)
+    dispatcher.add("x", lambda: fired.append("x"))
+    dispatcher.add("x, 3", lambda: fired.append("x 3"))
+    dispatcher.add("s", lambda: fired.append("s"))
+
+    tap(dispatcher, SCANS["x"][0])
+    # "4" no continúa la secuencia: corre "x" sin esperar y 4 pasa
+    assert not tap(dispatcher, digit(4))
+    assert fired == ["x"]
+
+    # Una tecla que es atajo propio corta la secuencia y dispara ambos
+    tap(dispatcher, SCANS["x"][0])
+    tap(dispatcher, SCANS["s"][0])
+    assert fired == ["x", "x", "s"]
+
+
+def test_add_and_remove_update_the_trie():
+    dispatcher, fired = make_dispatcher(timeout=5)
+    dispatcher.add("x", lambda: fired.append("x"))
+    dispatcher.add("x, 3", lambda: fired.append("x 3"))
+
+    dispatcher.remove("x, 3")
+    # Sin continuaciones, "x" vuelve a disparar en el acto
+    tap(dispatcher, SCANS["x"][0])
+    assert fired == ["x"]
+
+    # Reemplazar la acción de un atajo existente
+    dispatcher.add("x", lambda: fired.append("x2"))
+    tap(dispatcher, SCANS["x"][0])
+    assert fired == ["x", "x2"]
+
+    dispatcher.remove("x")
+    tap(dispatcher, SCANS["x"][0])
+    assert fired == ["x", "x2"]
+    assert not dispatcher._root.children
+
+
+class FakeConfig:
+    def __init__(self, hotkeys):
+        self.generation = 1
+        self._hotkeys = hotkeys
+
+    def hotkeys(self):
+        return dict(self._hotkeys)
+
+
+def test_registry_rebinds_slot_when_its_snippet_appears_later():
+    dispatcher, fired = make_dispatcher()
+    ids = {"Q1": 1}
+    registry = HotkeyRegistry(dispatcher, lambda sid: (lambda: fired.append(sid)),
+                              resolve=ids.get)
+    config = FakeConfig({"shift_1": "Q1", "shift_2": "Todavía no existe"})
+    registry.sync(config)
+    assert registry.bound() == {"shift_1": 1}
+
+    # Misma generación de config: sync() no hace nada...
+    ids["Todavía no existe"] = 7
+    assert registry.sync(config) == 0
+    # ...pero una recarga de la colección sí vuelve a resolver
+    assert registry.resync(config) == 1
+    assert registry.bound() == {"shift_1": 1, "shift_2": 7}
+
+    dispatcher.handle(SHIFT, True)
+    tap(dispatcher, digit(2))
+    dispatcher.handle(SHIFT, False)
+    assert fired == [7]
+
+    # Recarga externa que cambia ids y borra un snippet
+    ids["Q1"] = 3
+    del ids["Todavía no existe"]
+    assert registry.resync(config) == 2
+    assert registry.bound() == {"shift_1": 3}
@@ -0,0 +1,77 @@
+# tests/test_import_time.py
+
+"""
+Presupuesto de importación de main.py en frío (python -X importtime).
+
+Con --service/--auto Klip arranca con cada inicio de sesión: importar
+main no debe cargar supabase, pyautogui, cryptography ni keyboard, que
+se cargan al primer uso. Si se pasa del presupuesto, el mensaje lista
+los módulos que más pesan.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importación acumulada de main (ms), con holgura para máquinas lentas
+MAIN_IMPORT_BUDGET_MS = 1500
+# Paquetes que no deben cargarse al importar main
+LAZY_PACKAGES = (
+    "supabase", "httpx", "gotrue", "postgrest", "realtime",
+    "pyautogui", "pyperclip", "keyboard", "cryptography", "security",
+)
+# Módulos propios que se cargan recién al abrir un diálogo
+LAZY_MODULES = ("ui.dialogs",)
+REPORT_TOP = 10
+
+
+def _import_profile(cwd: str) -> Dict[str, Tuple[int, int]]:
+    """módulo -> (µs propios, µs acumulados) al importar main en un proceso nuevo."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        profile[module.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def _report(profile: Dict[str, Tuple[int, int]]) -> str:
+    heaviest = sorted(profile.items(), key=lambda item: item[1][0], reverse=True)[:REPORT_TOP]
+    return "\n".join(f"  {us / 1000:8.1f} ms  {module}" for module, (us, _) in heaviest)
+
+
+def test_main_import_stays_within_budget(tmp_path):
+    (tmp_path / "sql_snippets.json").write_text(json.dumps({"Q1": "SELECT 1;"}), encoding="utf-8")
+    (tmp_path / "config.json").write_text(json.dumps({"hotkeys": {}}), encoding="utf-8")
+
+    profile = _import_profile(str(tmp_path))
+    report = _report(profile)
+    print(f"\nMódulos que más pesan al importar main:\n{report}")
+
+    eager = sorted(
+        module for module in profile
+        if module.split(".")[0] in LAZY_PACKAGES or module in LAZY_MODULES
+    )
+    assert not eager, f"main.py importa al arrancar: {', '.join(eager)}"
+
+    total_ms = profile["main"][1] / 1000
+    assert total_ms <= MAIN_IMPORT_BUDGET_MS, (
+        f"importar main tardó {total_ms:.0f} ms (presupuesto {MAIN_IMPORT_BUDGET_MS} ms):\n{report}"
+    )
@@ -0,0 +1,98 @@
+# tests/test_paste.py
+
+"""PasteEngine contra FakePasteBackend (sin portapapeles ni teclado reales)."""
+
+import threading
+import time
+
+import pytest
+
+from core.paste import FakePasteBackend, PasteEngine, PasteError
+
+
+def make_engine(backend, confirm_timeout_ms=500, post_paste_ms=0):
+    timing = {"confirm_timeout_ms": confirm_timeout_ms, "poll_interval_ms": 1,
+              "post_paste_ms": post_paste_ms}
+    return PasteEngine(backend=backend, timing=timing)
+
+
+@pytest.mark.parametrize("with_sequence", [True, False])
+def test_confirmed_paste_sends_exactly_one_ctrl_v(with_sequence):
+    backend = FakePasteBackend(propagation_delay=0.02, with_sequence=with_sequence)
+    engine = make_engine(backend)
+
+    engine.paste("SELECT 1;")
+
+    # Se esperó a que el portapapeles mostrara el texto nuevo
+    assert backend.pasted == ["SELECT 1;"]
+    assert engine.last_latency_ms >= 20
+
+
+@pytest.mark.parametrize("with_sequence", [True, False])
+def test_confirmation_timeout_raises_without_pasting(with_sequence):
+    backend = FakePasteBackend(propagation_delay=5, with_sequence=with_sequence)
+    engine = make_engine(backend, confirm_timeout_ms=30)
+
+    with pytest.raises(PasteError):
+        engine.paste("SELECT 1;")
+    # Nunca se pega el contenido anterior del portapapeles
+    assert backend.pasted == []
+
+
+def test_concurrent_pastes_are_serialized():
+    backend = FakePasteBackend(propagation_delay=0.01)
+    engine = make_engine(backend)
+    texts = [f"SELECT {i};" for i in range(8)]
+    errors = []
+
+    def paste(text):
+        try:
+            engine.paste(text)
+        except PasteError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=paste, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Cada Ctrl+V pegó su propio texto, ninguno el de otro hilo
+    assert errors == []
+    assert sorted(backend.pasted) == sorted(texts)
+
+
+def test_post_paste_delay_holds_back_the_next_paste():
+    backend = FakePasteBackend()
+    engine = make_engine(backend, post_paste_ms=80)
+
+    engine.paste("uno")
+    started = time.perf_counter()
+    engine.paste("dos")
+    elapsed = time.perf_counter() - started
+
+    assert backend.pasted == ["uno", "dos"]
+    assert elapsed >= 0.07
+    # La espera previa no cuenta como latencia del pegado
+    assert engine.last_latency_ms < 80
+
+
+def test_wait_for_foreground_returns_once_target_is_back():
+    from core.win_input import wait_for_foreground
+
+    # La ventana destino vuelve a primer plano en la tercera consulta
+    seen = iter([111, 111, 42])
+    assert wait_for_foreground(42, timeout=1.0, poll=0,
+                               current=lambda: next(seen), alive=lambda hwnd: True)
+
+
+def test_wait_for_foreground_is_bounded():
+    from core.win_input import wait_for_foreground
+
+    start = time.perf_counter()
+    assert not wait_for_foreground(42, timeout=0.05, poll=0.001,
+                                   current=lambda: 111, alive=lambda hwnd: True)
+    assert time.perf_counter() - start < 0.5
+    # Si la ventana se cerró no se espera nada
+    assert not wait_for_foreground(42, timeout=5.0,
+                                   current=lambda: 111, alive=lambda hwnd: False)
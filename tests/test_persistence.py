@@ -0,0 +1,111 @@
+# tests/test_persistence.py
+
+"""Escritura atómica y escritura diferida agrupada (WriteBehindFile)."""
+
+import os
+import time
+
+import pytest
+
+from core import persistence
+from core.persistence import WriteBehindFile, atomic_write_text
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_atomic_write_replaces_content_without_leftovers(tmp_path):
+    path = tmp_path / "sql_snippets.json"
+    path.write_text("viejo", encoding="utf-8")
+
+    atomic_write_text(str(path), '{"Q1": "SELECT ñ;"}')
+
+    assert path.read_text(encoding="utf-8") == '{"Q1": "SELECT ñ;"}'
+    assert os.listdir(tmp_path) == ["sql_snippets.json"]
+
+
+def test_atomic_write_failure_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "sql_snippets.json"
+    path.write_text("viejo", encoding="utf-8")
+
+    def broken_replace(src, dst):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(persistence.os, "replace", broken_replace)
+    with pytest.raises(OSError):
+        atomic_write_text(str(path), "nuevo")
+
+    # Ni archivo a medias ni temporales huérfanos
+    assert path.read_text(encoding="utf-8") == "viejo"
+    assert os.listdir(tmp_path) == ["sql_snippets.json"]
+
+
+def test_burst_of_changes_costs_one_write(tmp_path):
+    state = {"value": 0}
+    renders = []
+
+    def render():
+        renders.append(state["value"])
+        return str(state["value"])
+
+    path = tmp_path / "config.json"
+    writer = WriteBehindFile(str(path), render, delay=0.05, max_delay=2)
+    for value in range(1, 101):
+        state["value"] = value
+        writer.schedule()
+
+    assert writer.pending
+    assert wait_until(lambda: not writer.pending)
+    assert writer.scheduled == 100
+    assert writer.writes == 1
+    assert renders == [100]
+    assert path.read_text(encoding="utf-8") == "100"
+    assert writer.owns(persistence.file_signature(str(path)))
+
+
+def test_steady_changes_are_written_within_max_delay(tmp_path):
+    path = tmp_path / "config.json"
+    writer = WriteBehindFile(str(path), lambda: "x", delay=0.05, max_delay=0.2)
+
+    started = time.perf_counter()
+    # Cambios cada 10 ms: la calma de 50 ms nunca llega
+    while writer.writes == 0 and time.perf_counter() - started < 2:
+        writer.schedule()
+        time.sleep(0.01)
+
+    assert writer.writes == 1
+    assert time.perf_counter() - started < 0.5
+
+
+def test_failing_write_backs_off_and_reports_once(tmp_path, capsys):
+    missing = tmp_path / "todavia_no_existe"
+    path = missing / "config.json"
+    attempts = []
+
+    def render():
+        attempts.append(time.perf_counter())
+        return "x"
+
+    writer = WriteBehindFile(str(path), render, delay=0.01, max_delay=0.05,
+                             retry_delay=0.05, max_retry_delay=0.2)
+    writer.schedule()
+    time.sleep(0.6)
+    # Con 50 ms fijos serían ~12 intentos; con espera creciente, pocos
+    assert 2 <= len(attempts) <= 6
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert gaps[-1] > gaps[0] * 1.5
+    assert writer.pending
+    assert isinstance(writer.last_error, OSError)
+    assert capsys.readouterr().out.count("No se pudo guardar") == 1
+
+    # Cuando el problema se resuelve, el cambio pendiente llega al disco
+    missing.mkdir()
+    assert wait_until(lambda: not writer.pending)
+    assert path.read_text(encoding="utf-8") == "x"
+    assert writer.last_error is None
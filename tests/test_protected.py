@@ -0,0 +1,135 @@
+# tests/test_protected.py
+
+"""Snippets protegidos: cifrado de sobre, búsqueda por nombre y caché acotada."""
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from core.protected import PROTECTED_PREFIX, SnippetVault, is_protected
+from core.storage import JsonBackend, SqliteBackend
+from core.store import SnippetStore
+
+
+def make_vault(settings, cache_size=2):
+    return SnippetVault(
+        lambda: settings.get("salt"), lambda value: settings.update(salt=value),
+        lambda: settings.get("verifier"), lambda value: settings.update(verifier=value),
+        cache_size=cache_size,
+    )
+
+
+@pytest.fixture
+def vault():
+    vault = make_vault({})
+    yield vault
+    vault.lock()
+
+
+def test_protect_requires_unlock_and_round_trips(vault):
+    with pytest.raises(ValueError):
+        vault.protect("SELECT 1")
+    assert vault.unlock("secret")
+
+    record = vault.protect("SELECT password FROM users")
+    assert is_protected(record)
+    assert "password" not in record
+    # Cada registro lleva su propia clave de datos
+    assert vault.protect("SELECT password FROM users") != record
+
+    vault.lock()
+    assert vault.reveal(record) is None
+    assert not vault.unlock("wrong", [record])
+    assert vault.unlock("secret", [record])
+    assert vault.reveal(record) == "SELECT password FROM users"
+    assert vault.reveal("SELECT 1") == "SELECT 1"
+
+
+def test_plaintext_cache_is_bounded(vault):
+    vault.unlock("secret")
+    records = [vault.protect(f"SELECT {i}") for i in range(5)]
+    vault.lock()
+    vault.unlock("secret", records)
+    vault.decryptions = 0
+    for record in records:
+        assert vault.reveal(record) is not None
+    assert vault.decryptions == 5
+    assert len(vault._plaintext) == 2
+    # Los dos más recientes salen de la caché
+    vault.reveal(records[-1])
+    vault.reveal(records[-2])
+    assert vault.decryptions == 5
+
+
+def test_protected_body_is_not_searchable(vault, tmp_path):
+    vault.unlock("secret")
+    store = SnippetStore(backend=JsonBackend(str(tmp_path / "sql_snippets.json")))
+    store.put("DB_PASSWORD", vault.protect("hunter2"))
+    store.put("PLAIN", "SELECT hunter2")
+
+    assert [name for name, _ in store.search("hunter2")] == ["PLAIN"]
+    assert [name for name, _ in store.search("db_pass")] == ["DB_PASSWORD"]
+    assert "hunter2" not in store.preview("DB_PASSWORD")
+
+
+def test_wrong_password_is_rejected_once_something_is_protected():
+    settings = {}
+    vault = make_vault(settings)
+    try:
+        # Desbloquear sin nada protegido no guarda sal ni verificador
+        assert vault.unlock("secret")
+        assert settings == {}
+        # El primer protect() los guarda: esa contraseña queda fijada
+        vault.protect("SELECT 1")
+        assert settings["salt"] and settings["verifier"]
+        vault.lock()
+
+        assert not vault.unlock("wrong")
+        assert not vault.is_unlocked()
+        # Otra instancia (otro arranque) comprueba contra el mismo verificador
+        assert not make_vault(settings).unlock("wrong")
+        assert make_vault(settings).unlock("secret")
+    finally:
+        vault.lock()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_protection_is_an_explicit_flag_not_the_prefix(vault, tmp_path, backend):
+    vault.unlock("secret")
+    if backend == "json":
+        make_backend = lambda: JsonBackend(str(tmp_path / "sql_snippets.json"), write_behind=False)
+    else:
+        make_backend = lambda: SqliteBackend(str(tmp_path / "sql_snippets.db"))
+    store = SnippetStore(backend=make_backend())
+    # Un snippet en claro que casualmente empieza con el prefijo
+    lookalike = f"{PROTECTED_PREFIX}esto es texto en claro"
+    store.put("LOOKALIKE", lookalike)
+    store.put("SECRET", vault.protect("SELECT token FROM api_keys"))
+
+    reloaded = make_backend().load()
+    assert not is_protected(reloaded["LOOKALIKE"])
+    assert is_protected(reloaded["SECRET"])
+
+    store = SnippetStore(backend=make_backend())
+    assert [name for name, _ in store.search("texto en claro")] == ["LOOKALIKE"]
+    assert "texto en claro" in store.preview("LOOKALIKE")
+    assert vault.reveal(store.get("LOOKALIKE")) == lookalike
+    assert vault.reveal(store.get("SECRET")) == "SELECT token FROM api_keys"
+
+
+def test_failed_unlock_keeps_the_open_session():
+    from security import get_unlock_session
+
+    vault = make_vault({})
+    try:
+        assert vault.unlock("secret")
+        record = vault.protect("SELECT token FROM api_keys")
+        keys = len(get_unlock_session()._keys)
+
+        # Un intento equivocado no bloquea lo ya abierto ni queda en caché
+        assert not vault.unlock("wrong", [record])
+        assert vault.is_unlocked()
+        assert vault.reveal(record) == "SELECT token FROM api_keys"
+        assert len(get_unlock_session()._keys) == keys
+    finally:
+        vault.lock()
@@ -0,0 +1,132 @@
+# tests/test_search.py
+
+"""
+El índice de trigramas de SnippetStore.search devuelve exactamente lo
+mismo que recorrer toda la biblioteca con `in`.
+"""
+
+import random
+import threading
+
+from core.storage import JsonBackend
+from core.store import SnippetStore
+from core.trigram import TrigramIndex
+
+LIBRARY = {
+    "Q1": "SELECT 1;",
+    "a": "",
+    "b": "x",
+    "ab": "cd",
+    "ÑANDÚ_Ventas": "SELECT año, SUM(total) FROM ventas_ñ GROUP BY año;",
+    "Straße": "SELECT * FROM STRASSE WHERE calle = 'Groß';",
+    "ΣΟΦΙΑ": "select 'σοφια', 'ΣΟΦΊΑ' from dual",
+    "İstanbul": "SELECT 'İ' AS dotted;",
+    "emoji_😀": "SELECT '😀🎉' AS fiesta;",
+    "clientes_activos": "SELECT * FROM clientes WHERE activo = 1;",
+    "Clientes_Inactivos": "select * from clientes where activo = 0",
+    "pedidos": "SELECT id FROM pedidos\r\nWHERE estado = 'ok';",
+}
+
+
+def brute_force(snippets, query):
+    q = query.lower()
+    ordered = sorted(snippets.items(), key=lambda x: x[0].lower())
+    return [(name, code) for name, code in ordered
+            if q in name.lower() or q in code.lower()]
+
+
+def queries_for(snippets, rng, extra=()):
+    """Consultas de 1-2 caracteres, subcadenas reales, variantes de mayúsculas y fallos."""
+    texts = [text for item in snippets.items() for text in item if text]
+    queries = {"", "zz", "q", "Ñ", "ñ", "ss", "SS", "ß", "σ", "ς", "i̇", "😀", "\r\n", "1;", " "}
+    queries.update(extra)
+    for text in texts:
+        for _ in range(4):
+            start = rng.randrange(len(text))
+            size = rng.choice((1, 2, 3, 4, 6, 12))
+            piece = text[start:start + size]
+            queries.update((piece, piece.upper(), piece.swapcase(), piece.casefold()))
+    return sorted(queries)
+
+
+def assert_equivalent(store, rng):
+    store.warm_index()
+    assert store.current().index is not None
+    snippets = store.snapshot()
+    for query in queries_for(snippets, rng):
+        assert store.search(query) == brute_force(snippets, query), repr(query)
+
+
+def test_index_matches_brute_force(tmp_path):
+    rng = random.Random(7)
+    store = SnippetStore(backend=JsonBackend(str(tmp_path / "sql_snippets.json")))
+    store.replace_all(dict(LIBRARY))
+    assert_equivalent(store, rng)
+
+    # Cambios incrementales sobre el índice ya construido
+    store.rename("clientes_activos", "CLIENTES_VIP", "SELECT * FROM vip;")
+    store.remove("ΣΟΦΙΑ")
+    store.remove("a")
+    store.put("nuevo", "WITH x AS (SELECT 'straße') SELECT * FROM x;")
+    store.put("b", "SELECT 'ya no es corto';")
+    assert store.search("clientes_activos") == []
+    assert store.search("σοφ") == []
+    assert_equivalent(store, rng)
+
+
+def test_search_reads_the_snapshot_index_without_the_write_lock(tmp_path):
+    store = SnippetStore(backend=JsonBackend(str(tmp_path / "sql_snippets.json")))
+    store.replace_all(dict(LIBRARY))
+    store.warm_index()
+    before = store.current()
+
+    # Un escritor ocupado (en otro hilo) no frena las búsquedas
+    held, release = threading.Event(), threading.Event()
+    timed_out = []
+
+    def writer():
+        with store._write_lock:
+            held.set()
+            timed_out.append(not release.wait(2))
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert held.wait(5)
+        assert store.search("clientes") == brute_force(LIBRARY, "clientes")
+    finally:
+        release.set()
+        thread.join()
+    assert timed_out == [False]
+
+    # Cada snapshot conserva su propio índice tras una escritura
+    store.remove("clientes_activos")
+    assert before.index is not store.current().index
+    assert store.search("clientes", before) == brute_force(LIBRARY, "clientes")
+    assert store.search("clientes") == brute_force(store.snapshot(), "clientes")
+
+
+def test_index_with_many_slots_and_free_slots_matches_brute_force():
+    rng = random.Random(11)
+    words = ["select", "from", "where", "clientes", "ventas", "ñandú", "straße", "ID", "x"]
+    docs = {}
+    for i in range(600):
+        name = f"{rng.choice(words)}_{i}"
+        docs[name] = " ".join(rng.choice(words) for _ in range(rng.randrange(0, 8)))
+    slots = {name: slot for slot, name in enumerate(docs)}
+
+    index = TrigramIndex()
+    index.build((slots[name], name, code) for name, code in docs.items())
+    # Quitar y volver a agregar deja huecos y reindexa en su lugar
+    for name in list(docs)[::3]:
+        index.remove(slots[name])
+        del docs[name]
+    for name in list(docs)[::5]:
+        docs[name] = docs[name].upper() + " ß"
+        index.add(slots[name], name, docs[name])
+
+    for query in queries_for(docs, rng, extra=words):
+        q = query.lower()
+        expected = sorted(slots[name] for name, code in docs.items()
+                          if q in name.lower() or q in code.lower())
+        assert index.search(query) == expected, repr(query)
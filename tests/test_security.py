@@ -0,0 +1,183 @@
+# tests/test_security.py
+
+"""Chequeos de seguridad en segundo plano y caché del id de máquina."""
+
+import json
+
+import pytest
+
+security = pytest.importorskip("security", exc_type=ImportError)
+
+
+@pytest.fixture(autouse=True)
+def fresh_machine_id(monkeypatch):
+    monkeypatch.setattr(security, "_machine_id", None)
+
+
+def test_machine_id_is_cached_per_install(tmp_path, monkeypatch):
+    cache = str(tmp_path / "machine_id.json")
+    calls = []
+    monkeypatch.setattr(security, "_query_machine_id", lambda: calls.append(1) or "MACHINE-1")
+
+    assert security.get_machine_id(cache) == "MACHINE-1"
+    monkeypatch.setattr(security, "_machine_id", None)
+    assert security.get_machine_id(cache) == "MACHINE-1"
+    assert len(calls) == 1
+
+    # Otra instalación (u otro host) no reutiliza el id guardado
+    with open(cache, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+    stored["key"] = "other-install"
+    with open(cache, "w", encoding="utf-8") as f:
+        json.dump(stored, f)
+    monkeypatch.setattr(security, "_machine_id", None)
+    security.get_machine_id(cache)
+    assert len(calls) == 2
+
+
+def test_checks_report_to_status_without_exiting(monkeypatch):
+    monkeypatch.setattr(security, "get_machine_id", lambda: "MACHINE-1")
+    monkeypatch.setattr(security, "detect_debugger", lambda: True)
+    monkeypatch.setattr(security, "verify_environment", lambda: pytest.fail("no debe seguir"))
+
+    status = security.SecurityStatus()
+    security.run_security_checks(status)
+
+    assert status.done
+    assert status.machine_id == "MACHINE-1"
+    assert status.debugger_detected is True
+    assert status.violation == "Debugger detected"
+
+
+def test_unlock_session_derives_once_and_wipes_on_lock():
+    manager = security.SecurityManager(machine_id="MACHINE-1")
+    tokens = manager.encrypt_many([f"SELECT {i};" for i in range(20)], "secret")
+
+    assert manager.decrypt_many(tokens, "secret") == [f"SELECT {i};" for i in range(20)]
+    assert manager.session.derivations == 1
+    # Compatible con el formato de antes (un token por llamada)
+    assert manager.decrypt_data(manager.encrypt_data("x", "secret"), "secret") == "x"
+    assert manager.session.derivations == 1
+
+    raw_key = next(iter(manager.session._keys.values()))[0]
+    manager.lock()
+    assert not manager.session.is_unlocked()
+    assert set(raw_key) == {0}
+    assert manager.decrypt_data(tokens[0], "wrong") is None
+
+
+def test_unlock_session_only_caches_remembered_keys():
+    session = security.UnlockSession(idle_timeout=60, clock=lambda: 0.0)
+    salt = b"salt-salt-salt-1"
+
+    # Las contraseñas equivocadas se derivan, se descartan y no quedan en la sesión
+    for guess in ("wrong-1", "wrong-2", "wrong-3"):
+        key = session.derive(guess, salt)
+        key.wipe()
+        assert set(key.raw) == {0}
+    assert not session.is_unlocked()
+    assert session.cached(salt) is None
+
+    key = session.derive("secret", salt)
+    session.remember(key)
+    assert session.cached(salt) is key.fernet
+    # Volver a derivar un par ya desbloqueado no corre el KDF ni borra la clave
+    again = session.derive("secret", salt)
+    again.wipe()
+    assert session.derivations == 4
+    assert session.cached(salt) is key.fernet
+    assert set(key.raw) != {0}
+    session.lock()
+
+
+def test_unlock_session_caps_cached_keys():
+    session = security.UnlockSession(idle_timeout=60, clock=lambda: 0.0, max_keys=2)
+    salt = b"salt-salt-salt-1"
+    session.fernet("guess-1", salt)
+    oldest = next(iter(session._keys.values()))[0]
+    session.fernet("guess-2", salt)
+    session.fernet("guess-3", salt)
+
+    assert len(session._keys) == 2
+    assert set(oldest) == {0}
+    session.lock()
+
+
+def test_unlock_session_expires_when_idle():
+    now = [0.0]
+    session = security.UnlockSession(idle_timeout=60, clock=lambda: now[0])
+    session.fernet("secret", b"salt-salt-salt-1")
+    now[0] = 59
+    assert session.is_unlocked()
+    now[0] = 200
+    assert not session.is_unlocked()
+    session.lock()
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    """Par Ed25519 de prueba: la app verifica con su clave pública."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    key = Ed25519PrivateKey.generate()
+    public = key.public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    monkeypatch.setattr(security, "MANIFEST_PUBLIC_KEY", public)
+    return key
+
+
+def test_manifest_detects_tampering_and_caches_success(tmp_path, monkeypatch, signing_key):
+    exe = tmp_path / "Klip.exe"
+    exe.write_bytes(b"MZ" + bytes(range(256)) * 5000)
+    cache = str(tmp_path / "integrity_cache.json")
+    monkeypatch.setattr(security, "HASH_CHUNK_SIZE", 4096)
+
+    # Sin manifiesto (build de desarrollo) se acepta
+    assert security.read_manifest(str(exe)) is None
+    assert security.verify_file_integrity(str(exe), cache)
+
+    security.append_manifest(str(exe), signing_key)
+    assert security.verify_file_integrity(str(exe), cache)
+
+    # Sin cambios en (path, tamaño, mtime, inodo) no se vuelve a leer el archivo
+    with monkeypatch.context() as m:
+        m.setattr(security, "hash_file", lambda *args: pytest.fail("no debe rehashear"))
+        assert security.verify_file_integrity(str(exe), cache)
+
+    data = bytearray(exe.read_bytes())
+    data[100] ^= 0xFF
+    exe.write_bytes(bytes(data))
+    assert not security.verify_file_integrity(str(exe), cache)
+
+
+def test_manifest_signed_with_another_key_is_rejected(tmp_path, signing_key):
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    exe = tmp_path / "Klip.exe"
+    exe.write_bytes(b"MZ" + bytes(1000))
+    cache = str(tmp_path / "integrity_cache.json")
+    # Quien no tiene la clave privada no puede firmar un manifiesto válido
+    security.append_manifest(str(exe), Ed25519PrivateKey.generate())
+
+    with pytest.raises(ValueError):
+        security.read_manifest(str(exe))
+    assert not security.verify_file_integrity(str(exe), cache)
+
+
+def test_integrity_cache_is_tied_to_the_verified_signature(tmp_path, monkeypatch, signing_key):
+    exe = tmp_path / "Klip.exe"
+    exe.write_bytes(b"MZ" + bytes(1000))
+    cache = tmp_path / "integrity_cache.json"
+    security.append_manifest(str(exe), signing_key)
+    assert security.verify_file_integrity(str(exe), str(cache))
+
+    # Una entrada escrita a mano con otra firma no evita el rehash
+    entry = json.loads(cache.read_text())
+    entry["signature"] = "00" * 64
+    cache.write_text(json.dumps(entry))
+    hashed = []
+    real_hash = security.hash_file
+    monkeypatch.setattr(security, "hash_file", lambda *args: hashed.append(1) or real_hash(*args))
+    assert security.verify_file_integrity(str(exe), str(cache))
+    assert hashed
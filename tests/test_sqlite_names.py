@@ -0,0 +1,90 @@
+# tests/test_sqlite_names.py
+
+"""
+Nombres que difieren solo en mayúsculas con el backend SQLite: el índice
+único es NOCASE, así que "q1" nunca puede pisar en silencio a "Q1".
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core.storage import JsonBackend, SqliteBackend
+from core.store import SnippetStore
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_backend_put_rejects_nocase_conflict(tmp_path):
+    path = str(tmp_path / "sql_snippets.db")
+    store = SnippetStore(backend=SqliteBackend(path))
+    store.put("Q1", "select 1")
+
+    with pytest.raises(ValueError):
+        store.put("q1", "select 2")
+    # El snapshot publicado no cambió
+    assert store.snapshot() == {"Q1": "select 1"}
+
+    # Actualizar el mismo nombre sigue funcionando
+    store.put("Q1", "select 3")
+    store.backend.close()
+    assert SqliteBackend(path).load() == {"Q1": "select 3"}
+
+
+def test_manager_rejects_case_insensitive_duplicates(tmp_path):
+    (tmp_path / "config.json").write_text(json.dumps({"storage": "sqlite", "hotkeys": {}}))
+    script = (
+        "from core import manager\n"
+        "manager.MAX_SNIPPETS_FREE = 100\n"
+        "manager.add_snippet('Q1', 'select 1')\n"
+        "manager.add_snippet('OTHER', 'select 9')\n"
+        "for action in (lambda: manager.add_snippet('q1', 'select 2'),\n"
+        "               lambda: manager.update_snippet('OTHER', 'q1', 'select 9')):\n"
+        "    try:\n"
+        "        action()\n"
+        "    except ValueError:\n"
+        "        pass\n"
+        "    else:\n"
+        "        raise SystemExit('duplicate accepted')\n"
+        "# Cambiar solo las mayúsculas del propio nombre está permitido\n"
+        "manager.update_snippet('OTHER', 'Other', 'select 9')\n"
+        "manager.flush_pending_writes()\n"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+    # Tras "reiniciar", la base conserva ambos snippets
+    assert SqliteBackend(str(tmp_path / "sql_snippets.db")).load() == {
+        "Q1": "select 1", "Other": "select 9",
+    }
+
+
+def test_backend_replace_all_rejects_nocase_duplicates(tmp_path):
+    path = str(tmp_path / "sql_snippets.db")
+    store = SnippetStore(backend=SqliteBackend(path))
+    store.put("Q1", "select 1")
+
+    with pytest.raises(ValueError):
+        store.replace_all({"Foo": "select 2", "foo": "select 3"})
+    # No se escribió nada: ni la base ni el snapshot cambiaron
+    assert store.snapshot() == {"Q1": "select 1"}
+    store.backend.close()
+    assert SqliteBackend(path).load() == {"Q1": "select 1"}
+
+
+def test_json_library_with_case_duplicates_loads_and_warns_once(tmp_path, capsys):
+    path = tmp_path / "sql_snippets.json"
+    path.write_text(json.dumps({"Foo": "select 1", "foo": "select 2", "bar": "select 3"}))
+    backend = JsonBackend(str(path))
+
+    assert backend.load() == {"Foo": "select 1", "foo": "select 2", "bar": "select 3"}
+    backend.load()
+    out = capsys.readouterr().out
+    assert out.count("difieren solo en mayúsculas") == 1
+    assert "'Foo', 'foo'" in out
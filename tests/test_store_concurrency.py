@@ -0,0 +1,123 @@
+# tests/test_store_concurrency.py
+
+"""
+Prueba de estrés del store copy-on-write: muchas lecturas de hotkeys
+concurrentes con escrituras del overlay, sin actualizaciones perdidas,
+sin lecturas incoherentes y sin lecturas bloqueadas.
+"""
+
+import threading
+import time
+
+from core.storage import JsonBackend
+from core.store import SnippetStore
+
+WRITERS = 4
+WRITES_PER_WRITER = 250
+READERS = 4
+READS_PER_READER = 5000
+# Una lectura nunca espera a un escritor: solo puede tardar lo que tarde
+# el planificador en devolverle el GIL
+MAX_READ_SECONDS = 0.25
+
+
+def _code_for(name: str, revision: int) -> str:
+    return f"SELECT '{name}' AS name, {revision} AS revision"
+
+
+def test_concurrent_reads_and_writes(tmp_path):
+    path = str(tmp_path / "sql_snippets.json")
+    store = SnippetStore(backend=JsonBackend(path))
+    # Snippets que leen las "hotkeys" mientras los escritores trabajan
+    hot = [f"hot_{i}" for i in range(10)]
+    for name in hot:
+        store.put(name, _code_for(name, 0))
+    hot_ids = [store.snippet_id(name) for name in hot]
+
+    start = threading.Barrier(WRITERS + READERS)
+    errors = []
+    read_times = []
+
+    def writer(w):
+        start.wait()
+        try:
+            for i in range(WRITES_PER_WRITER):
+                name = f"w{w}_{i}"
+                store.put(name, _code_for(name, 1))
+                if i % 5 == 0:
+                    # Edición y renombre, como desde el overlay
+                    store.rename(name, name + "_r", _code_for(name + "_r", 2))
+                if i % 7 == 0:
+                    target = hot[(w + i) % len(hot)]
+                    store.put(target, _code_for(target, i))
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errors.append(e)
+
+    def reader(r):
+        start.wait()
+        worst = 0.0
+        try:
+            for i in range(READS_PER_READER):
+                snippet_id = hot_ids[(r + i) % len(hot_ids)]
+                t0 = time.perf_counter()
+                found = store.by_id(snippet_id)
+                elapsed = time.perf_counter() - t0
+                worst = max(worst, elapsed)
+                assert found is not None
+                name, code = found
+                # Nombre y código siempre del mismo snapshot
+                assert code.startswith(f"SELECT '{name}' AS name")
+                looked = store.lookup(name.upper())
+                assert looked is not None and looked[0] == name
+        except Exception as e:
+            errors.append(e)
+        read_times.append(worst)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(WRITERS)]
+    threads += [threading.Thread(target=reader, args=(r,)) for r in range(READERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+
+    assert not errors, errors
+    assert max(read_times) < MAX_READ_SECONDS
+
+    # Ninguna escritura perdida: cada escritor dejó todos sus snippets
+    expected = set(hot)
+    for w in range(WRITERS):
+        for i in range(WRITES_PER_WRITER):
+            expected.add(f"w{w}_{i}_r" if i % 5 == 0 else f"w{w}_{i}")
+    assert set(store.snapshot()) == expected
+
+    # Y lo mismo llega al disco
+    store.flush()
+    assert JsonBackend(path, write_behind=False).load() == store.snapshot()
+
+
+def test_snapshot_is_not_mutated_by_writers(tmp_path):
+    store = SnippetStore(backend=JsonBackend(str(tmp_path / "s.json")))
+    store.put("a", "1")
+    before = store.current()
+    store.put("b", "2")
+    store.rename("a", "c", "3")
+    store.remove("b")
+    assert before.snippets == {"a": "1"}
+    assert before.ids == {"a": before.ids["a"]}
+    assert store.snapshot() == {"c": "3"}
+    # El id sobrevive al renombre
+    assert store.snippet_id("c") == before.ids["a"]
+
+
+def test_failed_write_keeps_published_snapshot(tmp_path):
+    class FailingBackend(JsonBackend):
+        def put(self, snippets, name, code):
+            raise OSError("disco lleno")
+
+    store = SnippetStore(backend=FailingBackend(str(tmp_path / "s.json")))
+    try:
+        store.put("a", "1")
+    except OSError:
+        pass
+    assert store.snapshot() == {}
+    assert store.snippet_id("a") is None
@@ -0,0 +1,74 @@
+# tests/test_typer.py
+
+"""TypingEngine contra FakeTypingBackend (sin teclado real ni hook de Esc)."""
+
+import threading
+
+from core.typer import CHUNK_SIZE, FakeTypingBackend, TypingEngine
+
+
+def make_engine(backend=None, **kwargs):
+    return TypingEngine(backend=backend or FakeTypingBackend(), watch_escape=False,
+                        chunk_pause=0, **kwargs)
+
+
+def test_text_is_typed_in_chunks_of_200():
+    engine = make_engine()
+    text = "x" * (CHUNK_SIZE * 2 + 50)
+
+    assert engine.type_text(text)
+    assert [len(chunk) for chunk in engine.backend.chunks] == [200, 200, 50]
+    assert engine.backend.typed == text
+
+
+def test_crlf_is_never_split_between_chunks():
+    engine = make_engine(chunk_size=10)
+    # El "\r" cae justo al final del primer lote
+    text = "a" * 9 + "\r\n" + "b" * 20 + "\r\n"
+
+    assert engine.type_text(text)
+    chunks = engine.backend.chunks
+    assert chunks[0] == "a" * 9 + "\r\n"
+    assert not any(chunk.endswith("\r") for chunk in chunks)
+    assert not any(chunk.startswith("\n") for chunk in chunks)
+    assert engine.backend.typed == text
+
+
+def test_non_bmp_text_is_typed_intact():
+    engine = make_engine(chunk_size=3)
+    text = "SELECT '😀🎉' AS señal, '𝔘𝔫𝔦' FROM dual;"
+
+    assert engine.type_text(text)
+    assert engine.backend.typed == text
+
+
+def test_cancel_stops_after_the_current_chunk():
+    engine = make_engine(chunk_size=10)
+
+    def cancel_during_second_chunk(done, total):
+        if done == 20:
+            engine.cancel()
+
+    assert not engine.type_text("x" * 100, progress=cancel_during_second_chunk)
+    assert engine.backend.typed == "x" * 20
+    # Se puede volver a escribir después de cancelar
+    assert engine.type_text("y")
+    assert engine.backend.typed.endswith("y")
+
+
+def test_cancel_from_another_thread():
+    backend = FakeTypingBackend(chunk_delay=0.01)
+    engine = make_engine(backend, chunk_size=1)
+    threading.Timer(0.05, engine.cancel).start()
+
+    assert not engine.type_text("x" * 1000)
+    assert 0 < len(backend.typed) < 1000
+
+
+def test_progress_reports_characters_written():
+    engine = make_engine(chunk_size=4)
+    calls = []
+
+    assert engine.type_text("abc\r\ndefgh", progress=lambda done, total: calls.append((done, total)))
+    # El primer lote se alarga uno para no cortar el "\r\n"
+    assert calls == [(5, 10), (9, 10), (10, 10)]
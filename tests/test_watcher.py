@@ -0,0 +1,76 @@
+# tests/test_watcher.py
+
+"""FileWatcher en modo sondeo junto con SnippetStore.refresh."""
+
+import json
+import time
+
+from core.persistence import atomic_write_text
+from core.storage import JsonBackend
+from core.store import SnippetStore
+from core.watcher import FileWatcher
+
+POLL = 0.05
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_burst_of_writes_fires_one_callback_per_poll(tmp_path):
+    path = str(tmp_path / "config.json")
+    watcher = FileWatcher(use_inotify=False)
+    calls = []
+    watcher.watch(path, calls.append)
+
+    # El archivo todavía no existe: crearlo también es un cambio
+    for i in range(5):
+        atomic_write_text(path, json.dumps({"revision": i}))
+    assert watcher.check() == [path]
+    assert calls == [path]
+
+    # Sin cambios nuevos no se vuelve a avisar
+    assert watcher.check() == []
+    assert calls == [path]
+
+
+def test_polling_skips_own_writes_and_reloads_external_edits(tmp_path):
+    path = str(tmp_path / "sql_snippets.json")
+    store = SnippetStore(backend=JsonBackend(path))
+    store.put("Q1", "SELECT 1;")
+    store.flush()
+
+    reloads = []
+    refreshes = []
+    store.add_listener(lambda _store: reloads.append(_store.count()))
+    watcher = FileWatcher(poll_interval=POLL, use_inotify=False)
+    watcher.watch(path, lambda _path: refreshes.append(store.refresh()))
+    watcher.start()
+    store.set_watched(True)
+    try:
+        assert watcher.mode == "polling"
+
+        # Escrituras propias (write-behind + atomic_write_text): el watcher
+        # ve el cambio, pero refresh() lo reconoce y no recarga
+        for i in range(20):
+            store.put(f"Q{i}", f"SELECT {i};")
+        store.flush()
+        assert wait_until(lambda: len(refreshes) >= 1)
+        time.sleep(POLL * 3)
+        assert not any(refreshes)
+        assert reloads == []
+
+        # Edición externa: recarga y avisa a los listeners. Se escribe de
+        # forma atómica (como otra instancia de Klip): con open("w") el
+        # sondeo puede ver el archivo truncado a medio escribir
+        atomic_write_text(path, json.dumps({"EXTERNO": "SELECT 'a mano';"}))
+        assert wait_until(lambda: reloads == [1])
+        assert store.get("EXTERNO") == "SELECT 'a mano';"
+        assert store.get("Q1") is None
+    finally:
+        watcher.stop()
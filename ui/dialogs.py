@@ -0,0 +1,451 @@
+# ui/dialogs.py
+
+"""
+Diálogos modales: login, configuración y alta/edición de snippets.
+
+Viven aparte de ui/overlay.py para que main.py no los importe al
+arrancar: se cargan recién la primera vez que se abre uno.
+"""
+
+import os
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import (
+    QVBoxLayout,
+    QHBoxLayout,
+    QLineEdit,
+    QLabel,
+    QPushButton,
+    QDialog,
+    QTextEdit,
+    QMessageBox,
+    QCheckBox,
+    QComboBox,
+    QFrame,
+)
+
+from core.config import get_config
+from core.persistence import atomic_write_json
+from ui.overlay import _add_app_icon_to_msgbox
+
+
+class LoginDialog(QDialog):
+    def __init__(self, supabase_client):
+        super().__init__()
+        self.supabase = supabase_client
+        self.setWindowTitle("Login - Klip")
+        self.setModal(True)
+        self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
+        self.resize(300, 200)
+        
+        # Cargar ícono de la aplicación
+        import os
+        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
+        if os.path.exists(icon_path):
+            from PyQt6.QtGui import QIcon
+            self.setWindowIcon(QIcon(icon_path))
+        
+        self.setStyleSheet("""
+        QDialog {
+            background-color: #1e1e1e;
+            color: #ffffff;
+        }
+        QLabel {
+            color: #ffffff;
+        }
+        QLineEdit {
+            background-color: #2a2a2a;
+            border: 1px solid #3a3a3a;
+            border-radius: 4px;
+            padding: 4px;
+            color: #ffffff;
+        }
+        QPushButton {
+            background-color: #3b82f6;
+            border: none;
+            border-radius: 4px;
+            padding: 6px 12px;
+            color: #ffffff;
+        }
+        QPushButton:hover {
+            background-color: #2563eb;
+        }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        self.email_edit = QLineEdit()
+        self.email_edit.setPlaceholderText("Email")
+        layout.addWidget(QLabel("Email:"))
+        layout.addWidget(self.email_edit)
+
+        self.password_edit = QLineEdit()
+        self.password_edit.setPlaceholderText("Password")
+        self.password_edit.setEchoMode(QLineEdit.EchoMode.Password)
+        layout.addWidget(QLabel("Password:"))
+        layout.addWidget(self.password_edit)
+
+        self.remember_checkbox = QCheckBox("Remember me")
+        layout.addWidget(self.remember_checkbox)
+
+        buttons_layout = QHBoxLayout()
+        self.register_button = QPushButton("Register")
+        self.register_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.register_button.clicked.connect(self.register)
+        self.login_button = QPushButton("Login")
+        self.login_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.login_button.clicked.connect(self.login)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.cancel_button)
+        buttons_layout.addWidget(self.register_button)
+        buttons_layout.addWidget(self.login_button)
+        layout.addLayout(buttons_layout)
+
+        # Cargar credenciales guardadas
+        self.load_credentials()
+
+    def login(self):
+        email = self.email_edit.text().strip()
+        password = self.password_edit.text().strip()
+        if not email or not password:
+            msg = QMessageBox(self)
+            _add_app_icon_to_msgbox(msg)
+            msg.warning(self, "Error", "Email and password are required.")
+            return
+        try:
+            response = self.supabase.auth.sign_in_with_password({"email": email, "password": password})
+            if response.user:
+                if self.remember_checkbox.isChecked():
+                    self.save_credentials(email, password)
+                    self.save_session_data(response.session)
+                self.accept()
+            else:
+                msg = QMessageBox(self)
+                _add_app_icon_to_msgbox(msg)
+                msg.warning(self, "Error", "Login failed.")
+        except Exception as e:
+            msg = QMessageBox(self)
+            _add_app_icon_to_msgbox(msg)
+            msg.warning(self, "Error", f"Login error: {str(e)}")
+
+    def save_credentials(self, email, password):
+        get_config().set_credentials(email, password)
+
+    def save_session_data(self, session):
+        session_data = {
+            "access_token": session.access_token,
+            "refresh_token": session.refresh_token,
+        }
+        atomic_write_json("session.json", session_data)
+
+    def load_session_data(self):
+        import json
+        try:
+            with open("session.json", "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load_credentials(self):
+        config = get_config()
+        if config.exists():
+            email, password = config.credentials()
+            self.email_edit.setText(email)
+            self.password_edit.setText(password)
+            self.remember_checkbox.setChecked(True)
+
+    def register(self):
+        email = self.email_edit.text().strip()
+        password = self.password_edit.text().strip()
+        if not email or not password:
+            msg = QMessageBox(self)
+            _add_app_icon_to_msgbox(msg)
+            msg.warning(self, "Error", "Email and password are required.")
+            return
+        try:
+            response = self.supabase.auth.sign_up({"email": email, "password": password})
+            if response.user:
+                msg = QMessageBox(self)
+                _add_app_icon_to_msgbox(msg)
+                msg.information(self, "Success", "Registration successful! Please check your email to confirm your account.")
+            else:
+                msg = QMessageBox(self)
+                _add_app_icon_to_msgbox(msg)
+                msg.warning(self, "Error", "Registration failed.")
+        except Exception as e:
+            msg = QMessageBox(self)
+            _add_app_icon_to_msgbox(msg)
+            msg.warning(self, "Error", f"Registration error: {str(e)}")
+
+
+
+class ConfigDialog(QDialog):
+    def __init__(self, parent=None, current_supabase_url="", current_supabase_key="", snippets=None):
+        super().__init__(parent)
+        self.current_supabase_url = current_supabase_url
+        self.current_supabase_key = current_supabase_key
+        self.snippets = snippets or []
+        self.hotkey_combos = {}  # Almacenar los combos para hotkeys
+        self.setWindowTitle("Settings")
+        self.setModal(True)
+        self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
+        
+        # Cargar ícono de la aplicación
+        import os
+        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
+        if os.path.exists(icon_path):
+            from PyQt6.QtGui import QIcon
+            self.setWindowIcon(QIcon(icon_path))
+        self.resize(450, 350)
+        self.setStyleSheet("""
+        QDialog {
+            background-color: #1e1e1e;
+            color: #ffffff;
+        }
+        QLabel {
+            color: #ffffff;
+        }
+        QLineEdit {
+            background-color: #2a2a2a;
+            border: 1px solid #3a3a3a;
+            border-radius: 4px;
+            padding: 4px;
+            color: #ffffff;
+        }
+        QPushButton {
+            background-color: #3b82f6;
+            border: none;
+            border-radius: 4px;
+            padding: 6px 12px;
+            color: #ffffff;
+        }
+        QPushButton:hover {
+            background-color: #2563eb;
+        }
+        QFrame#upgradeBanner {
+            background-color: #3b82f6;
+            border-radius: 8px;
+            padding: 12px;
+        }
+        QLabel#upgradeText {
+            color: #ffffff;
+            font-weight: bold;
+        }
+        QLabel#limitInfo {
+            color: #60a5fa;
+            font-size: 11px;
+        }
+        """)
+
+        layout = QVBoxLayout(self)
+        
+        # FREE Version Banner
+        from core.manager import get_snippets_limit_info, MAX_SNIPPETS_FREE
+        
+        banner_frame = QFrame()
+        banner_frame.setObjectName("upgradeBanner")
+        banner_layout = QVBoxLayout(banner_frame)
+        banner_layout.setSpacing(4)
+        
+        upgrade_label = QLabel("⭐ Klip FREE Version")
+        upgrade_label.setObjectName("upgradeText")
+        
+        limit_label = QLabel(f"📊 Snippets: {get_snippets_limit_info()} • Upgrade to Premium for unlimited snippets!")
+        limit_label.setObjectName("limitInfo")
+        limit_label.setWordWrap(True)
+        
+        banner_layout.addWidget(upgrade_label)
+        banner_layout.addWidget(limit_label)
+        
+        layout.addWidget(banner_frame)
+
+        # Hotkeys - Info para FREE version
+        hotkeys_header = QHBoxLayout()
+        hotkeys_label = QLabel("Snippet Quick Access (F12 + number, or Ctrl+F12, number to paste directly):")
+        hotkeys_info = QLabel("🔓 Premium: Custom hotkeys")
+        hotkeys_info.setStyleSheet("color: #60a5fa; font-size: 10px;")
+        hotkeys_header.addWidget(hotkeys_label)
+        hotkeys_header.addStretch()
+        hotkeys_header.addWidget(hotkeys_info)
+        layout.addLayout(hotkeys_header)
+
+        self.hotkey_combos = {}
+        snippet_names = [snippet[0] for snippet in self.snippets] + ["None"]
+        
+        for i in range(1, 11):  # F12 + 1 to F12 + 0 (0 is 10)
+            combo = QComboBox()
+            combo.addItems(snippet_names)
+            combo.setCurrentText("None")
+            self.hotkey_combos[f"shift_{i if i < 10 else 0}"] = combo
+            layout.addWidget(QLabel(f"Number {i if i < 10 else 0}:"))
+            layout.addWidget(combo)
+
+        # Botones
+        buttons_layout = QHBoxLayout()
+        self.save_button = QPushButton("Save")
+        self.save_button.clicked.connect(self.save_config)
+        self.save_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.reject)
+        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        buttons_layout.addWidget(self.cancel_button)
+        buttons_layout.addWidget(self.save_button)
+        layout.addLayout(buttons_layout)
+
+        # Cargar configuración
+        self.load_config()
+
+    def load_config(self):
+        config = get_config()
+        if config.exists():
+            # Cargar hotkeys (compatibilidad con configuraciones antiguas y nuevas)
+            hotkeys = config.hotkeys()
+            for key, combo in self.hotkey_combos.items():
+                # Intentar primero la nueva clave (shift_)
+                value = hotkeys.get(key, None)
+                # Si no existe, intentar ctrl_
+                if value is None and key.startswith("shift_"):
+                    ctrl_key = key.replace("shift_", "ctrl_")
+                    value = hotkeys.get(ctrl_key, None)
+                # Si tampoco existe, intentar alt_gr_
+                if value is None and key.startswith("shift_"):
+                    alt_gr_key = key.replace("shift_", "alt_gr_")
+                    value = hotkeys.get(alt_gr_key, None)
+                # Si tampoco existe, intentar alt_shift_
+                if value is None and key.startswith("shift_"):
+                    alt_shift_key = key.replace("shift_", "alt_shift_")
+                    value = hotkeys.get(alt_shift_key, None)
+                # Si tampoco existe, intentar scroll_
+                if value is None and key.startswith("shift_"):
+                    scroll_key = key.replace("shift_", "scroll_")
+                    value = hotkeys.get(scroll_key, None)
+                # Si tampoco existe, intentar ctrl_alt_
+                if value is None and key.startswith("shift_"):
+                    ctrl_alt_key = key.replace("shift_", "ctrl_alt_")
+                    value = hotkeys.get(ctrl_alt_key, None)
+                # Si tampoco existe, intentar ctrl_shift_
+                if value is None and key.startswith("shift_"):
+                    ctrl_shift_key = key.replace("shift_", "ctrl_shift_")
+                    value = hotkeys.get(ctrl_shift_key, None)
+                # Si tampoco existe, intentar alt_
+                if value is None and key.startswith("shift_"):
+                    alt_key = key.replace("shift_", "alt_")
+                    value = hotkeys.get(alt_key, "None")
+                combo.setCurrentText(value if value is not None else "None")
+
+    def save_config(self):
+        hotkeys = {}
+        for key, combo in self.hotkey_combos.items():
+            hotkeys[key] = combo.currentText()
+        
+        # El servicio de config preserva el resto de valores (email, supabase, ...)
+        get_config().set_hotkeys(hotkeys)
+        msg = QMessageBox(self)
+        _add_app_icon_to_msgbox(msg)
+        msg.information(self, "Saved", "Configuration saved.")
+        self.accept()
+
+
+class SnippetDialog(QDialog):
+    def __init__(self, parent=None, name="", code="", protected=False):
+        super().__init__(parent)
+        self.setWindowTitle("Edit Snippet" if name else "New Snippet")
+        self.setModal(True)
+        self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
+        self.resize(400, 300)
+        
+        # Cargar ícono de la aplicación
+        import os
+        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
+        if os.path.exists(icon_path):
+            from PyQt6.QtGui import QIcon
+            self.setWindowIcon(QIcon(icon_path))
+        
+        self.setStyleSheet("""
+        QDialog {
+            background-color: #1e1e1e;
+            color: #ffffff;
+        }
+        QLabel {
+            color: #ffffff;
+        }
+        QLineEdit, QTextEdit {
+            background-color: #2a2a2a;
+            border: 1px solid #3a3a3a;
+            border-radius: 4px;
+            padding: 4px;
+            color: #ffffff;
+        }
+        QPushButton {
+            background-color: #3b82f6;
+            border: none;
+            border-radius: 4px;
+            padding: 6px 12px;
+            color: #ffffff;
+        }
+        QPushButton:hover {
+            background-color: #2563eb;
+        }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        self.name_edit = QLineEdit(name)
+        self.name_edit.setPlaceholderText("Snippet name")
+        layout.addWidget(QLabel("Name:"))
+        layout.addWidget(self.name_edit)
+
+        self.code_edit = QTextEdit(code)
+        self.code_edit.setPlaceholderText("SQL code...")
+        layout.addWidget(QLabel("Code:"))
+        layout.addWidget(self.code_edit)
+
+        # El código protegido se guarda cifrado y no aparece en la búsqueda
+        self.protected_check = QCheckBox("Protected (encrypted, hidden from search)")
+        self.protected_check.setChecked(protected)
+        layout.addWidget(self.protected_check)
+
+        buttons_layout = QHBoxLayout()
+        self.ok_button = QPushButton("OK")
+        self.ok_button.clicked.connect(self._on_ok_clicked)
+        self.ok_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.reject)
+        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        buttons_layout.addWidget(self.cancel_button)
+        buttons_layout.addWidget(self.ok_button)
+        layout.addLayout(buttons_layout)
+
+    def _on_ok_clicked(self):
+        """Manejar click en OK con animación de éxito."""
+        # Validar que hay datos
+        name = self.name_edit.text().strip()
+        code = self.code_edit.toPlainText().strip()
+        
+        if not name or not code:
+            msg = QMessageBox(self)
+            _add_app_icon_to_msgbox(msg)
+            msg.warning(self, "Error", "Name and code are required.")
+            return
+        
+        # Mostrar mensaje de éxito simple
+        msg = QMessageBox(self)
+        _add_app_icon_to_msgbox(msg)
+        msg.setIcon(QMessageBox.Icon.Information)
+        msg.setWindowTitle("Success")
+        msg.setText(f"Snippet '{name}' saved successfully and assigned to next available number!")
+        msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
+        msg.exec()
+        
+        # Aceptar el diálogo
+        self.accept()
+
+    def get_data(self):
+        return self.name_edit.text().strip(), self.code_edit.toPlainText().strip()
+
+    def is_protected(self) -> bool:
+        return self.protected_check.isChecked()
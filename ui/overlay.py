@@ -1,205 +1,68 @@
 # ui/overlay.py
 
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import html
 import os
+import time
 
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPropertyAnimation, QRect, QPoint, QEasingCurve
-from PyQt6.QtGui import QFont, QIcon
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThreadPool, QAbstractListModel, QModelIndex, QPropertyAnimation, QRect, QPoint, QEasingCurve
+from PyQt6.QtGui import QFont, QIcon, QTextDocument
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
     QLineEdit,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QLabel,
     QPushButton,
     QDialog,
-    QTextEdit,
     QMessageBox,
     QApplication,
     QMenu,
     QGridLayout,
-    QCheckBox,
-    QComboBox,
-    QFrame,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QInputDialog,
 )
 from PyQt6.QtGui import QAction
 
-from core.manager import search_snippets, add_snippet, update_snippet, delete_snippet
-
-
-# Función auxiliar para agregar icono a QMessageBox
-def _add_app_icon_to_msgbox(msgbox):
-    """Agrega el icono de la app a un QMessageBox."""
-    icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
-    if os.path.exists(icon_path):
-        msgbox.setWindowIcon(QIcon(icon_path))
-
-
-class LoginDialog(QDialog):
-    def __init__(self, supabase_client):
-        super().__init__()
-        self.supabase = supabase_client
-        self.setWindowTitle("Login - Klip")
-        self.setModal(True)
-        self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
-        self.resize(300, 200)
-        
-        # Cargar ícono de la aplicación
-        import os
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
-        if os.path.exists(icon_path):
-            from PyQt6.QtGui import QIcon
-            self.setWindowIcon(QIcon(icon_path))
-        
-        self.setStyleSheet("""
-        QDialog {
-            background-color: #1e1e1e;
-            color: #ffffff;
-        }
-        QLabel {
-            color: #ffffff;
-        }
-        QLineEdit {
-            background-color: #2a2a2a;
-            border: 1px solid #3a3a3a;
-            border-radius: 4px;
-            padding: 4px;
-            color: #ffffff;
-        }
-        QPushButton {
-            background-color: #3b82f6;
-            border: none;
-            border-radius: 4px;
-            padding: 6px 12px;
-            color: #ffffff;
-        }
-        QPushButton:hover {
-            background-color: #2563eb;
-        }
-        """)
+from core.config import get_config
+from core.events import (
+    ChangeEvent, HotkeysChanged, SnippetAdded, SnippetDeleted, SnippetUpdated, get_event_bus,
+)
+from core.fuzzy import FuzzyResult, fuzzy_match, result_sort_key, score_snippet
+from core.manager import (
+    fuzzy_search_snippets, add_snippet, update_snippet, delete_snippet, get_snippet_store,
+    is_snippet_protected, protected_snippets_unlocked, reveal_snippet_code, unlock_protected_snippets,
+)
 
-        layout = QVBoxLayout(self)
+# Rol con el texto del item en HTML (caracteres coincidentes resaltados)
+HIGHLIGHT_ROLE = Qt.ItemDataRole.UserRole + 1
 
-        self.email_edit = QLineEdit()
-        self.email_edit.setPlaceholderText("Email")
-        layout.addWidget(QLabel("Email:"))
-        layout.addWidget(self.email_edit)
+# Espera tras la última tecla antes de lanzar la búsqueda (ms)
+SEARCH_DEBOUNCE_MS = 60
 
-        self.password_edit = QLineEdit()
-        self.password_edit.setPlaceholderText("Password")
-        self.password_edit.setEchoMode(QLineEdit.EchoMode.Password)
-        layout.addWidget(QLabel("Password:"))
-        layout.addWidget(self.password_edit)
+# Objetivo de latencia entre la hotkey y el selector visible (ms)
+SELECTOR_LATENCY_TARGET_MS = 30
 
-        self.remember_checkbox = QCheckBox("Remember me")
-        layout.addWidget(self.remember_checkbox)
 
-        buttons_layout = QHBoxLayout()
-        self.register_button = QPushButton("Register")
-        self.register_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.register_button.clicked.connect(self.register)
-        self.login_button = QPushButton("Login")
-        self.login_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.login_button.clicked.connect(self.login)
-        self.cancel_button = QPushButton("Cancel")
-        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.cancel_button.clicked.connect(self.reject)
-        buttons_layout.addWidget(self.cancel_button)
-        buttons_layout.addWidget(self.register_button)
-        buttons_layout.addWidget(self.login_button)
-        layout.addLayout(buttons_layout)
+@lru_cache(maxsize=None)
+def app_icon() -> Optional[QIcon]:
+    """Ícono de la app, leído de assets/icon.png una sola vez (None si no existe)."""
+    icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
+    if os.path.exists(icon_path):
+        return QIcon(icon_path)
+    return None
 
-        # Cargar credenciales guardadas
-        self.load_credentials()
 
-    def login(self):
-        email = self.email_edit.text().strip()
-        password = self.password_edit.text().strip()
-        if not email or not password:
-            msg = QMessageBox(self)
-            _add_app_icon_to_msgbox(msg)
-            msg.warning(self, "Error", "Email and password are required.")
-            return
-        try:
-            response = self.supabase.auth.sign_in_with_password({"email": email, "password": password})
-            if response.user:
-                if self.remember_checkbox.isChecked():
-                    self.save_credentials(email, password)
-                    self.save_session_data(response.session)
-                self.accept()
-            else:
-                msg = QMessageBox(self)
-                _add_app_icon_to_msgbox(msg)
-                msg.warning(self, "Error", "Login failed.")
-        except Exception as e:
-            msg = QMessageBox(self)
-            _add_app_icon_to_msgbox(msg)
-            msg.warning(self, "Error", f"Login error: {str(e)}")
-
-    def save_credentials(self, email, password):
-        import json
-        try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-        except FileNotFoundError:
-            config = {}
-        config["email"] = email
-        config["password"] = password
-        with open("config.json", "w") as f:
-            json.dump(config, f)
-
-    def save_session_data(self, session):
-        import json
-        session_data = {
-            "access_token": session.access_token,
-            "refresh_token": session.refresh_token,
-        }
-        with open("session.json", "w") as f:
-            json.dump(session_data, f)
-
-    def load_session_data(self):
-        import json
-        try:
-            with open("session.json", "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return None
-
-    def load_credentials(self):
-        import json
-        try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-                self.email_edit.setText(config.get("email", ""))
-                self.password_edit.setText(config.get("password", ""))
-                self.remember_checkbox.setChecked(True)
-        except FileNotFoundError:
-            pass
-
-    def register(self):
-        email = self.email_edit.text().strip()
-        password = self.password_edit.text().strip()
-        if not email or not password:
-            msg = QMessageBox(self)
-            _add_app_icon_to_msgbox(msg)
-            msg.warning(self, "Error", "Email and password are required.")
-            return
-        try:
-            response = self.supabase.auth.sign_up({"email": email, "password": password})
-            if response.user:
-                msg = QMessageBox(self)
-                _add_app_icon_to_msgbox(msg)
-                msg.information(self, "Success", "Registration successful! Please check your email to confirm your account.")
-            else:
-                msg = QMessageBox(self)
-                _add_app_icon_to_msgbox(msg)
-                msg.warning(self, "Error", "Registration failed.")
-        except Exception as e:
-            msg = QMessageBox(self)
-            _add_app_icon_to_msgbox(msg)
-            msg.warning(self, "Error", f"Registration error: {str(e)}")
+# Función auxiliar para agregar icono a QMessageBox
+def _add_app_icon_to_msgbox(msgbox):
+    """Agrega el icono de la app a un QMessageBox."""
+    icon = app_icon()
+    if icon is not None:
+        msgbox.setWindowIcon(icon)
 
 
 class FloatingIcon(QWidget):
@@ -316,308 +179,275 @@ class FloatingIcon(QWidget):
             self.drag_position = None
 
 
-class ConfigDialog(QDialog):
-    def __init__(self, parent=None, current_supabase_url="", current_supabase_key="", snippets=None):
-        super().__init__(parent)
-        self.current_supabase_url = current_supabase_url
-        self.current_supabase_key = current_supabase_key
-        self.snippets = snippets or []
-        self.hotkey_combos = {}  # Almacenar los combos para hotkeys
-        self.setWindowTitle("Settings")
-        self.setModal(True)
-        self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
-        
-        # Cargar ícono de la aplicación
-        import os
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
-        if os.path.exists(icon_path):
-            from PyQt6.QtGui import QIcon
-            self.setWindowIcon(QIcon(icon_path))
-        self.resize(450, 350)
-        self.setStyleSheet("""
-        QDialog {
-            background-color: #1e1e1e;
-            color: #ffffff;
-        }
-        QLabel {
-            color: #ffffff;
-        }
-        QLineEdit {
-            background-color: #2a2a2a;
-            border: 1px solid #3a3a3a;
-            border-radius: 4px;
-            padding: 4px;
-            color: #ffffff;
-        }
-        QPushButton {
-            background-color: #3b82f6;
-            border: none;
-            border-radius: 4px;
-            padding: 6px 12px;
-            color: #ffffff;
-        }
-        QPushButton:hover {
-            background-color: #2563eb;
-        }
-        QFrame#upgradeBanner {
-            background-color: #3b82f6;
-            border-radius: 8px;
-            padding: 12px;
-        }
-        QLabel#upgradeText {
-            color: #ffffff;
-            font-weight: bold;
-        }
-        QLabel#limitInfo {
-            color: #60a5fa;
-            font-size: 11px;
-        }
-        """)
 
-        layout = QVBoxLayout(self)
-        
-        # FREE Version Banner
-        from core.manager import get_snippets_limit_info, MAX_SNIPPETS_FREE
-        
-        banner_frame = QFrame()
-        banner_frame.setObjectName("upgradeBanner")
-        banner_layout = QVBoxLayout(banner_frame)
-        banner_layout.setSpacing(4)
-        
-        upgrade_label = QLabel("⭐ Klip FREE Version")
-        upgrade_label.setObjectName("upgradeText")
-        
-        limit_label = QLabel(f"📊 Snippets: {get_snippets_limit_info()} • Upgrade to Premium for unlimited snippets!")
-        limit_label.setObjectName("limitInfo")
-        limit_label.setWordWrap(True)
-        
-        banner_layout.addWidget(upgrade_label)
-        banner_layout.addWidget(limit_label)
-        
-        layout.addWidget(banner_frame)
-
-        # Hotkeys - Info para FREE version
-        hotkeys_header = QHBoxLayout()
-        hotkeys_label = QLabel("Snippet Quick Access (F12 + number):")
-        hotkeys_info = QLabel("🔓 Premium: Custom hotkeys")
-        hotkeys_info.setStyleSheet("color: #60a5fa; font-size: 10px;")
-        hotkeys_header.addWidget(hotkeys_label)
-        hotkeys_header.addStretch()
-        hotkeys_header.addWidget(hotkeys_info)
-        layout.addLayout(hotkeys_header)
-
-        self.hotkey_combos = {}
-        snippet_names = [snippet[0] for snippet in self.snippets] + ["None"]
-        
-        for i in range(1, 11):  # F12 + 1 to F12 + 0 (0 is 10)
-            combo = QComboBox()
-            combo.addItems(snippet_names)
-            combo.setCurrentText("None")
-            self.hotkey_combos[f"shift_{i if i < 10 else 0}"] = combo
-            layout.addWidget(QLabel(f"Number {i if i < 10 else 0}:"))
-            layout.addWidget(combo)
-
-        # Botones
-        buttons_layout = QHBoxLayout()
-        self.save_button = QPushButton("Save")
-        self.save_button.clicked.connect(self.save_config)
-        self.save_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.cancel_button = QPushButton("Cancel")
-        self.cancel_button.clicked.connect(self.reject)
-        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        buttons_layout.addWidget(self.cancel_button)
-        buttons_layout.addWidget(self.save_button)
-        layout.addLayout(buttons_layout)
+def _highlight_html(text: str, positions) -> str:
+    """Escapa `text` y marca en negrita ámbar los caracteres de `positions`."""
+    marked = set(positions)
+    parts = []
+    for i, ch in enumerate(text):
+        if i in marked:
+            parts.append(f'<b style="color:#fbbf24">{html.escape(ch)}</b>')
+        else:
+            parts.append(html.escape(ch))
+    return "".join(parts)
 
-        # Cargar configuración
-        self.load_config()
-
-    def load_config(self):
-        import json
-        try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-                # Cargar hotkeys (compatibilidad con configuraciones antiguas y nuevas)
-                hotkeys = config.get("hotkeys", {})
-                for key, combo in self.hotkey_combos.items():
-                    # Intentar primero la nueva clave (shift_)
-                    value = hotkeys.get(key, None)
-                    # Si no existe, intentar ctrl_
-                    if value is None and key.startswith("shift_"):
-                        ctrl_key = key.replace("shift_", "ctrl_")
-                        value = hotkeys.get(ctrl_key, None)
-                    # Si tampoco existe, intentar alt_gr_
-                    if value is None and key.startswith("shift_"):
-                        alt_gr_key = key.replace("shift_", "alt_gr_")
-                        value = hotkeys.get(alt_gr_key, None)
-                    # Si tampoco existe, intentar alt_shift_
-                    if value is None and key.startswith("shift_"):
-                        alt_shift_key = key.replace("shift_", "alt_shift_")
-                        value = hotkeys.get(alt_shift_key, None)
-                    # Si tampoco existe, intentar scroll_
-                    if value is None and key.startswith("shift_"):
-                        scroll_key = key.replace("shift_", "scroll_")
-                        value = hotkeys.get(scroll_key, None)
-                    # Si tampoco existe, intentar ctrl_alt_
-                    if value is None and key.startswith("shift_"):
-                        ctrl_alt_key = key.replace("shift_", "ctrl_alt_")
-                        value = hotkeys.get(ctrl_alt_key, None)
-                    # Si tampoco existe, intentar ctrl_shift_
-                    if value is None and key.startswith("shift_"):
-                        ctrl_shift_key = key.replace("shift_", "ctrl_shift_")
-                        value = hotkeys.get(ctrl_shift_key, None)
-                    # Si tampoco existe, intentar alt_
-                    if value is None and key.startswith("shift_"):
-                        alt_key = key.replace("shift_", "alt_")
-                        value = hotkeys.get(alt_key, "None")
-                    combo.setCurrentText(value if value is not None else "None")
-        except FileNotFoundError:
-            # No config file exists yet
-            pass
-
-    def save_config(self):
-        import json
-        hotkeys = {}
-        for key, combo in self.hotkey_combos.items():
-            hotkeys[key] = combo.currentText()
-        
-        config = {
-            "hotkeys": hotkeys,
-        }
-        
-        # Preservar valores existentes en config.json que no se editan en FREE
-        try:
-            with open("config.json", "r") as f:
-                old_config = json.load(f)
-                # Preservar email y password si existen
-                if "email" in old_config:
-                    config["email"] = old_config["email"]
-                if "password" in old_config:
-                    config["password"] = old_config["password"]
-                # Preservar supabase_url y supabase_key
-                if "supabase_url" in old_config:
-                    config["supabase_url"] = old_config["supabase_url"]
-                if "supabase_key" in old_config:
-                    config["supabase_key"] = old_config["supabase_key"]
-        except FileNotFoundError:
-            pass
-        
-        with open("config.json", "w") as f:
-            json.dump(config, f)
-        msg = QMessageBox(self)
-        _add_app_icon_to_msgbox(msg)
-        msg.information(self, "Saved", "Configuration saved.")
-        self.accept()
 
+class SnippetItemDelegate(QStyledItemDelegate):
+    """Pinta los items usando el HTML de HIGHLIGHT_ROLE si lo tienen."""
 
-class SnippetDialog(QDialog):
-    def __init__(self, parent=None, name="", code=""):
-        super().__init__(parent)
-        self.setWindowTitle("Edit Snippet" if name else "New Snippet")
-        self.setModal(True)
-        self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
-        self.resize(400, 300)
-        
-        # Cargar ícono de la aplicación
-        import os
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
-        if os.path.exists(icon_path):
-            from PyQt6.QtGui import QIcon
-            self.setWindowIcon(QIcon(icon_path))
-        
-        self.setStyleSheet("""
-        QDialog {
-            background-color: #1e1e1e;
-            color: #ffffff;
-        }
-        QLabel {
-            color: #ffffff;
-        }
-        QLineEdit, QTextEdit {
-            background-color: #2a2a2a;
-            border: 1px solid #3a3a3a;
-            border-radius: 4px;
-            padding: 4px;
-            color: #ffffff;
-        }
-        QPushButton {
-            background-color: #3b82f6;
-            border: none;
-            border-radius: 4px;
-            padding: 6px 12px;
-            color: #ffffff;
-        }
-        QPushButton:hover {
-            background-color: #2563eb;
-        }
-        """)
+    def paint(self, painter, option, index):
+        html_text = index.data(HIGHLIGHT_ROLE)
+        if not html_text:
+            super().paint(painter, option, index)
+            return
 
-        layout = QVBoxLayout(self)
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        # Fondo, selección y foco como cualquier otro item
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+
+        selected = bool(opt.state & QStyle.StateFlag.State_Selected)
+        color = "#ffffff" if selected else "#e5e5e5"
+        doc = QTextDocument()
+        doc.setDocumentMargin(0)
+        doc.setDefaultFont(opt.font)
+        doc.setHtml(f'<span style="color:{color}; white-space:pre">{html_text}</span>')
+
+        rect = style.subElementRect(QStyle.SubElement.SE_ItemViewItemText, opt, opt.widget)
+        painter.save()
+        painter.setClipRect(rect)
+        painter.translate(rect.left(), rect.top() + (rect.height() - doc.size().height()) / 2)
+        doc.drawContents(painter)
+        painter.restore()
+
+
+def _runs(flags) -> List[Tuple[int, int]]:
+    """Tramos (inicio, fin) inclusivos de posiciones con flag verdadero."""
+    runs = []
+    start = None
+    for i, flag in enumerate(flags):
+        if flag and start is None:
+            start = i
+        elif not flag and start is not None:
+            runs.append((start, i - 1))
+            start = None
+    if start is not None:
+        runs.append((start, len(flags) - 1))
+    return runs
+
+
+class SnippetListModel(QAbstractListModel):
+    """
+    Modelo del overlay sobre el resultado de la búsqueda.
+
+    Solo guarda las tuplas (nombre, código, puntuación, posiciones); el
+    texto, la vista previa y el HTML resaltado se arman en data(), que la
+    vista solo llama para las filas visibles.
+    """
+
+    # Con más tramos que estos, un cambio de layout sale más barato
+    MAX_INCREMENTAL_RUNS = 64
 
-        self.name_edit = QLineEdit(name)
-        self.name_edit.setPlaceholderText("Snippet name")
-        layout.addWidget(QLabel("Name:"))
-        layout.addWidget(self.name_edit)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[FuzzyResult] = []
+        self._hotkey_map = {}
 
-        self.code_edit = QTextEdit(code)
-        self.code_edit.setPlaceholderText("SQL code...")
-        layout.addWidget(QLabel("Code:"))
-        layout.addWidget(self.code_edit)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
 
-        buttons_layout = QHBoxLayout()
-        self.ok_button = QPushButton("OK")
-        self.ok_button.clicked.connect(self._on_ok_clicked)
-        self.ok_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.cancel_button = QPushButton("Cancel")
-        self.cancel_button.clicked.connect(self.reject)
-        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        buttons_layout.addWidget(self.cancel_button)
-        buttons_layout.addWidget(self.ok_button)
-        layout.addLayout(buttons_layout)
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name, code, _score, positions = self._rows[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return (name, code)
+        if role not in (Qt.ItemDataRole.DisplayRole, HIGHLIGHT_ROLE):
+            return None
 
-    def _on_ok_clicked(self):
-        """Manejar click en OK con animación de éxito."""
-        # Validar que hay datos
-        name = self.name_edit.text().strip()
-        code = self.code_edit.toPlainText().strip()
-        
-        if not name or not code:
-            msg = QMessageBox(self)
-            _add_app_icon_to_msgbox(msg)
-            msg.warning(self, "Error", "Name and code are required.")
+        # Agregar el número si está asignado
+        number_prefix = ""
+        if name in self._hotkey_map:
+            number_prefix = f"[F12+{self._hotkey_map[name]}] "
+        preview = get_snippet_store().preview(name, code)
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{number_prefix}{name}  —  {preview}"
+        if not positions:
+            return None
+        return (
+            html.escape(number_prefix)
+            + _highlight_html(name, positions)
+            + html.escape(f"  —  {preview}")
+        )
+
+    def set_results(self, rows: List[FuzzyResult]):
+        """
+        Reemplaza las filas emitiendo el cambio mínimo: si las filas que
+        siguen presentes conservan su orden relativo, solo se notifican
+        los tramos eliminados e insertados; si no, un cambio de layout.
+        """
+        # snippet_name -> number, cacheado por el servicio de config por generación
+        self._hotkey_map = get_config().hotkey_numbers()
+        old_names = [row[0] for row in self._rows]
+        new_names = [row[0] for row in rows]
+        new_set = set(new_names)
+        old_set = set(old_names)
+        removed = _runs([name not in new_set for name in old_names])
+        inserted = _runs([name not in old_set for name in new_names])
+        kept_old = [name for name in old_names if name in new_set]
+        kept_new = [name for name in new_names if name in old_set]
+
+        if kept_old != kept_new or len(removed) + len(inserted) > self.MAX_INCREMENTAL_RUNS:
+            self._relayout(rows)
             return
-        
-        # Mostrar mensaje de éxito simple
-        msg = QMessageBox(self)
-        _add_app_icon_to_msgbox(msg)
-        msg.setIcon(QMessageBox.Icon.Information)
-        msg.setWindowTitle("Success")
-        msg.setText(f"Snippet '{name}' saved successfully and assigned to next available number!")
-        msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-        msg.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
-        msg.exec()
-        
-        # Aceptar el diálogo
-        self.accept()
 
-    def get_data(self):
-        return self.name_edit.text().strip(), self.code_edit.toPlainText().strip()
+        parent = QModelIndex()
+        # De abajo hacia arriba para que los índices previos sigan valiendo
+        for start, end in reversed(removed):
+            self.beginRemoveRows(parent, start, end)
+            del self._rows[start:end + 1]
+            self.endRemoveRows()
+        for start, end in inserted:
+            self.beginInsertRows(parent, start, end)
+            self._rows[start:start] = rows[start:end + 1]
+            self.endInsertRows()
+        # Las filas que quedaron pueden tener otras posiciones resaltadas
+        self._rows = list(rows)
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1))
+
+    # -------------------------------------------------- cambios puntuales
+
+    def _key(self, query: str, row: FuzzyResult) -> tuple:
+        return result_sort_key(query, row[0], row[2], bool(row[3]))
+
+    def _position(self, query: str, key: tuple) -> int:
+        """Primera fila cuya clave no es menor que `key` (búsqueda binaria)."""
+        lo, hi = 0, len(self._rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(query, self._rows[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _row_of(self, name: str, query: str) -> Optional[int]:
+        """Fila del snippet `name` en O(log n), o None si no está en la lista."""
+        match = fuzzy_match(query, name) if query else None
+        key = result_sort_key(query, name, match[0] if match else 0, match is not None)
+        row = self._position(query, key)
+        while row < len(self._rows) and self._key(query, self._rows[row]) == key:
+            if self._rows[row][0] == name:
+                return row
+            row += 1
+        return None
+
+    def _remove_row(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+    def _insert_result(self, result: FuzzyResult, query: str):
+        row = self._position(query, self._key(query, result))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, result)
+        self.endInsertRows()
+
+    def _row_changed(self, name: str, query: str):
+        row = self._row_of(name, query)
+        if row is not None:
+            self.dataChanged.emit(self.index(row), self.index(row))
+
+    def apply_event(self, event: ChangeEvent, query: str) -> bool:
+        """
+        Aplica un cambio publicado por core.manager tocando solo las filas
+        afectadas. Devuelve False si el evento pide rehacer la búsqueda.
+        """
+        if isinstance(event, SnippetAdded):
+            result = score_snippet(query, event.name, event.code)
+            if result is not None:
+                self._insert_result(result, query)
+        elif isinstance(event, SnippetDeleted):
+            row = self._row_of(event.name, query)
+            if row is not None:
+                self._remove_row(row)
+        elif isinstance(event, SnippetUpdated):
+            row = self._row_of(event.old_name, query)
+            result = score_snippet(query, event.name, event.code)
+            if row is not None and result is not None:
+                key = self._key(query, result)
+                last = len(self._rows) - 1
+                if ((row == 0 or self._key(query, self._rows[row - 1]) <= key)
+                        and (row == last or key <= self._key(query, self._rows[row + 1]))):
+                    # Sigue en su lugar: se redibuja solo esa fila
+                    self._rows[row] = result
+                    self.dataChanged.emit(self.index(row), self.index(row))
+                    return True
+            if row is not None:
+                self._remove_row(row)
+            if result is not None:
+                self._insert_result(result, query)
+        elif isinstance(event, HotkeysChanged):
+            self._hotkey_map = get_config().hotkey_numbers()
+            for name in set(event.assignments.values()) | set(event.previous.values()):
+                if name and name != "None":
+                    self._row_changed(name, query)
+        else:
+            return False
+        return True
+
+    def _relayout(self, rows: List[FuzzyResult]):
+        """Reordena conservando selección y fila actual si siguen presentes."""
+        self.layoutAboutToBeChanged.emit()
+        new_row = {row[0]: i for i, row in enumerate(rows)}
+        old_rows = self._rows
+        old_indexes = self.persistentIndexList()
+        self._rows = list(rows)
+        new_indexes = []
+        for index in old_indexes:
+            row = new_row.get(old_rows[index.row()][0])
+            new_indexes.append(self.index(row) if row is not None else QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
 
 
 class SnippetOverlay(QWidget):
     # Señal que emitirá el snippet seleccionado (nombre, código)
     snippet_selected = pyqtSignal(str, str)
+    # (generación, query, resultados) emitida desde el hilo de búsqueda
+    _search_finished = pyqtSignal(int, str, object)
+    # Evento de core.events, reenviado al hilo de Qt
+    _change_event = pyqtSignal(object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Klip")
+
+        # Búsqueda en segundo plano: un solo hilo, con debounce y cancelación.
+        # Cada tecla incrementa la generación; una búsqueda en curso de una
+        # generación anterior se abandona y su resultado se descarta.
+        self._search_generation = 0
+        self._search_pool = QThreadPool(self)
+        self._search_pool.setMaxThreadCount(1)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._start_search)
+        self._search_finished.connect(self._on_search_finished)
+        # Hay una búsqueda lanzada cuyo resultado todavía no se aplicó
+        self._search_pending = False
+
+        # Altas, ediciones y bajas llegan como eventos y se aplican fila a fila
+        self._change_event.connect(self._on_change_event)
+        get_event_bus().subscribe(self._change_event.emit)
         
         # Cargar ícono de la aplicación
-        import os
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
-        if os.path.exists(icon_path):
-            from PyQt6.QtGui import QIcon
-            self.setWindowIcon(QIcon(icon_path))
+        icon = app_icon()
+        if icon is not None:
+            self.setWindowIcon(icon)
         
         # self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
         # self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
@@ -667,10 +497,16 @@ class SnippetOverlay(QWidget):
         layout.addWidget(self.search_box)
 
         # Lista de resultados
-        self.list_widget = QListWidget()
-        self.list_widget.itemDoubleClicked.connect(self._on_item_activated)
-        self.list_widget.itemActivated.connect(self._on_item_activated)  # Enter
-        self.list_widget.setCursor(Qt.CursorShape.PointingHandCursor)
+        # Vista virtualizada: solo se pintan (y consultan) las filas visibles
+        self.list_model = SnippetListModel(self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.list_model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.list_view.doubleClicked.connect(self._on_item_activated)
+        self.list_view.activated.connect(self._on_item_activated)  # Enter
+        self.list_view.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.list_view.setItemDelegate(SnippetItemDelegate(self.list_view))
 
         # Botones de acción
         buttons_layout = QHBoxLayout()
@@ -691,7 +527,7 @@ class SnippetOverlay(QWidget):
         buttons_layout.addWidget(self.delete_button)
         buttons_layout.addWidget(self.close_button)
 
-        layout.addWidget(self.list_widget)
+        layout.addWidget(self.list_view)
         layout.addLayout(buttons_layout)
 
         root_layout = QVBoxLayout(self)
@@ -721,16 +557,16 @@ class SnippetOverlay(QWidget):
             color: #ffffff;
             selection-background-color: #3b82f6;
         }
-        QListWidget {
+        QListView {
             background-color: #222222;
             border: 1px solid #3a3a3a;
             border-radius: 8px;
             color: #e5e5e5;
         }
-        QListWidget::item {
+        QListView::item {
             padding: 6px 8px;
         }
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #3b82f6;
             color: #ffffff;
         }
@@ -750,43 +586,54 @@ class SnippetOverlay(QWidget):
         """)
 
     def _load_initial_data(self):
-        self._refresh_list(search_snippets(""))
+        self._refresh_list(fuzzy_search_snippets(""))
         self._update_counter()
 
-    def _refresh_list(self, data: List[Tuple[str, str]]):
-        # Cargar hotkeys para saber qué número tiene cada snippet
-        import json
-        hotkey_map = {}  # snippet_name -> number
-        try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-                hotkeys = config.get("hotkeys", {})
-                # Invertir el diccionario: de shift_1 -> snippet a snippet -> 1
-                for key, snippet_name in hotkeys.items():
-                    if key.startswith("shift_") and snippet_name:
-                        number = key.replace("shift_", "")
-                        if number == "0":
-                            hotkey_map[snippet_name] = "0"
-                        else:
-                            hotkey_map[snippet_name] = number
-        except:
-            pass
-        
-        self.list_widget.clear()
-        for name, code in data:
-            preview = code.replace("\n", " ")
-            if len(preview) > 80:
-                preview = preview[:77] + "..."
-            
-            # Agregar el número si está asignado
-            number_prefix = ""
-            if name in hotkey_map:
-                number_prefix = f"[F12+{hotkey_map[name]}] "
-            
-            item = QListWidgetItem(f"{number_prefix}{name}  —  {preview}")
-            # Guardamos el código completo en el item
-            item.setData(Qt.ItemDataRole.UserRole, (name, code))
-            self.list_widget.addItem(item)
+    def refresh(self):
+        """Vuelve a ejecutar la búsqueda actual (p. ej. tras una recarga completa)."""
+        self._search_timer.stop()
+        self._search_generation += 1
+        self._start_search()
+
+    def _start_search(self):
+        """Lanza la búsqueda del texto actual en el hilo de búsqueda."""
+        query = self.search_box.text()
+        generation = self._search_generation
+        self._search_pending = True
+        # Las búsquedas encoladas que aún no empezaron ya no sirven
+        self._search_pool.clear()
+
+        def is_cancelled():
+            return generation != self._search_generation
+
+        def run():
+            if is_cancelled():
+                return
+            results = fuzzy_search_snippets(query, is_cancelled)
+            if results is not None:
+                self._search_finished.emit(generation, query, results)
+
+        self._search_pool.start(run)
+
+    def _on_search_finished(self, generation: int, query: str, results: List[FuzzyResult]):
+        # Solo se aplica si nadie escribió nada mientras tanto
+        if generation != self._search_generation or query != self.search_box.text():
+            return
+        self._search_pending = False
+        self._refresh_list(results)
+
+    def _on_change_event(self, event: ChangeEvent):
+        # Con una búsqueda en camino su resultado podría no incluir el cambio
+        if (self._search_pending or self._search_timer.isActive()
+                or not self.list_model.apply_event(event, self.search_box.text())):
+            self.refresh()
+            return
+        if isinstance(event, (SnippetAdded, SnippetDeleted)):
+            self._update_counter()
+
+    def _refresh_list(self, data: List[FuzzyResult]):
+        # El modelo notifica solo las filas que entran y salen
+        self.list_model.set_results(data)
         self._update_counter()
     
     def _update_counter(self):
@@ -803,25 +650,67 @@ class SnippetOverlay(QWidget):
             self.add_button.setToolTip("")
 
     def _on_search_changed(self, text: str):
-        results = search_snippets(text)
-        self._refresh_list(results)
-
-    def _on_item_activated(self, item: QListWidgetItem):
-        data = item.data(Qt.ItemDataRole.UserRole)
+        # Coincidencia difusa ("selcust" -> SELECT_CUSTOMERS), mejor primero.
+        # La búsqueda corre fuera del hilo de la GUI tras SEARCH_DEBOUNCE_MS;
+        # incrementar la generación cancela la que esté en curso.
+        self._search_generation += 1
+        self._search_timer.start()
+
+    def ensure_unlocked(self) -> bool:
+        """Pide la contraseña de los snippets protegidos si están bloqueados."""
+        if protected_snippets_unlocked():
+            return True
+        password, ok = QInputDialog.getText(
+            self, "Protected snippets", "Password for protected snippets:",
+            QLineEdit.EchoMode.Password,
+        )
+        if not ok or not password:
+            return False
+        if unlock_protected_snippets(password):
+            return True
+        msg = QMessageBox(self)
+        _add_app_icon_to_msgbox(msg)
+        msg.warning(self, "Protected snippets", "Wrong password.")
+        return False
+
+    @staticmethod
+    def _stored_code(name: str, code: str) -> str:
+        """
+        Código tal como está en el store: lo que devuelve el modelo de Qt
+        puede ser una copia del texto sin la marca de snippet protegido.
+        """
+        stored = get_snippet_store().get(name)
+        return stored if stored is not None else code
+
+    def reveal_code(self, code: str) -> Optional[str]:
+        """Código en claro; si está protegido y bloqueado pide desbloquear (None si no)."""
+        plaintext = reveal_snippet_code(code)
+        if plaintext is None and self.ensure_unlocked():
+            plaintext = reveal_snippet_code(code)
+        return plaintext
+
+    def _on_item_activated(self, index: QModelIndex):
+        data = index.data(Qt.ItemDataRole.UserRole)
         if data:
             name, code = data
+            # Los protegidos se descifran recién aquí, al pegar
+            code = self.reveal_code(self._stored_code(name, code))
+            if code is None:
+                return
             # Emitimos la señal para que main.py decida qué hacer
             self.snippet_selected.emit(name, code)
             # No cerramos la ventana, para permitir gestión
 
     def _on_add(self):
+        from ui.dialogs import SnippetDialog
         dialog = SnippetDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             name, code = dialog.get_data()
             if name and code:
+                if dialog.is_protected() and not self.ensure_unlocked():
+                    return
                 try:
-                    add_snippet(name, code)
-                    self._refresh_list(search_snippets(self.search_box.text()))
+                    add_snippet(name, code, protected=dialog.is_protected())
                 except ValueError as e:
                     msg = QMessageBox(self)
                     _add_app_icon_to_msgbox(msg)
@@ -832,20 +721,26 @@ class SnippetOverlay(QWidget):
                 msg.warning(self, "Error", "Name and code are required.")
 
     def _on_edit(self):
-        current_item = self.list_widget.currentItem()
-        if not current_item:
+        current_index = self.list_view.currentIndex()
+        if not current_index.isValid():
             msg = QMessageBox(self)
             _add_app_icon_to_msgbox(msg)
             msg.information(self, "Edit", "Select a snippet to edit.")
             return
-        name, code = current_item.data(Qt.ItemDataRole.UserRole)
-        dialog = SnippetDialog(self, name, code)
+        name, code = current_index.data(Qt.ItemDataRole.UserRole)
+        protected = is_snippet_protected(name)
+        code = self.reveal_code(self._stored_code(name, code))
+        if code is None:
+            return
+        from ui.dialogs import SnippetDialog
+        dialog = SnippetDialog(self, name, code, protected)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_name, new_code = dialog.get_data()
             if new_name and new_code:
+                if dialog.is_protected() and not self.ensure_unlocked():
+                    return
                 try:
-                    update_snippet(name, new_name, new_code)
-                    self._refresh_list(search_snippets(self.search_box.text()))
+                    update_snippet(name, new_name, new_code, protected=dialog.is_protected())
                 except ValueError as e:
                     msg = QMessageBox(self)
                     _add_app_icon_to_msgbox(msg)
@@ -856,13 +751,13 @@ class SnippetOverlay(QWidget):
                 msg.warning(self, "Error", "Select a snippet to edit.")
 
     def _on_delete(self):
-        current_item = self.list_widget.currentItem()
-        if not current_item:
+        current_index = self.list_view.currentIndex()
+        if not current_index.isValid():
             msg = QMessageBox(self)
             _add_app_icon_to_msgbox(msg)
             msg.information(self, "Delete", "Select a snippet to delete.")
             return
-        name, _ = current_item.data(Qt.ItemDataRole.UserRole)
+        name, _ = current_index.data(Qt.ItemDataRole.UserRole)
         msg = QMessageBox(self)
         _add_app_icon_to_msgbox(msg)
         reply = msg.question(
@@ -872,7 +767,6 @@ class SnippetOverlay(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 delete_snippet(name)
-                self._refresh_list(search_snippets(self.search_box.text()))
             except ValueError as e:
                 msg2 = QMessageBox(self)
                 _add_app_icon_to_msgbox(msg2)
@@ -891,21 +785,36 @@ class SnippetOverlay(QWidget):
 
 
 class NumberSelector(QDialog):
-    """Modal window to select number after double Ctrl."""
+    """
+    Modal window to select number after double Ctrl.
+
+    Se crea una sola vez al arrancar y queda oculto: cada F12 solo
+    actualiza las etiquetas si cambió la config (refresh_from_config)
+    y lo vuelve a mostrar.
+    """
+
+    # HotkeysChanged de core.events, reenviado al hilo de Qt
+    _hotkeys_event = pyqtSignal(object)
     
     def __init__(self, hotkey_config, on_snippet_selected_callback):
         super().__init__()
-        self.hotkey_config = hotkey_config
+        self.hotkey_config = dict(hotkey_config)
         self.on_snippet_selected = on_snippet_selected_callback
+        # Generación de config con la que se pintaron las etiquetas
+        self._config_generation = get_config().generation
+        # Momento (perf_counter) en que se pidió mostrarlo, para medir latencia
+        self._requested_at: Optional[float] = None
+        self.last_latency_ms: Optional[float] = None
+        # Cambios de hotkeys publicados por core.manager, en el hilo de Qt
+        self._hotkeys_event.connect(self._on_hotkeys_changed)
+        get_event_bus().subscribe(self._hotkeys_event.emit, HotkeysChanged)
         
         self.setWindowTitle("Snippet Selector")
         
         # Cargar ícono de la aplicación
-        import os
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
-        if os.path.exists(icon_path):
-            from PyQt6.QtGui import QIcon
-            self.setWindowIcon(QIcon(icon_path))
+        icon = app_icon()
+        if icon is not None:
+            self.setWindowIcon(icon)
         
         # Quitar modal para system tray
         self.setModal(False)
@@ -917,6 +826,7 @@ class NumberSelector(QDialog):
         # Centrar en pantalla
         self.center_on_screen()
         
+        # Un solo stylesheet para el diálogo y todas las etiquetas de slots
         self.setStyleSheet("""
         QDialog {
             background-color: #1e1e1e;
@@ -928,6 +838,13 @@ class NumberSelector(QDialog):
             color: #ffffff;
             font-size: 12px;
         }
+        QLabel#slotLabel {
+            background-color: #2a2a2a;
+            border: 1px solid #3a3a3a;
+            border-radius: 4px;
+            padding: 5px;
+            font-size: 10px;
+        }
         """)
 
         layout = QVBoxLayout(self)
@@ -944,36 +861,15 @@ class NumberSelector(QDialog):
         grid_layout = QGridLayout()
         grid_layout.setSpacing(5)
         
-        # Crear botones para números 1-9, 0
-        positions = [(i, j) for i in range(3) for j in range(3)] + [(3, 1)]  # 3x3 grid + 0 en el centro abajo
-        
-        number = 1
-        for pos in positions:
-            if number <= 9:
-                snippet_name = self.hotkey_config.get(f"shift_{number}", "None")
-                if snippet_name != "None":
-                    label_text = f"{number}: {snippet_name[:15]}{'...' if len(snippet_name) > 15 else ''}"
-                else:
-                    label_text = f"{number}: (not assigned)"
-                number += 1
-            else:  # número 0
-                snippet_name = self.hotkey_config.get("shift_0", "None")
-                if snippet_name != "None":
-                    label_text = f"0: {snippet_name[:15]}{'...' if len(snippet_name) > 15 else ''}"
-                else:
-                    label_text = f"0: (not assigned)"
-            
-            label = QLabel(label_text)
-            label.setStyleSheet("""
-            QLabel {
-                background-color: #2a2a2a;
-                border: 1px solid #3a3a3a;
-                border-radius: 4px;
-                padding: 5px;
-                font-size: 10px;
-            }
-            """)
+        # Crear etiquetas para números 1-9, 0 (3x3 grid + 0 en el centro abajo)
+        positions = [(i, j) for i in range(3) for j in range(3)] + [(3, 1)]
+        self._slot_labels: Dict[int, QLabel] = {}
+        for number, pos in zip([1, 2, 3, 4, 5, 6, 7, 8, 9, 0], positions):
+            label = QLabel()
+            label.setObjectName("slotLabel")
             grid_layout.addWidget(label, pos[0], pos[1])
+            self._slot_labels[number] = label
+        self._update_labels()
 
         layout.addLayout(grid_layout)
 
@@ -986,6 +882,59 @@ class NumberSelector(QDialog):
         # Centrar la ventana
         self.center_on_screen()
 
+    def _update_labels(self):
+        for number, label in self._slot_labels.items():
+            snippet_name = self.hotkey_config.get(f"shift_{number}", "None")
+            if snippet_name != "None":
+                label_text = f"{number}: {snippet_name[:15]}{'...' if len(snippet_name) > 15 else ''}"
+            else:
+                label_text = f"{number}: (not assigned)"
+            if label.text() != label_text:
+                label.setText(label_text)
+
+    def update_hotkeys(self, hotkey_config):
+        """Actualiza las etiquetas en su lugar con una nueva asignación de hotkeys."""
+        self.hotkey_config = dict(hotkey_config)
+        self._update_labels()
+
+    def _on_hotkeys_changed(self, event: HotkeysChanged):
+        """Aplica solo los slots que cambiaron (aunque el selector esté oculto)."""
+        self.hotkey_config.update(event.assignments)
+        self._update_labels()
+        self._config_generation = get_config().generation
+
+    def refresh_from_config(self):
+        """Relee las hotkeys solo si la config cambió desde la última vez."""
+        config = get_config()
+        generation = config.generation
+        if generation != self._config_generation:
+            self.update_hotkeys(config.hotkeys())
+            self._config_generation = generation
+
+    def popup(self, requested_at: Optional[float] = None):
+        """
+        Muestra el selector ya construido. `requested_at` es el
+        time.perf_counter() del momento en que se pulsó la hotkey; la
+        latencia hasta que se pinta se mide en paintEvent.
+        """
+        self._requested_at = requested_at
+        self.refresh_from_config()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.setFocus()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._requested_at is not None:
+            self.last_latency_ms = (time.perf_counter() - self._requested_at) * 1000
+            self._requested_at = None
+            if self.last_latency_ms > SELECTOR_LATENCY_TARGET_MS:
+                print(f"⚠️ [SELECTOR] Visible en {self.last_latency_ms:.1f} ms "
+                      f"(objetivo < {SELECTOR_LATENCY_TARGET_MS} ms)")
+            else:
+                print(f"✅ [SELECTOR] Visible en {self.last_latency_ms:.1f} ms")
+
     def center_on_screen(self):
         """Centrar la ventana en la pantalla."""
         screen = QApplication.primaryScreen().availableGeometry()